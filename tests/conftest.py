@@ -0,0 +1,9 @@
+# coding=utf-8
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def log_dir(tmp_path, monkeypatch):
+    """keep the log files of the loggers created by tests out of the tree"""
+
+    monkeypatch.chdir(tmp_path)
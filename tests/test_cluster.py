@@ -0,0 +1,156 @@
+# coding=utf-8
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from vhpc_toolkit.cluster import Cluster
+from vhpc_toolkit.cluster import MODEL_VERSION
+
+MULTI_RANGE_CONF = """\
+[BASE]
+template: vhpc_clone
+cpu: 4
+
+[_VMS_]
+rack{1:2}-cpu{1:2}: BASE
+rack{1:2}-gpu{1:2}: BASE gpus:1
+  host:vhpc-esx-0{1:2}.hpc.vmware.com
+"""
+
+
+@pytest.fixture(autouse=True)
+def confirm_ranges(monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt: "y")
+
+
+def write_conf(tmp_path, content, name="cluster.conf"):
+    conf = tmp_path / name
+    conf.write_text(content)
+    return str(conf)
+
+
+def test_vm_rows_with_multiple_ranges(tmp_path):
+    model = Cluster(write_conf(tmp_path, MULTI_RANGE_CONF)).compile(use_cache=False)
+    assert [vm_cfg["vm"] for vm_cfg in model.vms] == [
+        "rack1-cpu1",
+        "rack1-cpu2",
+        "rack2-cpu1",
+        "rack2-cpu2",
+        "rack1-gpu1",
+        "rack1-gpu2",
+        "rack2-gpu1",
+        "rack2-gpu2",
+    ]
+    assert all(vm_cfg["template"] == "vhpc_clone" for vm_cfg in model.vms)
+    # the continuation line belongs to the gpu row
+    assert "host" not in model.vms[0]
+    assert [vm_cfg["host"] for vm_cfg in model.vms[4:6]] == [
+        "vhpc-esx-01.hpc.vmware.com",
+        "vhpc-esx-02.hpc.vmware.com",
+    ]
+
+
+def test_vm_rows_with_equals_and_comments(tmp_path):
+    content = "[_VMS_]\n# the frontend\nhead = template:vhpc_clone\n; done\n"
+    model = Cluster(write_conf(tmp_path, content)).compile(use_cache=False)
+    assert model.vms == [{"vm": "head", "template": "vhpc_clone"}]
+
+
+def test_duplicate_vm_rows(tmp_path):
+    content = "[_VMS_]\nnode{1:2}: template:a\nnode{1:2}: template:b\n"
+    with pytest.raises(SystemExit):
+        Cluster(write_conf(tmp_path, content)).compile(use_cache=False)
+
+
+def test_no_vm_section(tmp_path):
+    content = "[_SVS_]\nvswitch1: host:vhpc-esx-01.hpc.vmware.com\n"
+    model = Cluster(write_conf(tmp_path, content)).compile(use_cache=False)
+    assert model.vms == []
+    assert model.svs[0]["name"] == "vswitch1"
+
+
+SIMPLE_CONF = "[_VMS_]\nhead: template:vhpc_clone cpu:4\n"
+
+
+def compile_cached(conf, cache_dir):
+    return Cluster(conf, cache_dir=str(cache_dir)).compile()
+
+
+def cache_files(cache_dir):
+    return sorted(path.name for path in cache_dir.iterdir())
+
+
+def test_cache_hit(tmp_path, monkeypatch):
+    conf = write_conf(tmp_path, SIMPLE_CONF)
+    cache_dir = tmp_path / "cache"
+    model = compile_cached(conf, cache_dir)
+    assert cache_files(cache_dir) == [model.digest + ".json"]
+
+    def parse(*args, **kwargs):
+        raise AssertionError("an unchanged file is parsed again")
+
+    monkeypatch.setattr(Cluster, "read_vm_section", parse)
+    cached = compile_cached(conf, cache_dir)
+    assert (
+        cached.vms == model.vms == [{"vm": "head", "template": "vhpc_clone", "cpu": 4}]
+    )
+    assert cached.path == model.path == str(tmp_path / "cluster.conf")
+
+
+def test_cache_miss_on_change(tmp_path):
+    conf = write_conf(tmp_path, SIMPLE_CONF)
+    cache_dir = tmp_path / "cache"
+    model = compile_cached(conf, cache_dir)
+    write_conf(tmp_path, SIMPLE_CONF.replace("cpu:4", "cpu:8"))
+    changed = compile_cached(conf, cache_dir)
+    assert changed.digest != model.digest
+    assert changed.vms[0]["cpu"] == 8
+    # the model of the previous content is pruned
+    assert cache_files(cache_dir) == [changed.digest + ".json"]
+
+
+def test_cache_version_invalidation(tmp_path):
+    conf = write_conf(tmp_path, SIMPLE_CONF)
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    digest = Cluster(conf, cache_dir=str(cache_dir)).digest
+    stale = {"version": MODEL_VERSION - 1, "digest": digest, "vms": []}
+    (cache_dir / (digest + ".json")).write_text(json.dumps(stale))
+    (cache_dir / "legacy.json").write_text(json.dumps({"version": 1}))
+    model = compile_cached(conf, cache_dir)
+    assert model.vms[0]["vm"] == "head"
+    assert cache_files(cache_dir) == [digest + ".json"]
+    with open(str(cache_dir / (digest + ".json"))) as f:
+        assert json.load(f)["version"] == MODEL_VERSION
+
+
+def test_cache_keeps_other_files(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = compile_cached(write_conf(tmp_path, SIMPLE_CONF, "a.conf"), cache_dir)
+    second = compile_cached(
+        write_conf(tmp_path, SIMPLE_CONF.replace("head", "login"), "b.conf"),
+        cache_dir,
+    )
+    assert cache_files(cache_dir) == sorted(
+        [first.digest + ".json", second.digest + ".json"]
+    )
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX modes")
+def test_cache_modes(tmp_path):
+    cache_dir = tmp_path / "cache"
+    model = compile_cached(write_conf(tmp_path, SIMPLE_CONF), cache_dir)
+    assert stat.S_IMODE(os.stat(str(cache_dir)).st_mode) == 0o700
+    cache_file = cache_dir / (model.digest + ".json")
+    assert stat.S_IMODE(os.stat(str(cache_file)).st_mode) == 0o600
+
+
+def test_cache_disabled(tmp_path):
+    cache_dir = tmp_path / "cache"
+    Cluster(write_conf(tmp_path, SIMPLE_CONF), cache_dir=str(cache_dir)).compile(
+        use_cache=False
+    )
+    assert not cache_dir.exists()
@@ -0,0 +1,163 @@
+# coding=utf-8
+from vhpc_toolkit.planner import DevicePlanner
+from vhpc_toolkit.planner import vgpu_framebuffer
+
+
+def host_record(
+    cluster="cluster1",
+    passthru=(),
+    gpus=(),
+    vfs=None,
+    vgpu_types=(),
+    vgpu_gpus=0,
+    vgpu_used=None,
+    connection_state="connected",
+):
+    return {
+        "cluster": cluster,
+        "connection_state": connection_state,
+        "passthru": [
+            {"id": device, "enabled": True, "used": False, "gpu": device in gpus}
+            for device in list(passthru) + list(gpus)
+        ],
+        "sriov": [
+            {"id": pf, "enabled": True, "free_vf": free_vf}
+            for pf, free_vf in (vfs or {}).items()
+        ],
+        "vgpu_types": list(vgpu_types),
+        "vgpu_gpus": vgpu_gpus,
+        "vgpu_used": vgpu_used or {},
+    }
+
+
+def planner(**hosts):
+    return DevicePlanner({"hosts": hosts})
+
+
+def test_vgpu_framebuffer():
+    assert vgpu_framebuffer("grid_v100-8q") == 8
+    assert vgpu_framebuffer("grid_v100-16c") == 16
+    assert vgpu_framebuffer("custom") is None
+
+
+def test_needs_plan():
+    assert DevicePlanner.needs_plan({"vm": "vm1", "gpus": 1})
+    assert DevicePlanner.needs_plan({"vm": "vm1", "sriov_port_group": "pg1"})
+    assert not DevicePlanner.needs_plan({"vm": "vm1", "cpu": 4})
+
+
+def test_disconnected_hosts_are_skipped():
+    plan = planner(
+        host1=host_record(gpus=["0000:3b:00.0"], connection_state="disconnected")
+    )
+    failures = plan.plan([{"vm": "vm1", "gpus": 1}])
+    assert [vm for vm, _ in failures] == ["vm1"]
+
+
+def test_gpus_are_not_shared():
+    plan = planner(
+        host1=host_record(gpus=["0000:3b:00.0"]),
+        host2=host_record(gpus=["0000:d8:00.0"]),
+    )
+    vm_cfgs = [{"vm": "vm1", "gpus": 1}, {"vm": "vm2", "gpus": 1}]
+    assert plan.plan(vm_cfgs) == []
+    assert {vm_cfg["host"] for vm_cfg in vm_cfgs} == {"host1", "host2"}
+    failures = plan.plan([{"vm": "vm3", "gpus": 1}])
+    assert [vm for vm, _ in failures] == ["vm3"]
+
+
+def test_given_host_is_kept():
+    plan = planner(
+        host1=host_record(gpus=["0000:3b:00.0"]),
+        host2=host_record(gpus=["0000:d8:00.0"]),
+    )
+    vm_cfg = {"vm": "vm1", "gpus": 1, "host": "host2"}
+    assert plan.plan([vm_cfg]) == []
+    assert vm_cfg["host"] == "host2"
+    assert vm_cfg["device"] == ["0000:d8:00.0"]
+
+
+def test_largest_demand_is_placed_first():
+    plan = planner(
+        host1=host_record(gpus=["0000:3b:00.0"]),
+        host2=host_record(gpus=["0000:d8:00.0", "0000:d9:00.0"]),
+    )
+    small = {"vm": "small", "gpus": 1}
+    large = {"vm": "large", "gpus": 2}
+    assert plan.plan([small, large]) == []
+    assert large["host"] == "host2"
+    assert small["host"] == "host1"
+
+
+def test_cluster_limits_candidates():
+    plan = planner(
+        host1=host_record(cluster="cluster1", gpus=["0000:3b:00.0"]),
+        host2=host_record(cluster="cluster2", gpus=["0000:d8:00.0"]),
+    )
+    vm_cfg = {"vm": "vm1", "gpus": 1, "cluster": "cluster2"}
+    assert plan.plan([vm_cfg]) == []
+    assert vm_cfg["host"] == "host2"
+
+
+def test_passthrough_device_must_be_free():
+    plan = planner(host1=host_record(passthru=["0000:af:00.0"]))
+    assert plan.plan([{"vm": "vm1", "device": ["0000:AF:00.0"]}]) == []
+    failures = plan.plan([{"vm": "vm2", "device": "0000:af:00.0"}])
+    assert failures == [("vm2", "device 0000:af:00.0 is not available on host1")]
+
+
+def test_vfs_use_pf_with_most_free_vfs():
+    plan = planner(host1=host_record(vfs={"0000:5e:00.0": 1, "0000:5e:00.1": 2}))
+    vm_cfg = {"vm": "vm1", "sriov_port_group": ["pg1", "pg2"]}
+    assert plan.plan([vm_cfg]) == []
+    assert vm_cfg["pf"] == ["0000:5e:00.1", "0000:5e:00.0"]
+    failures = plan.plan([{"vm": "vm2", "sriov_port_group": ["pg1", "pg2"]}])
+    assert [vm for vm, _ in failures] == ["vm2"]
+
+
+def test_given_pfs_need_free_vfs():
+    plan = planner(host1=host_record(vfs={"0000:5e:00.0": 1}))
+    vm_cfg = {"vm": "vm1", "sriov_port_group": "pg1", "pf": "0000:5E:00.0"}
+    assert plan.plan([vm_cfg]) == []
+    assert vm_cfg["pf"] == ["0000:5e:00.0"]
+    failures = plan.plan(
+        [{"vm": "vm2", "sriov_port_group": "pg1", "pf": "0000:5e:00.0"}]
+    )
+    assert failures == [("vm2", "not enough free SR-IOV VFs on host1")]
+
+
+def test_pf_count_must_match_port_groups():
+    plan = planner(host1=host_record(vfs={"0000:5e:00.0": 4, "0000:5e:00.1": 4}))
+    vm_cfgs = [
+        {
+            "vm": "vm1",
+            "sriov_port_group": ["pg1", "pg2"],
+            "pf": "0000:5e:00.0",
+        },
+        {
+            "vm": "vm2",
+            "sriov_port_group": "pg1",
+            "pf": ["0000:5e:00.0", "0000:5e:00.1"],
+        },
+    ]
+    assert plan.plan(vm_cfgs) == [
+        ("vm1", "1 pf(s) given for 2 sriov_port_group(s)"),
+        ("vm2", "2 pf(s) given for 1 sriov_port_group(s)"),
+    ]
+    assert "host" not in vm_cfgs[0] and "host" not in vm_cfgs[1]
+
+
+def test_vgpu_capacity_per_profile():
+    # a 16 GB GPU backs two 8q vGPUs, and only vGPUs of one profile
+    plan = planner(
+        host1=host_record(
+            vgpu_types=["grid_v100-8q", "grid_v100-16q"],
+            vgpu_gpus=2,
+            vgpu_used={"grid_v100-16q": 1},
+        )
+    )
+    vm_cfgs = [{"vm": "vm{0}".format(i), "vgpu": "grid_v100-8q"} for i in range(3)]
+    failures = plan.plan(vm_cfgs)
+    assert [vm for vm, _ in failures] == ["vm2"]
+    failures = plan.plan([{"vm": "vm3", "vgpu": "grid_v100-4q"}])
+    assert failures == [("vm3", "vGPU profile grid_v100-4q is not available on host1")]
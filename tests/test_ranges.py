@@ -0,0 +1,165 @@
+# coding=utf-8
+import pytest
+
+from vhpc_toolkit.ranges import compile_range
+from vhpc_toolkit.ranges import RangeExpr
+from vhpc_toolkit.ranges import RangeField
+from vhpc_toolkit.ranges import RangeSyntaxError
+
+
+def test_literal_value():
+    expr = RangeExpr("vhpc-esx-01.hpc.vmware.com")
+    assert not expr.is_range
+    assert list(expr) == ["vhpc-esx-01.hpc.vmware.com"]
+    assert len(expr) == 1
+
+
+def test_integer_range():
+    assert list(RangeExpr("compute{1:4}")) == [
+        "compute1",
+        "compute2",
+        "compute3",
+        "compute4",
+    ]
+
+
+def test_leading_zeros_do_not_pad():
+    # compatible with the files written before padding was supported
+    assert list(RangeExpr("rhel-hpc-demo-compute{001:004}")) == [
+        "rhel-hpc-demo-compute1",
+        "rhel-hpc-demo-compute2",
+        "rhel-hpc-demo-compute3",
+        "rhel-hpc-demo-compute4",
+    ]
+
+
+def test_padding():
+    expr = RangeExpr("node{1:12#2}")
+    assert expr[0] == "node01"
+    assert expr[11] == "node12"
+    assert list(RangeExpr("esx{8:12#3}")) == [
+        "esx008",
+        "esx009",
+        "esx010",
+        "esx011",
+        "esx012",
+    ]
+    # a width smaller than the values doesn't cut them
+    assert list(RangeExpr("{9:11#1}")) == ["9", "10", "11"]
+
+
+def test_step():
+    assert list(RangeExpr("{1:9:2}")) == ["1", "3", "5", "7", "9"]
+    assert list(RangeExpr("{8:2:-3}")) == ["8", "5", "2"]
+    assert list(RangeExpr("{10:1}")) == [str(i) for i in range(10, 0, -1)]
+    # the end is included only if the step reaches it
+    assert list(RangeExpr("{1:10:4}")) == ["1", "5", "9"]
+    assert list(RangeExpr("{2:10:4#2}")) == ["02", "06", "10"]
+
+
+def test_list():
+    assert list(RangeExpr("{ib,eth}0")) == ["ib0", "eth0"]
+    assert list(RangeExpr("{a,b,c}")) == ["a", "b", "c"]
+
+
+def test_product():
+    expr = RangeExpr("rack{1:2}-node{1:3#2}")
+    assert len(expr) == 6
+    assert list(expr) == [
+        "rack1-node01",
+        "rack1-node02",
+        "rack1-node03",
+        "rack2-node01",
+        "rack2-node02",
+        "rack2-node03",
+    ]
+    assert [expr[index] for index in range(len(expr))] == list(expr)
+
+
+def test_large_product_is_lazy():
+    expr = RangeExpr("rack{1:64#2}-node{1:64#2}-{1:64}")
+    assert len(expr) == 64**3
+    assert expr[0] == "rack01-node01-1"
+    assert expr[len(expr) - 1] == "rack64-node64-64"
+    assert expr[64 * 64 + 1] == "rack02-node01-2"
+
+
+def test_zip():
+    expr = RangeExpr("node{1:4}-ib{~101:104}")
+    assert list(expr) == ["node1-ib101", "node2-ib102", "node3-ib103", "node4-ib104"]
+    expr = RangeExpr("rack{1:2}-node{1:2}-{~a,b}")
+    assert list(expr) == [
+        "rack1-node1-a",
+        "rack1-node2-b",
+        "rack2-node1-a",
+        "rack2-node2-b",
+    ]
+
+
+def test_index_out_of_range():
+    expr = RangeExpr("{1:4}")
+    with pytest.raises(IndexError):
+        expr[4]
+    with pytest.raises(IndexError):
+        expr[-1]
+
+
+def test_non_range_braces_are_kept():
+    assert not RangeField.is_field("variable")
+    expr = RangeExpr("${HOME}/node{1:2}")
+    assert list(expr) == ["${HOME}/node1", "${HOME}/node2"]
+
+
+def test_mapped_round_robin():
+    expr = RangeExpr("vhpc-esx-0{2:3}.hpc.vmware.com")
+    assert not expr.bunch
+    assert expr.mapped(4) == [
+        "vhpc-esx-02.hpc.vmware.com",
+        "vhpc-esx-03.hpc.vmware.com",
+        "vhpc-esx-02.hpc.vmware.com",
+        "vhpc-esx-03.hpc.vmware.com",
+    ]
+
+
+def test_mapped_consecutive():
+    expr = RangeExpr("vhpc-esx-0{{2:3}}.hpc.vmware.com")
+    assert expr.bunch
+    assert expr.mapped(4) == [
+        "vhpc-esx-02.hpc.vmware.com",
+        "vhpc-esx-02.hpc.vmware.com",
+        "vhpc-esx-03.hpc.vmware.com",
+        "vhpc-esx-03.hpc.vmware.com",
+    ]
+    # uneven: the earlier values take the extra items
+    assert RangeExpr("{{1:3}}").mapped(7) == ["1", "1", "1", "2", "2", "3", "3"]
+
+
+def test_mapped_same_size():
+    expr = RangeExpr("10.0.0.{1:3}")
+    assert expr.mapped(3) == list(expr)
+    assert RangeExpr("{{1:3}}").mapped(3) == ["1", "2", "3"]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "{1:4:0}",
+        "{1:4:-1}",
+        "{4:1:2}",
+        "{a,,b}",
+        "{1:2}{{1:2}}",
+        "{~1:2}",
+        "{1:2}{~1:3}",
+    ],
+)
+def test_syntax_errors(text):
+    with pytest.raises(RangeSyntaxError):
+        RangeExpr(text)
+
+
+def test_syntax_error_is_value_error():
+    assert issubclass(RangeSyntaxError, ValueError)
+
+
+def test_compile_range_is_cached():
+    assert compile_range("node{1:4}") is compile_range("node{1:4}")
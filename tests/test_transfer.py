@@ -0,0 +1,175 @@
+# coding=utf-8
+import os
+import shutil
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from vhpc_toolkit.transfer import FanOut
+from vhpc_toolkit.transfer import GuestLogCollector
+from vhpc_toolkit.transfer import TAIL_MIN_GROWTH
+from vhpc_toolkit.wait import GuestProc
+
+
+class FakeGuest(object):
+    """a guest log served like guest file transfers: whole, from its start"""
+
+    def __init__(self):
+        self.log = b""
+        self.read = 0
+        self.fileManager = self
+
+    def InitiateFileTransferFromGuest(self, vm, auth, guestFilePath):
+        return SimpleNamespace(size=len(self.log), url="https://*:443/log")
+
+    def session(self, host):
+        return self
+
+    def get(self, url, stream=True):
+        self.read += len(self.log)
+        return SimpleNamespace(
+            raise_for_status=lambda: None,
+            iter_content=lambda chunk_size: [self.log],
+        )
+
+    def close(self):
+        pass
+
+
+class FakeVM(object):
+    name = "vm1"
+    runtime = SimpleNamespace(host=SimpleNamespace(name="esx1"))
+
+
+def make_collector(tmp_path):
+    guest = FakeGuest()
+    collector = GuestLogCollector(guest, str(tmp_path))
+    collector.sessions = guest
+    vm_obj = FakeVM()
+    proc = GuestProc(1, None, vm_obj, "vm1", "post.sh", "vhpc_toolkit_logs/post.sh.log")
+    return guest, collector, proc, tmp_path / "vm1" / "post.sh.log"
+
+
+def test_fetch_appends_new_output(tmp_path):
+    guest, collector, proc, local_file = make_collector(tmp_path)
+    guest.log = b"line 1\n"
+    collector.fetch([proc])
+    guest.log += b"line 2\n"
+    collector.fetch([proc])
+    assert local_file.read_bytes() == b"line 1\nline 2\n"
+
+
+def test_tail_waits_for_the_log_to_grow(tmp_path):
+    guest, collector, proc, local_file = make_collector(tmp_path)
+    guest.log = b"x" * TAIL_MIN_GROWTH
+    collector.fetch([proc], tail=True)
+    assert local_file.stat().st_size == TAIL_MIN_GROWTH
+    # less than doubled: not fetched again while running
+    guest.log += b"y" * (TAIL_MIN_GROWTH - 1)
+    collector.fetch([proc], tail=True)
+    assert local_file.stat().st_size == TAIL_MIN_GROWTH
+    # once ended, the rest is fetched
+    collector.fetch([proc])
+    assert local_file.read_bytes() == guest.log
+
+
+def test_tail_reads_linear_bytes(tmp_path):
+    guest, collector, proc, local_file = make_collector(tmp_path)
+    for _ in range(1000):
+        guest.log += b"z" * 1024
+        collector.fetch([proc], tail=True)
+    collector.fetch([proc])
+    assert local_file.read_bytes() == guest.log
+    assert guest.read <= 3 * len(guest.log)
+
+
+FAKE_SCP = """#!/bin/sh
+# copy the files into <root>/<target>, except to an unreachable target
+for last; do :; done
+target=${last%:}
+[ "$target" = "root@10.0.0.3" ] && exit 1
+mkdir -p "$ROOT/$target"
+while [ $# -gt 1 ]; do
+    case $1 in -q|-o|BatchMode=yes|StrictHostKeyChecking=no) ;;
+        *) cp "$1" "$ROOT/$target/" ;;
+    esac
+    shift
+done
+"""
+
+FAKE_SSH = """#!/bin/sh
+# run the command in <root>/<target>
+shift 4
+target=$1
+shift
+cd "$ROOT/$target" && sh -c "$*"
+"""
+
+
+def test_fan_out_command(tmp_path):
+    payload = tmp_path / "installer.run"
+    payload.write_text("")
+    fan_out = FanOut(
+        [str(payload)], {"root@10.0.0.2": "vm2", "root@10.0.0.1": "vm1"}, fanout=2
+    )
+    try:
+        assert fan_out.command() == (
+            "sh vhpc_fanout.sh 2 vhpc_fanout.files root@10.0.0.1 root@10.0.0.2 "
+            "> vhpc_fanout.done"
+        )
+        with open(fan_out.file_list) as f:
+            assert f.read() == "installer.run\n"
+    finally:
+        fan_out.cleanup()
+
+
+def test_fan_out_distributed():
+    fan_out = FanOut([], {"root@10.0.0.1": "vm1", "hpc@10.0.0.2": "vm2"})
+    fan_out.cleanup()
+    assert fan_out.distributed(b"root@10.0.0.1\nroot@10.0.0.2\n") == {"vm1"}
+    assert fan_out.distributed(b"") == set()
+    assert fan_out.distributed(None) == set()
+
+
+@pytest.mark.parametrize(
+    "names",
+    [["my installer.run"], ["*.rpm"], ["-rf"], ["a/setup.sh", "b/setup.sh"]],
+)
+def test_fan_out_rejects_file_names(tmp_path, names):
+    files = []
+    for name in names:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+        files.append(str(path))
+    with pytest.raises(SystemExit):
+        FanOut(files, {"root@10.0.0.1": "vm1"})
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a POSIX shell")
+def test_fan_out_script(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, content in [("scp", FAKE_SCP), ("ssh", FAKE_SSH)]:
+        (bin_dir / name).write_text(content)
+        (bin_dir / name).chmod(0o755)
+    head = tmp_path / "head"
+    head.mkdir()
+    script = tmp_path / "setup.sh"
+    script.write_text("echo setup\n")
+    targets = {"root@10.0.0.{0}".format(i): "vm{0}".format(i) for i in range(1, 8)}
+    fan_out = FanOut([str(script)], targets, fanout=2)
+    for file in [fan_out.script, fan_out.file_list, str(script)]:
+        shutil.copy(file, str(head))
+    fan_out.cleanup()
+    monkeypatch.setenv("ROOT", str(tmp_path))
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    subprocess.run(fan_out.command(), shell=True, cwd=str(head), check=True)
+    done = (head / FanOut.DONE).read_bytes()
+    # 10.0.0.1 leads the subtree of 10.0.0.2-4; the subtree of 10.0.0.3
+    # (the unreachable target) is just itself
+    assert fan_out.distributed(done) == {"vm1", "vm2", "vm4", "vm5", "vm6", "vm7"}
+    for target in ["root@10.0.0.2", "root@10.0.0.7"]:
+        assert (tmp_path / target / "setup.sh").read_text() == "echo setup\n"
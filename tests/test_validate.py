@@ -0,0 +1,220 @@
+# coding=utf-8
+import itertools
+
+from vhpc_toolkit.validate import out_of_tolerance
+from vhpc_toolkit.validate import PAIR_COLUMNS
+from vhpc_toolkit.validate import pair_rounds
+from vhpc_toolkit.validate import parse_active_mtu
+from vhpc_toolkit.validate import parse_perftest
+from vhpc_toolkit.validate import parse_stream
+
+STREAM_OUTPUT = """\
+-------------------------------------------------------------
+STREAM version $Revision: 5.10 $
+-------------------------------------------------------------
+This system uses 8 bytes per array element.
+-------------------------------------------------------------
+Array size = 80000000 (elements), Offset = 0 (elements)
+Memory per array = 610.4 MiB (= 0.6 GiB).
+Total memory required = 1831.1 MiB (= 1.8 GiB).
+Each kernel will be executed 10 times.
+ The *best* time for each kernel (excluding the first iteration)
+ will be used to compute the reported bandwidth.
+-------------------------------------------------------------
+Number of Threads requested = 16
+Number of Threads counted = 16
+-------------------------------------------------------------
+Your clock granularity/precision appears to be 1 microseconds.
+Each test below will take on the order of 21503 microseconds.
+   (= 21503 clock ticks)
+Increase the size of the arrays if this shows that
+you are not getting at least 20 clock ticks per test.
+-------------------------------------------------------------
+WARNING -- The above is only a rough guideline.
+For best results, please be sure you know the
+precision of your system timer.
+-------------------------------------------------------------
+Function    Best Rate MB/s  Avg time     Min time     Max time
+Copy:           71245.3     0.018201     0.017965     0.018622
+Scale:          70512.8     0.018394     0.018152     0.018750
+Add:            79634.1     0.024368     0.024110     0.024731
+Triad:          79815.6     0.024297     0.024055     0.024602
+-------------------------------------------------------------
+Solution Validates: avg error less than 1.000000e-13 on all three arrays
+-------------------------------------------------------------
+"""
+
+BW_OUTPUT = """\
+---------------------------------------------------------------------------------------
+                    RDMA_Write BW Test
+ Dual-port       : OFF\t\tDevice         : mlx5_0
+ Number of qps   : 1\t\tTransport type : IB
+ Connection type : RC\t\tUsing SRQ      : OFF
+ PCIe relax order: ON
+ TX depth        : 128
+ CQ Moderation   : 1
+ Mtu             : 4096[B]
+ Link type       : IB
+ Max inline data : 0[B]
+ rdma_cm QPs\t : OFF
+ Data ex. method : Ethernet
+---------------------------------------------------------------------------------------
+ local address: LID 0x05 QPN 0x0127 PSN 0x6f3c2a RKey 0x1fff00 VAddr 0x007f1a2b3c4000
+ remote address: LID 0x06 QPN 0x0128 PSN 0x2b1d9e RKey 0x1fff01 VAddr 0x007f8e9d0a1000
+---------------------------------------------------------------------------------------
+ #bytes     #iterations    BW peak[MB/sec]    BW average[MB/sec]   MsgRate[Mpps]
+ 65536      5000             11756.34            11749.07\t\t   0.187985
+---------------------------------------------------------------------------------------
+"""
+
+LAT_OUTPUT = """\
+---------------------------------------------------------------------------------------
+                    RDMA_Write Latency Test
+ Dual-port       : OFF\t\tDevice         : mlx5_0
+ Number of qps   : 1\t\tTransport type : IB
+ Connection type : RC\t\tUsing SRQ      : OFF
+ PCIe relax order: ON
+ TX depth        : 1
+ Mtu             : 4096[B]
+ Link type       : IB
+ Max inline data : 220[B]
+ rdma_cm QPs\t : OFF
+ Data ex. method : Ethernet
+---------------------------------------------------------------------------------------
+ local address: LID 0x05 QPN 0x0129 PSN 0x51d2e0 RKey 0x1fff02 VAddr 0x007f1a2b3c6000
+ remote address: LID 0x06 QPN 0x012a PSN 0x9c04b7 RKey 0x1fff03 VAddr 0x007f8e9d0a3000
+---------------------------------------------------------------------------------------
+ #bytes #iterations    t_min[usec]    t_max[usec]  t_typical[usec]    t_avg[usec]    t_stdev[usec]   99% percentile[usec]   99.9% percentile[usec]
+ 2       1000          0.98           3.77         1.01     \t1.02        \t0.07   \t1.12    \t\t3.77
+---------------------------------------------------------------------------------------
+"""
+
+BW_ALL_SIZES_OUTPUT = """\
+ #bytes     #iterations    BW peak[MB/sec]    BW average[MB/sec]   MsgRate[Mpps]
+ 2          5000             9.34               9.21   \t\t   4.826716
+ 4          5000             18.72              18.60  \t\t   4.875624
+ 8388608    5000             11760.12           11758.45\t\t   0.001402
+---------------------------------------------------------------------------------------
+"""
+
+IBV_DEVINFO_OUTPUT = """\
+hca_id:\tmlx5_0
+\ttransport:\t\t\tInfiniBand (0)
+\tfw_ver:\t\t\t\t20.31.1014
+\tphys_port_cnt:\t\t\t1
+\t\tport:\t1
+\t\t\tstate:\t\t\tPORT_ACTIVE (4)
+\t\t\tmax_mtu:\t\t4096 (5)
+\t\t\tactive_mtu:\t\t4096 (5)
+\t\t\tlink_layer:\t\tInfiniBand
+
+hca_id:\tmlx5_1
+\ttransport:\t\t\tInfiniBand (0)
+\t\tport:\t1
+\t\t\tstate:\t\t\tPORT_ACTIVE (4)
+\t\t\tmax_mtu:\t\t4096 (5)
+\t\t\tactive_mtu:\t\t2048 (4)
+\t\t\tlink_layer:\t\tInfiniBand
+"""
+
+
+def check_rounds(nodes):
+    rounds = pair_rounds(nodes)
+    pairs = [pair for pairs in rounds for pair in pairs]
+    # every pair of nodes exactly once
+    assert sorted(tuple(sorted(pair)) for pair in pairs) == sorted(
+        itertools.combinations(sorted(nodes), 2)
+    )
+    # no node twice in a round
+    for pairs in rounds:
+        in_round = [node for pair in pairs for node in pair]
+        assert len(in_round) == len(set(in_round))
+    return rounds
+
+
+def test_pair_rounds_even():
+    rounds = check_rounds(["vm1", "vm2", "vm3", "vm4"])
+    assert len(rounds) == 3
+    assert all(len(pairs) == 2 for pairs in rounds)
+
+
+def test_pair_rounds_odd():
+    rounds = check_rounds(["vm1", "vm2", "vm3", "vm4", "vm5"])
+    assert len(rounds) == 5
+    assert all(len(pairs) == 2 for pairs in rounds)
+
+
+def test_pair_rounds_large():
+    check_rounds(["vm{0}".format(i) for i in range(33)])
+
+
+def test_pair_rounds_too_few_nodes():
+    assert pair_rounds([]) == []
+    assert pair_rounds(["vm1"]) == []
+    assert pair_rounds(["vm1", "vm2"]) == [[("vm1", "vm2")]]
+
+
+def test_parse_stream():
+    assert parse_stream(STREAM_OUTPUT) == 79815.6
+
+
+def test_parse_stream_without_result():
+    assert parse_stream("stream: command not found\n") is None
+    assert parse_stream("") is None
+
+
+def test_parse_perftest_bw():
+    assert parse_perftest(BW_OUTPUT, PAIR_COLUMNS["bw"][0]) == 11749.07
+    assert parse_perftest(BW_OUTPUT, "BW peak[MB/sec]") == 11756.34
+    assert parse_perftest(BW_OUTPUT, "MsgRate[Mpps]") == 0.187985
+
+
+def test_parse_perftest_lat():
+    # the headers of the latency test are separated by a single space
+    assert parse_perftest(LAT_OUTPUT, PAIR_COLUMNS["lat"][0]) == 1.01
+    assert parse_perftest(LAT_OUTPUT, "#iterations") == 1000
+    assert parse_perftest(LAT_OUTPUT, "99.9% percentile[usec]") == 3.77
+
+
+def test_parse_perftest_last_row():
+    assert parse_perftest(BW_ALL_SIZES_OUTPUT, "BW average[MB/sec]") == 11758.45
+
+
+def test_parse_perftest_without_result():
+    failed = (
+        " Couldn't connect to 10.0.0.2:18515\nUnable to init the socket connection\n"
+    )
+    assert parse_perftest(failed, PAIR_COLUMNS["bw"][0]) is None
+    header_only = BW_OUTPUT.split(" 65536")[0]
+    assert parse_perftest(header_only, PAIR_COLUMNS["bw"][0]) is None
+
+
+def test_parse_active_mtu():
+    assert parse_active_mtu(IBV_DEVINFO_OUTPUT) == 2048
+    assert parse_active_mtu("No IB devices found\n") is None
+
+
+def test_out_of_tolerance_median():
+    values = {"vm1": 100.0, "vm2": 98.0, "vm3": 80.0, "vm4": None}
+    reference, flagged = out_of_tolerance(values, 10)
+    assert reference == 98.0
+    assert flagged == {"vm3": 80.0}
+
+
+def test_out_of_tolerance_target():
+    values = {"vm1": 100.0, "vm2": 98.0}
+    reference, flagged = out_of_tolerance(values, 5, target=105.0)
+    assert reference == 105.0
+    assert flagged == {"vm2": 98.0}
+
+
+def test_out_of_tolerance_lower_is_better():
+    values = {("vm1", "vm2"): 1.01, ("vm2", "vm1"): 1.02, ("vm1", "vm3"): 2.5}
+    reference, flagged = out_of_tolerance(values, 10, higher_is_better=False)
+    assert reference == 1.02
+    assert flagged == {("vm1", "vm3"): 2.5}
+
+
+def test_out_of_tolerance_nothing_measured():
+    assert out_of_tolerance({"vm1": None}, 10) == (None, {})
+    assert out_of_tolerance({}, 10) == (None, {})
@@ -0,0 +1,57 @@
+# coding=utf-8
+from types import SimpleNamespace
+
+from pyVmomi import vim
+
+from vhpc_toolkit.wait import GetWait
+from vhpc_toolkit.wait import GuestProc
+
+
+class FakeVM(object):
+    @property
+    def name(self):
+        raise AssertionError("the VM name is read from vCenter")
+
+
+class FakeProcessManager(object):
+    """lists the processes of a VM, failing the first calls per VM"""
+
+    def __init__(self, exit_codes, failures=None):
+        self.exit_codes = exit_codes
+        self.failures = dict(failures or {})
+
+    def ListProcessesInGuest(self, vm, auth, pids):
+        if self.failures.get(vm, 0):
+            self.failures[vm] -= 1
+            raise vim.fault.GuestOperationsUnavailable()
+        return [
+            SimpleNamespace(
+                pid=pid,
+                endTime=self.exit_codes[pid] is not None,
+                exitCode=self.exit_codes[pid],
+            )
+            for pid in pids
+        ]
+
+
+def proc(pid, vm_obj, vm_name):
+    return GuestProc(pid, None, vm_obj, vm_name, "post.sh", "post.sh.log")
+
+
+def test_check_procs():
+    vm1, vm2 = FakeVM(), FakeVM()
+    procs = [proc(1, vm1, "vm1"), proc(2, vm1, "vm1"), proc(3, vm2, "vm2")]
+    proc_mng = FakeProcessManager({1: None, 2: 0, 3: 1})
+    running, finished, failed = GetWait(sleep=0).check_procs(proc_mng, procs)
+    assert [p.pid for p in running] == [1]
+    assert [p.pid for p in finished] == [2, 3]
+    assert [p.pid for p in failed] == [3]
+
+
+def test_check_procs_retries_listing_once():
+    vm1, vm2 = FakeVM(), FakeVM()
+    procs = [proc(1, vm1, "vm1"), proc(2, vm2, "vm2")]
+    proc_mng = FakeProcessManager({1: None, 2: None}, failures={vm1: 1, vm2: 2})
+    running, finished, failed = GetWait(sleep=0).check_procs(proc_mng, procs)
+    assert [p.pid for p in running] == [1]
+    assert [p.pid for p in failed] == [2]
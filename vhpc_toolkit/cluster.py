@@ -11,16 +11,147 @@
 # SPDX-License-Identifier: Apache-2.0
 # coding=utf-8
 import configparser
-import itertools
+import hashlib
+import json
+import os
 import re
 from collections import OrderedDict
-from operator import itemgetter
+from os.path import expanduser
 
 from distutils.util import strtobool
 from texttable import Texttable
 
 from vhpc_toolkit import get_args
 from vhpc_toolkit import log
+from vhpc_toolkit.ranges import compile_range
+from vhpc_toolkit.ranges import RangeSyntaxError
+
+# the keys of a VM in the _VMS_ section, per type of value
+VM_STR_KEYS = frozenset(
+    [
+        "template",
+        "datacenter",
+        "datastore",
+        "cluster",
+        "host",
+        "vm_folder",
+        "resource_pool",
+        "latency",
+        "guest_username",
+        "guest_password",
+        "port_group",
+        "ip",
+        "adapter_number",
+        "netmask",
+        "gateway",
+        "domain",
+        "guest_hostname",
+        "vgpu",
+        "pvrdma_port_group",
+        "power",
+        "dvs_name",
+        "svs_name",
+        "base_snapshot",
+        "pool",
+        "profile",
+        "profile_file",
+        "role",
+    ]
+)
+VM_FLOAT_KEYS = frozenset(["memory"])
+VM_INT_KEYS = frozenset(
+    ["cpu", "mmio_size", "cpu_shares", "memory_shares", "cores_per_socket", "gpus"]
+)
+VM_BOOL_KEYS = frozenset(
+    [
+        "cpu_reservation",
+        "memory_reservation",
+        "is_dhcp",
+        "linked",
+        "instant",
+        "secure_boot",
+        "allow_guest_mtu_change",
+        "new_base_snapshot",
+        "warm_up",
+        "create_folder",
+    ]
+)
+VM_LIST_KEYS = frozenset(["device", "dns", "after"])
+VM_APPEND_KEYS = frozenset(["script", "pf", "sriov_port_group", "sriov_dvs_name"])
+VM_SEQUENCE_KEYS = frozenset(["sequence"])
+# the keys of a VM which can be defined in ranges, in the order of mapping
+VM_RANGE_KEYS = ("host", "datastore", "guest_hostname", "ip")
+# the keys of a switch in the _SVS_ or _DVS_ section, per type of value
+SWITCH_STR_KEYS = frozenset(["name", "host", "datacenter"])
+SWITCH_INT_KEYS = frozenset(["mtu", "num_ports"])
+SWITCH_LIST_KEYS = frozenset(["pnic", "port_group"])
+BRACKET_RE = re.compile(r"\[(.*?)\]")
+COLON_SPACE_RE = re.compile(r"[\s]*:[\s]*")
+COMMA_SPACE_RE = re.compile(r"[\s]*,[\s]*")
+SECTION_RE = re.compile(r"\[(?P<header>.+)\]")
+# the sections whose row keys (VM names) may hold ":" in range braces, e.g.
+# rack{1:2}-cpu{1:2}: BASE. configparser would split them at the first ":",
+# so their rows are split at the first ":" or "=" outside braces instead.
+RANGE_KEY_SECTIONS = ("_VMS_",)
+# bump when the parsing changes, to invalidate the cached models
+MODEL_VERSION = 3
+DEFAULT_CACHE_DIR = "%s/vhpc_toolkit/cluster_cache" % expanduser("~")
+
+
+class ClusterModel(object):
+    """
+    The compiled definition of a cluster configuration file: the switch and
+    VM configs with all ranges unfolded. The configs stay plain dicts, as
+    the operations read them by key and fill in keys (e.g. the planned
+    host, device and pf), and their keys vary from file to file.
+
+    """
+
+    __slots__ = ["digest", "svs", "dvs", "vms", "path"]
+
+    def __init__(self, digest, svs, dvs, vms, path=None):
+        """
+
+        Args:
+            digest (str): the sha256 of the cluster configuration file
+            svs (list): a list of dicts, one per standard virtual switch
+            dvs (list): a list of dicts, one per distributed virtual switch
+            vms (list): a list of dicts, one per VM
+            path (str): the absolute path of the cluster configuration file
+
+        """
+        self.digest = digest
+        self.svs = svs
+        self.dvs = dvs
+        self.vms = vms
+        self.path = path
+
+    def to_dict(self):
+        """the JSON-serializable record of the model"""
+
+        return {
+            "version": MODEL_VERSION,
+            "digest": self.digest,
+            "path": self.path,
+            "svs": self.svs,
+            "dvs": self.dvs,
+            "vms": self.vms,
+        }
+
+    @classmethod
+    def from_dict(cls, record):
+        """build a model from its record, or None if the record is not of
+        the current version"""
+
+        if record.get("version") != MODEL_VERSION:
+            return None
+        return cls(
+            record["digest"],
+            record["svs"],
+            record["dvs"],
+            record["vms"],
+            record.get("path"),
+        )
 
 
 class Cluster(object):
@@ -28,66 +159,204 @@ class Cluster(object):
     Read cluster configuration file
     """
 
-    def __init__(self, file):
+    def __init__(self, file, cache_dir=DEFAULT_CACHE_DIR):
         """
 
         Args:
             file (str): cluster configuration file
+            cache_dir (str): the local folder of the compiled models, keyed
+                             by the sha256 of the file content
 
         """
 
         self.file = file
+        self.cache_dir = cache_dir
         self.logger = log.my_logger(name=self.__class__.__name__)
-        self.cfg_parser = configparser.ConfigParser()
-        # Adding next line to prevent parser from converting everything to lowercase
-        self.cfg_parser.optionxform = str
         cluster_file = get_args.find_script_conf_file(self.file)
+        self.path = os.path.abspath(cluster_file)
         try:
-            self.cfg_parser.read(cluster_file)
-        except Exception as e:
-            self.logger.error(e.__doc__)
+            with open(cluster_file, "rb") as f:
+                self.content = f.read()
+        except OSError as e:
+            self.logger.error(e)
             raise SystemExit
+        self.digest = hashlib.sha256(
+            str(MODEL_VERSION).encode() + b"\0" + self.content
+        ).hexdigest()
+        self._cfg_parser = None
+        # the (key, value) rows of the RANGE_KEY_SECTIONS
+        self._rows = {}
+
+    @property
+    def cfg_parser(self):
+        """the parser of the file, which is only created when the file is
+        read section by section (i.e. not loaded from the cache)"""
+
+        if self._cfg_parser is None:
+            cfg_parser = configparser.ConfigParser()
+            # Adding next line to prevent parser from converting everything to lowercase
+            cfg_parser.optionxform = str
+            text, self._rows = self._split_range_key_rows(self.content.decode())
+            try:
+                cfg_parser.read_string(text)
+            except Exception as e:
+                self.logger.error(e.__doc__)
+                raise SystemExit
+            self._cfg_parser = cfg_parser
+        return self._cfg_parser
 
-    @staticmethod
-    def _scatter_mapping(list1, list2):
-        """maps list1 to list2 in a scatter way
+    def _split_range_key_rows(self, text):
+        """
+        take the rows of the RANGE_KEY_SECTIONS out of the text for
+        configparser (leaving their headers). An indented line continues
+        the previous row, and blank and comment lines are skipped.
 
         Args:
-            list1 (list)
-            list2 (list)
+            text (str): the content of the file
 
         Returns:
-            list
+            tuple: (the text left for configparser, a dict of a section to
+                   its list of (key, value) rows in order)
+        """
+        lines = text.splitlines()
+        rows = {}
+        section = None
+        for index, line in enumerate(lines):
+            match = SECTION_RE.match(line)
+            if match:
+                section = match.group("header")
+                if section in RANGE_KEY_SECTIONS:
+                    rows.setdefault(section, [])
+                continue
+            if section not in RANGE_KEY_SECTIONS:
+                continue
+            # blanked rather than removed, so that configparser errors
+            # keep their line numbers
+            lines[index] = ""
+            stripped = line.strip()
+            if not stripped or stripped[0] in "#;":
+                continue
+            if line[0].isspace() and rows[section]:
+                key, value = rows[section][-1]
+                rows[section][-1] = (key, value + "\n" + stripped)
+                continue
+            depth = 0
+            for position, char in enumerate(line):
+                depth += {"{": 1, "}": -1}.get(char, 0)
+                if depth == 0 and char in ":=":
+                    break
+            else:
+                self.logger.error(
+                    "Invalid row in section {0} (line {1}): {2}".format(
+                        section, index + 1, stripped
+                    )
+                )
+                raise SystemExit
+            key = line[:position].strip()
+            if key in (row[0] for row in rows[section]):
+                self.logger.error(
+                    "Duplicate row {0} in section {1} (line {2})".format(
+                        key, section, index + 1
+                    )
+                )
+                raise SystemExit
+            rows[section].append((key, line[position + 1 :].strip()))
+        return "\n".join(lines) + "\n", rows
 
+    def compile(self, use_cache=True):
         """
+        read and unfold all sections of the file into a model. The model is
+        cached on disk, keyed by the file content, so a file which is
+        unchanged since its last read is loaded without parsing it again
+        (and without confirming its ranges again).
 
-        if len(list1) < len(list2):
-            raise RangeMappingError
-        return [i for i, _ in zip(itertools.cycle(list2), list1)]
+        Args:
+            use_cache (bool): whether to load/save the model from/to cache
 
-    @staticmethod
-    def _bunch_mapping(list1, list2):
-        """maps list1 to list2 in a bunch way
+        Returns:
+            ClusterModel: the compiled model
+        """
+        cache_file = os.path.join(self.cache_dir, self.digest + ".json")
+        if use_cache:
+            try:
+                with open(cache_file, "r") as f:
+                    model = ClusterModel.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError):
+                model = None
+            if model is not None and model.digest == self.digest:
+                self.logger.info(
+                    "Loaded {0} from compiled cache {1}".format(self.file, cache_file)
+                )
+                return model
+        model = ClusterModel(
+            self.digest,
+            self.read_svs_dvs_section(sec_def_key="_SVS_"),
+            self.read_svs_dvs_section(sec_def_key="_DVS_"),
+            self.read_vm_section(sec_def_key="_VMS_"),
+            self.path,
+        )
+        if use_cache:
+            self._save_model(model, cache_file)
+        return model
 
+    def _save_model(self, model, cache_file):
+        """save a model into the cache, readable by the user only since it
+        may hold guest passwords. The older models of the same file are
+        removed, so passwords removed from the file don't linger in the
+        cache. Failures only skip the caching."""
+
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            self._prune_cache(keep=cache_file)
+            temp_file = "{0}.{1}.tmp".format(cache_file, os.getpid())
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(model.to_dict(), f)
+            os.replace(temp_file, cache_file)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(
+                "Couldn't cache the compiled {0}: {1}".format(self.file, e)
+            )
+
+    def _prune_cache(self, keep):
+        """remove the cached models of the same file (other than keep) and
+        the ones of other model versions"""
+
+        for name in os.listdir(self.cache_dir):
+            cache_file = os.path.join(self.cache_dir, name)
+            if not name.endswith(".json") or cache_file == keep:
+                continue
+            try:
+                with open(cache_file, "r") as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if (
+                record.get("version") != MODEL_VERSION
+                or record.get("path") == self.path
+            ):
+                try:
+                    os.remove(cache_file)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _map_range(expr, count):
+        """maps the values of a range to count items (VMs), round-robin
+        for {x:y} ranges and consecutively for {{x:y}} ranges
 
         Args:
-            list1 (list)
-            list2 (list)
+            expr (RangeExpr)
+            count (int)
 
         Returns:
             list
 
         """
 
-        if len(list1) < len(list2):
+        if count < len(expr):
             raise RangeMappingError
-        iters = int(len(list1) / len(list2))
-        return [
-            j
-            for j in itertools.chain.from_iterable(
-                itertools.repeat(i, iters) for i in list2
-            )
-        ]
+        return expr.mapped(count)
 
     def read_svs_dvs_section(self, sec_def_key):
         """read _SVS_ section in the cluster configuration file
@@ -140,6 +409,9 @@ class Cluster(object):
         except RangeMappingError as e:
             e.log()
             raise SystemExit
+        except RangeSyntaxError as e:
+            self.logger.error("Invalid range {0}".format(e))
+            raise SystemExit
 
     def _unfold_range_svs_dvs(self, cfg):
         """Pass the cfg dict and scan the range key(s).
@@ -155,22 +427,19 @@ class Cluster(object):
         """
 
         range_key = "host"
-        if not Check().check_kv(cfg, range_key):
+        if not cfg.get(range_key):
             return
-        scatter_unfold, scatter_mark = self._range_unfold_scatter(
-            range_key, cfg[range_key]
-        )
-        bunch_unfold, bunch_mark = self._range_unfold_bunch(range_key, cfg[range_key])
-        if scatter_mark:
-            cfg[range_key] = scatter_unfold[range_key]
+        expr = compile_range(cfg[range_key])
         # svs and dvs don't support bunch mapping for the range key
-        elif bunch_mark:
+        if expr.bunch:
             self.logger.error(
                 "For cluster level operation, the {0} "
                 "key doesn't support bunch "
                 "mapping".format(range_key)
             )
             raise RangeMappingError
+        if expr.is_range:
+            cfg[range_key] = list(expr)
 
     def read_vm_section(self, sec_def_key):
         """read _VM_ section in the cluster configuration file
@@ -183,17 +452,13 @@ class Cluster(object):
 
         cfgs = []
         try:
-            # for each row under _VMS_ section
-            for vm_name in self.cfg_parser.options(sec_def_key):
+            if not self.cfg_parser.has_section(sec_def_key):
+                raise configparser.NoSectionError(sec_def_key)
+            # for each row under _VMS_ section, keyed by the VM names, which
+            # may be ranges such as rack{1:4}-node{1:32#2}
+            for vm_name, op_defs in self._rows.get(sec_def_key, []):
                 cfg = {}
-                op_defs = self.cfg_parser.get(sec_def_key, vm_name)
                 op_defs = self._remove_space(op_defs)
-                # if the first separation contains '{', that means the VM
-                # names are defined in range way. Need to get
-                # full VM names by completing the other half of separation
-                if re.findall("{", vm_name):
-                    vm_name = vm_name + ":" + op_defs.split(":", 1)[0]
-                    op_defs = op_defs.split(":", 1)[1]
                 cfg["vm"] = vm_name
                 # for each property definition
                 for op_def in op_defs.split():
@@ -227,6 +492,9 @@ class Cluster(object):
             raise SystemExit
         except NonConfirmError:
             raise SystemExit
+        except RangeSyntaxError as e:
+            self.logger.error("Invalid range {0}".format(e))
+            raise SystemExit
         except configparser.NoSectionError:
             # it's fine without _VMS_ section
             self.logger.info("No _VMS_ section defined")
@@ -235,77 +503,6 @@ class Cluster(object):
             self.logger.info("Invalid value in section {0}".format(sec_def_key))
             raise SystemExit
 
-    @staticmethod
-    def _range_unfold_scatter(key, value):
-        """scan scatter pattern and unfold range.
-
-
-        Args:
-            key (str)
-            value (str)
-
-        Returns:
-            dict: for scatter mapping: {x:y}, if value defined in range,
-                  return a dict with key: [value1, value2, ..] and values are
-                  mapped in scatter way;
-                  otherwise, return a dict with key: value
-            int: mark (0 or 1) which records whether it has scatter range
-            definition
-
-        """
-
-        scatter_re = r"[^\{]\{([\d]+:[\d]+)\}"
-        scatter_range = re.findall(scatter_re, value)
-        range_unfold = {}
-        range_mark = 0
-        if scatter_range:
-            range_mark = 1
-            range_unfold[key] = []
-            start = int(scatter_range[0].split(":")[0])
-            end = int(scatter_range[0].split(":")[1]) + 1
-            range_value = "{" + scatter_range[0] + "}"
-            for i in range(start, end):
-                item = value.replace(range_value, str(i))
-                range_unfold[key].append(item)
-        else:
-            range_unfold[key] = value
-        return range_unfold, range_mark
-
-    @staticmethod
-    def _range_unfold_bunch(key, value):
-        """scan bunch pattern and unfold range.
-
-        Args:
-            key (str)
-            value (str)
-
-        Returns:
-            dict: for bunch mapping: {{x::y}}, if value defined in range,
-            return a dict with key: [value1, value2, ..] and values are
-            mapped in bunch way;
-            otherwise, return a dict with key: value
-            int: mark (0 or 1) which records whether it has bunch range
-            definition
-
-        """
-
-        bunch_re = r"\{\{([\d]+:[\d]+)\}\}"
-        bunch_range = re.findall(bunch_re, value)
-        range_unfold = {}
-        range_mark = 0
-        if bunch_range:
-            range_mark = 1
-            range_unfold[key] = []
-            start = int(bunch_range[0].split(":")[0])
-            end = int(bunch_range[0].split(":")[1]) + 1
-            range_value = "{{" + bunch_range[0] + "}}"
-            for i in range(start, end):
-                item = value.replace(range_value, str(i))
-                range_unfold[key].append(item)
-        else:
-            range_unfold[key] = value
-        return range_unfold, range_mark
-
     def _unfold_range_vm_section(self, cfg):
         """Pass the cfg dict and scan the range keys.
             If ranges are defined, unfold range.
@@ -325,52 +522,32 @@ class Cluster(object):
 
         """
 
-        # keys can be defined in a range
-        range_keys = ["host", "datastore", "guest_hostname", "ip"]
         # use "vm" as pivot range key
         pivot = "vm"
         Check().check_kv(cfg, pivot, required=True)
-        pivot_range_unfold, pivot_range_mark = self._range_unfold_scatter(
-            pivot, cfg[pivot]
-        )
-        all_range = {}
-        cfgs = []
-        if not pivot_range_mark:
-            cfgs.append(cfg)
-            return cfgs
-        range_unfold = {}
-        for range_key in range_keys:
-            if not Check().check_kv(cfg, range_key):
-                continue
-            # scatter range
-            scatter_unfold, scatter_mark = self._range_unfold_scatter(
-                range_key, cfg[range_key]
-            )
-            # bunch range
-            bunch_unfold, bunch_mark = self._range_unfold_bunch(
-                range_key, cfg[range_key]
+        pivot_expr = compile_range(cfg[pivot])
+        if not pivot_expr.is_range:
+            return [cfg]
+        if pivot_expr.bunch:
+            self.logger.error(
+                "VM names don't support bunch mapping: {0}".format(cfg[pivot])
             )
-            # if it has scatter range, unfold it
-            if scatter_mark:
-                range_unfold[range_key] = self._scatter_mapping(
-                    pivot_range_unfold[pivot],
-                    scatter_unfold[range_key],
-                )
-            # if it has bunch range, unfold it
-            if bunch_mark:
-                range_unfold[range_key] = self._bunch_mapping(
-                    pivot_range_unfold[pivot],
-                    bunch_unfold[range_key],
-                )
+            raise RangeMappingError
+        all_range = {pivot: list(pivot_expr)}
+        count = len(all_range[pivot])
+        for range_key in VM_RANGE_KEYS:
+            if not cfg.get(range_key):
+                continue
+            expr = compile_range(cfg[range_key])
+            if expr.is_range:
+                all_range[range_key] = self._map_range(expr, count)
         # map the range key's range to pivot range ('vm')
-        for idx, value in enumerate(pivot_range_unfold[pivot]):
-            unfold_cfg = cfg
-            unfold_cfg[pivot] = value
-            for key in range_unfold.keys():
-                unfold_cfg[key] = range_unfold[key][idx]
-            cfgs.append(dict(unfold_cfg))
-        all_range.update(pivot_range_unfold)
-        all_range.update(range_unfold)
+        cfgs = []
+        for idx in range(count):
+            unfold_cfg = dict(cfg)
+            for key, values in all_range.items():
+                unfold_cfg[key] = values[idx]
+            cfgs.append(unfold_cfg)
         self._plot_range(all_range)
         self._confirm_range()
         return cfgs
@@ -409,40 +586,118 @@ class Cluster(object):
             self.logger.error("Not a valid answer for range confirmation")
             raise NonConfirmError
 
-    @staticmethod
-    def collect_scripts(vm_cfgs):
-        """collect all scripts in vm_cfgs and return labeled and sorted
-           scripts for further execution
+    def collect_script_graph(self, vm_cfgs):
+        """collect all scripts in vm_cfgs as a dependency graph of steps.
+           A step is the scripts of one VM with one sequence number
+           (unlabeled scripts come first). A step depends on the previous
+           steps of its VM, and either on the steps declared by its "after"
+           key (as "<role or VM>:<sequence>"), or without "after", on all
+           steps of lower sequence of all VMs (a global barrier).
 
         Args:
             vm_cfgs: a list of vm config dicts
 
         Returns:
-            list: a nested list, each list contains a list of post config
-                  tuple in sorted order
+            tuple: (steps, deps), where steps maps a step (vm, sequence) to
+                   its post config tuple (username, password, vm, scripts),
+                   and deps maps a step to the set of steps it depends on
 
         """
 
-        post_cfgs = []
-        temp = []
+        check = Check()
+        steps = {}
+        afters = {}
+        members = {}
+        vm_steps = {}
         for vm_cfg in vm_cfgs:
+            vm = vm_cfg["vm"]
+            members.setdefault(vm, set()).add(vm)
+            if vm_cfg.get("role"):
+                members.setdefault(vm_cfg["role"], set()).add(vm)
             for key, value in vm_cfg.items():
-                if key.startswith("script"):
-                    Check().check_kv(vm_cfg, "guest_username", required=True)
-                    Check().check_kv(vm_cfg, "guest_password", required=True)
-                    temp.append(
-                        (
-                            vm_cfg["guest_username"],
-                            vm_cfg["guest_password"],
-                            vm_cfg["vm"],
-                            value,
-                            key,
-                        )
+                if not key.startswith("script") or not value:
+                    continue
+                check.check_kv(vm_cfg, "guest_username", required=True)
+                check.check_kv(vm_cfg, "guest_password", required=True)
+                label = key[len("script") :]
+                sequence = int(label) if label else -1
+                steps[(vm, sequence)] = (
+                    vm_cfg["guest_username"],
+                    vm_cfg["guest_password"],
+                    vm,
+                    value,
+                )
+                afters[(vm, sequence)] = vm_cfg.get("after" + label)
+                vm_steps.setdefault(vm, []).append((vm, sequence))
+        # the steps of lower sequences, shared by the steps of a sequence.
+        # For the cycle check, a barrier node (None, sequence) stands for
+        # them, so the checked graph stays linear in the number of steps.
+        lower = {}
+        graph = {}
+        below = frozenset()
+        previous = None
+        for sequence in sorted({step[1] for step in steps}):
+            lower[sequence] = below
+            graph[(None, sequence)] = set()
+            if previous is not None:
+                graph[(None, sequence)] = {
+                    step for step in steps if step[1] == previous
+                } | {(None, previous)}
+            below = below | {step for step in steps if step[1] == sequence}
+            previous = sequence
+        deps = {}
+        for step in steps:
+            vm, sequence = step
+            if afters[step] is None:
+                deps[step] = lower[sequence]
+                graph[step] = {(None, sequence)}
+                continue
+            deps[step] = {other for other in vm_steps[vm] if other[1] < sequence}
+            refs = afters[step]
+            for ref in refs if isinstance(refs, list) else [refs]:
+                name, _, ref_sequence = str(ref).rpartition(":")
+                try:
+                    ref_steps = {
+                        (member, int(ref_sequence))
+                        for member in members.get(name, [])
+                        if (member, int(ref_sequence)) in steps
+                    }
+                except ValueError:
+                    ref_steps = set()
+                if not ref_steps:
+                    self.logger.error(
+                        "after: {0} of VM {1} doesn't refer to any script. "
+                        "Format: <role or VM>:<sequence>".format(ref, vm)
                     )
-        temp = sorted(temp, key=itemgetter(4))
-        for _, g in itertools.groupby(temp, key=itemgetter(4)):
-            post_cfgs.append(list(g))
-        return post_cfgs
+                    raise SystemExit
+                deps[step] |= ref_steps
+            graph[step] = deps[step]
+        self._check_acyclic(graph)
+        return steps, deps
+
+    def _check_acyclic(self, deps):
+        """exit if the script dependencies contain a cycle"""
+
+        pending = {step: len(step_deps) for step, step_deps in deps.items()}
+        dependents = {}
+        for step, step_deps in deps.items():
+            for dep in step_deps:
+                dependents.setdefault(dep, []).append(step)
+        ready = [step for step, count in pending.items() if not count]
+        while ready:
+            step = ready.pop()
+            del pending[step]
+            for dependent in dependents.get(step, []):
+                pending[dependent] -= 1
+                if not pending[dependent]:
+                    ready.append(dependent)
+        if pending:
+            self.logger.error(
+                "Script dependencies contain a cycle among {0}".format(
+                    sorted(step for step in pending if step[0] is not None)
+                )
+            )
+            raise SystemExit
 
     def _add_item_svs_dvs(self, cfg, key, value):
         """_SVS_ or _DVS_ add key: value into cfg dict
@@ -458,15 +713,12 @@ class Cluster(object):
 
         """
 
-        str_keys = ["name", "port_group", "host", "datacenter"]
-        int_keys = ["mtu"]
-        list_keys = ["pnic"]
         try:
-            if key in str_keys:
+            if key in SWITCH_STR_KEYS:
                 cfg[key] = value
-            elif key in list_keys:
+            elif key in SWITCH_LIST_KEYS:
                 cfg[key] = self._find_list(value)
-            elif key in int_keys:
+            elif key in SWITCH_INT_KEYS:
                 cfg[key] = int(value)
             else:
                 raise UnknownKeyError(key)
@@ -488,8 +740,7 @@ class Cluster(object):
 
         """
 
-        bracket_text = re.findall(r"\[(.*?)\]", s)
-        if bracket_text:
+        if BRACKET_RE.search(s):
             return eval(s)
         else:
             return s
@@ -506,8 +757,8 @@ class Cluster(object):
 
         """
 
-        s = re.sub(r"[\s]*:[\s]*", ":", s)
-        s = re.sub(r"[\s]*,[\s]*", ",", s)
+        s = COLON_SPACE_RE.sub(":", s)
+        s = COMMA_SPACE_RE.sub(",", s)
         return s
 
     def _add_item_vm(self, cfg, key, value):
@@ -524,69 +775,28 @@ class Cluster(object):
 
         """
 
-        str_keys = [
-            "template",
-            "datacenter",
-            "datastore",
-            "cluster",
-            "host",
-            "vm_folder",
-            "resource_pool",
-            "latency",
-            "guest_username",
-            "guest_password",
-            "port_group",
-            "ip",
-            "adapter_number",
-            "netmask",
-            "gateway",
-            "domain",
-            "guest_hostname",
-            "vgpu",
-            "pvrdma_port_group",
-            "power",
-            "dvs_name",
-            "svs_name",
-        ]
-        float_keys = ["memory"]
-        int_keys = [
-            "cpu",
-            "mmio_size",
-            "cpu_shares",
-            "memory_shares",
-            "cores_per_socket",
-        ]
-        bool_keys = [
-            "cpu_reservation",
-            "memory_reservation",
-            "is_dhcp",
-            "linked",
-            "instant",
-            "secure_boot",
-            "allow_guest_mtu_change",
-        ]
-        list_keys = ["device", "dns"]
-        append_keys = ["script", "pf", "sriov_port_group", "sriov_dvs_name"]
-        sequence_keys = ["sequence"]
         sequence_target = "script"
-        if key in str_keys:
+        if key in VM_STR_KEYS:
             cfg[key] = value
-        elif key in list_keys:
+        elif key in VM_LIST_KEYS:
             cfg[key] = self._find_list(value)
-        elif key in append_keys:
-            if not Check().check_kv(cfg, key):
+        elif key in VM_APPEND_KEYS:
+            if not cfg.get(key):
                 cfg[key] = []
             cfg[key].append(value)
-        elif key in int_keys:
+        elif key in VM_INT_KEYS:
             cfg[key] = int(value)
-        elif key in float_keys:
+        elif key in VM_FLOAT_KEYS:
             cfg[key] = float(value)
-        elif key in bool_keys:
+        elif key in VM_BOOL_KEYS:
             cfg[key] = strtobool(value)
-        elif key in sequence_keys:
+        elif key in VM_SEQUENCE_KEYS:
             labeled_sequence_target = sequence_target + str(value)
-            cfg[labeled_sequence_target] = cfg[sequence_target]
+            cfg[labeled_sequence_target] = cfg.get(sequence_target, [])
             cfg[sequence_target] = []
+            # the dependencies declared for these scripts
+            if "after" in cfg:
+                cfg["after" + str(value)] = cfg.pop("after")
         else:
             self.logger.error("Unknown key {0}".format(key))
             raise SystemExit
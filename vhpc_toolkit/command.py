@@ -43,14 +43,22 @@ def command():
         ops.destroy_cli()
     elif ops.cfg[CMD_KEY] == "clone":
         ops.clone_cli()
+    elif ops.cfg[CMD_KEY] == "pool":
+        ops.pool_cli()
     elif ops.cfg[CMD_KEY] == "post":
         ops.post_cli()
+    elif ops.cfg[CMD_KEY] == "exec":
+        ops.exec_cli()
+    elif ops.cfg[CMD_KEY] == "validate":
+        ops.validate_cli()
     
     # Operations to change compute resources on one VM
     elif ops.cfg[CMD_KEY] == "cpumem":
         ops.cpumem_cli()
     elif ops.cfg[CMD_KEY] == "latency":
         ops.latency_cli()
+    elif ops.cfg[CMD_KEY] == "vm_profile":
+        ops.vm_profile_cli()
     elif ops.cfg[CMD_KEY] == "vm_sched_affinity":
         ops.vm_scheduling_affinity_cli()
     elif ops.cfg[CMD_KEY] == "numa_affinity":
@@ -85,4 +93,10 @@ def command():
         ops.modify_host_sriov_cli()
     elif ops.cfg[CMD_KEY] == "power_policy":
         ops.power_policy_cli()
+    elif ops.cfg[CMD_KEY] == "rolling_reboot":
+        ops.rolling_reboot_cli()
+    elif ops.cfg[CMD_KEY] == "host_profile":
+        ops.host_profile_cli()
+    elif ops.cfg[CMD_KEY] == "hosts":
+        ops.hosts_cli()
 
@@ -12,6 +12,7 @@
 # coding=utf-8
 import os
 import re
+import shlex
 import time
 from typing import List
 
@@ -23,7 +24,12 @@ from vhpc_toolkit import log
 from vhpc_toolkit.get_objs import GetDatacenter
 from vhpc_toolkit.get_objs import GetHost
 from vhpc_toolkit.get_objs import GetVM
+from vhpc_toolkit.transfer import file_digest
+from vhpc_toolkit.transfer import MANIFEST_FILE
+from vhpc_toolkit.transfer import ProgressReader
+from vhpc_toolkit.transfer import UploadManifest
 from vhpc_toolkit.wait import GetWait
+from vhpc_toolkit.wait import GuestProc
 
 
 class ConfigVM(object):
@@ -220,6 +226,55 @@ class ConfigVM(object):
 
         return self.vm_obj.PowerOff()
 
+    def shutdown_guest(self):
+        """
+        Shut down the guest OS via VMware Tools. It returns immediately
+        without waiting for the guest OS to shut down.
+
+        Raises:
+            vim.fault.ToolsUnavailable: if VMware Tools is not running
+
+        Returns:
+            None
+        """
+
+        self.vm_obj.ShutdownGuest()
+
+    def suspend(self):
+        """
+        Suspend VM
+
+        Returns:
+            Task
+        """
+
+        return self.vm_obj.SuspendVM_Task()
+
+    def rename(self, new_name, cpu=None, mem=None, annotation=None):
+        """
+        Rename VM, and optionally change its CPUs, memory and annotation,
+        in a single reconfiguration
+
+        Args:
+            new_name (str): new name of the VM
+            cpu (int): number of CPUs
+            mem (int): memory size in MB
+            annotation (str): annotation (notes) of the VM
+
+        Returns:
+            Task
+        """
+        self.logger.info("Renaming VM {0} to {1}".format(self.vm_obj.name, new_name))
+        config_spec = vim.vm.ConfigSpec()
+        config_spec.name = new_name
+        if cpu:
+            config_spec.numCPUs = cpu
+        if mem:
+            config_spec.memoryMB = mem
+        if annotation is not None:
+            config_spec.annotation = annotation
+        return self.vm_obj.ReconfigVM_Task(spec=config_spec)
+
     def change_secure_boot(self, enabled=True) -> vim.Task:
         """
         This function can enable or disable secure boot
@@ -597,6 +652,8 @@ class ConfigVM(object):
         resource_pool_obj,
         cpu,
         mem,
+        snapshot_obj=None,
+        annotation=None,
     ):
         """
         Clone a VM via full clone
@@ -609,6 +666,10 @@ class ConfigVM(object):
             resource_pool_obj (vim.ResourcePool): Resource Pool destination
             cpu (int): number of CPUs
             mem (int): memory size in MB
+            snapshot_obj (vim.vm.Snapshot): clone from the state of this
+                                            snapshot instead of the current
+                                            state of the VM
+            annotation (str): annotation (notes) of the cloned VM
 
         Returns:
             Task
@@ -620,10 +681,14 @@ class ConfigVM(object):
         relocation_spec.host = host_obj
         clone_spec = vim.vm.CloneSpec()
         clone_spec.location = relocation_spec
-        if cpu or mem:
+        if snapshot_obj:
+            relocation_spec.diskMoveType = "moveAllDiskBackingsAndDisallowSharing"
+            clone_spec.snapshot = snapshot_obj
+        if cpu or mem or annotation:
             config_spec = vim.vm.ConfigSpec()
             config_spec.numCPUs = cpu
             config_spec.memoryMB = mem
+            config_spec.annotation = annotation
             clone_spec.config = config_spec
         else:
             self.logger.debug("No hardware customization for the cloned VM")
@@ -633,7 +698,16 @@ class ConfigVM(object):
         return task
 
     def linked_clone(
-        self, dest_vm, host_obj, folder_obj, resource_pool_obj, cpu, mem, power_on=True
+        self,
+        dest_vm,
+        host_obj,
+        folder_obj,
+        resource_pool_obj,
+        cpu,
+        mem,
+        power_on=True,
+        snapshot_obj=None,
+        annotation=None,
     ):
         """
         Clone a VM via linked clone
@@ -644,6 +718,11 @@ class ConfigVM(object):
             folder_obj (vim.Folder): VM folder destination
             resource_pool_obj (vim.ResourcePool): Resource Pool destination
             power_on (bool): whether enable power on after cloning
+            snapshot_obj (vim.vm.Snapshot): the base snapshot to link the
+                                            clone to. If not specified,
+                                            the first root snapshot is used
+                                            (created if the VM has none)
+            annotation (str): annotation (notes) of the cloned VM
 
         Returns:
             Task
@@ -657,33 +736,52 @@ class ConfigVM(object):
         relocation_spec.diskMoveType = "createNewChildDiskBacking"
         clone_spec = vim.vm.CloneSpec()
         clone_spec.location = relocation_spec
-        if len(self.vm_obj.rootSnapshot) < 1:
-            self.logger.info(
-                "Creating a snapshot for VM for "
-                "linked clone {0}".format(self.vm_obj.name)
-            )
-            task = self.vm_obj.CreateSnapshot_Task(
-                name="snapshot0", memory=False, quiesce=False
-            )
-            GetWait().wait_for_tasks(
-                [task],
-                task_name="Take snapshot for "
-                "template VM for "
-                "enabling linked clone",
-            )
+        if snapshot_obj is None:
+            if len(self.vm_obj.rootSnapshot) < 1:
+                self.logger.info(
+                    "Creating a snapshot for VM for "
+                    "linked clone {0}".format(self.vm_obj.name)
+                )
+                task = self.create_snapshot("snapshot0")
+                GetWait().wait_for_tasks(
+                    [task],
+                    task_name="Take snapshot for "
+                    "template VM for "
+                    "enabling linked clone",
+                )
+            snapshot_obj = self.vm_obj.snapshot.rootSnapshotList[0].snapshot
         clone_spec.powerOn = power_on
         clone_spec.template = False
-        clone_spec.snapshot = self.vm_obj.snapshot.rootSnapshotList[0].snapshot
-        if cpu or mem:
+        clone_spec.snapshot = snapshot_obj
+        if cpu or mem or annotation:
             config_spec = vim.vm.ConfigSpec()
             config_spec.numCPUs = cpu
             config_spec.memoryMB = mem
+            config_spec.annotation = annotation
             clone_spec.config = config_spec
         else:
             self.logger.debug("No hardware customization for the cloned VM")
         task = self.vm_obj.Clone(folder=folder_obj, name=dest_vm, spec=clone_spec)
         return task
 
+    def create_snapshot(self, snapshot_name, description=""):
+        """
+        Take a snapshot of the VM (without memory and quiescing)
+
+        Args:
+            snapshot_name (str): name of the snapshot
+            description (str): description of the snapshot
+
+        Returns:
+            Task
+        """
+        self.logger.info(
+            "Taking snapshot {0} of VM {1}".format(snapshot_name, self.vm_obj.name)
+        )
+        return self.vm_obj.CreateSnapshot_Task(
+            name=snapshot_name, description=description, memory=False, quiesce=False
+        )
+
     @staticmethod
     def _find_nearest_power_of_two(x):
         """
@@ -718,7 +816,8 @@ class ConfigVM(object):
             dynamic_direct_io (bool): Whether to attach the PCI device in dynamic direct I/O mode or just direct I/O mode
 
         Returns:
-            list: a list of Task objects
+            list: a list of Task objects (a single reconfiguration adding the
+                  device together with the MMIO configurations)
 
         References:
             https://kb.vmware.com/s/article/2142307
@@ -765,9 +864,11 @@ class ConfigVM(object):
         dev_config_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.add
         config_spec = vim.vm.ConfigSpec()
         config_spec.deviceChange = [dev_config_spec]
+        config_spec.extraConfig = [
+            vim.option.OptionValue(key=extra_config_key1, value=str(mmio_size)),
+            vim.option.OptionValue(key=extra_config_key2, value="TRUE"),
+        ]
         tasks.append(self.vm_obj.ReconfigVM_Task(spec=config_spec))
-        tasks.append(vm_update.add_extra(extra_config_key1, str(mmio_size)))
-        tasks.append(vm_update.add_extra(extra_config_key2, "TRUE"))
         return tasks
 
     def remove_pci(self, pci, vm_status):
@@ -800,15 +901,30 @@ class ConfigVM(object):
             entry (str): extra config key
             value (str): extra config value
 
+        Returns:
+            Task
+        """
+        return self.add_extra_configs({entry: value})
+
+    def add_extra_configs(self, extra_configs):
+        """
+        Add/update extra advanced vmx entries for a VM in one reconfiguration
+
+        Args:
+            extra_configs (dict): extra config key to value (str)
+
         Returns:
             Task
         """
         config_spec = vim.vm.ConfigSpec()
-        self.logger.info("Adding/Updating extra config: {0} = {1}".format(entry, value))
-        opt = vim.option.OptionValue()
-        opt.key = entry
-        opt.value = value
-        config_spec.extraConfig = [opt]
+        config_spec.extraConfig = []
+        for entry, value in extra_configs.items():
+            self.logger.info(
+                "Adding/Updating extra config: {0} = {1}".format(entry, value)
+            )
+            config_spec.extraConfig.append(
+                vim.option.OptionValue(key=entry, value=value)
+            )
         return self.vm_obj.ReconfigVM_Task(spec=config_spec)
 
     def remove_extra(self, entry):
@@ -891,8 +1007,30 @@ class ConfigVM(object):
         return self.vm_obj.RelocateVM_Task(spec=relocate_spec)
 
     def upload_file(
-        self, guest_operations_manager, host_obj, script_content, auth, dest_file_path
+        self,
+        guest_operations_manager,
+        host_obj,
+        script_content,
+        auth,
+        dest_file_path,
+        sessions=None,
     ):
+        """
+        Upload file content to the home folder of a user in the VM guest OS
+
+        Args:
+            guest_operations_manager (GuestOperationsManager): the guest
+                        operations manager from service content
+            host_obj (vim.HostSystem): the host of the VM
+            script_content (str): the content to upload
+            auth (vim.vm.guest.NamePasswordAuthentication): guest OS auth
+            dest_file_path (str): the file path relative to the home folder
+            sessions (SessionPool): keep-alive sessions per host to upload
+                        through. If None, a one-off connection is used.
+
+        Returns:
+            bool: True if uploaded
+        """
         try:
             file_attribute = vim.vm.guest.FileManager.FileAttributes()
             url = guest_operations_manager.fileManager.InitiateFileTransferToGuest(
@@ -905,15 +1043,285 @@ class ConfigVM(object):
             )
 
             url = re.sub(r"^https://\*:", "https://" + host_obj.name + ":", url)
-            resp = requests.put(url, data=script_content, verify=False)
+            if sessions is not None:
+                resp = sessions.session(host_obj.name).put(url, data=script_content)
+            else:
+                resp = requests.put(url, data=script_content, verify=False)
             if not resp.status_code == 200:
                 self.logger.error(
                     f"Error while uploading post script to {self.vm_obj.name}"
                 )
-            else:
-                self.logger.info(f"Successfully uploaded script to {self.vm_obj.name}")
+                return False
+            self.logger.info(f"Successfully uploaded script to {self.vm_obj.name}")
+            return True
         except IOError as ex:
             self.logger.error(ex)
+            return False
+
+    def upload_local_file(
+        self,
+        guest_operations_manager,
+        host_obj,
+        local_path,
+        auth,
+        dest_file_path,
+        sessions=None,
+        retries=3,
+        manifest=None,
+    ):
+        """
+        Stream a local file of any size to the home folder of a user in the
+        VM guest OS. The file is read in blocks while it is sent, with the
+        progress of large files reported. A failed upload is retried from
+        the start, since a guest file transfer URL takes the whole file
+        in one request. With a manifest, the upload is skipped if the guest
+        file has the same sha256 (per manifest) and size.
+
+        Args:
+            guest_operations_manager (GuestOperationsManager): the guest
+                        operations manager from service content
+            host_obj (vim.HostSystem): the host of the VM
+            local_path (str): the local file to upload
+            auth (vim.vm.guest.NamePasswordAuthentication): guest OS auth
+            dest_file_path (str): the file path relative to the home folder
+            sessions (SessionPool): keep-alive sessions per host to upload
+                        through. If None, a one-off connection is used.
+            retries (int): max number of attempts
+            manifest (UploadManifest): the uploads recorded in the guest
+
+        Returns:
+            bool: True if uploaded (or unchanged)
+        """
+        size = os.path.getsize(local_path)
+        label = "{0} to {1}".format(os.path.basename(local_path), self.vm_obj.name)
+        digest = file_digest(local_path) if manifest is not None else None
+        if (
+            manifest is not None
+            and manifest.unchanged(dest_file_path, digest)
+            and self._guest_file_size(guest_operations_manager, auth, dest_file_path)
+            == size
+        ):
+            self.logger.info("{0} is unchanged. Skipped upload.".format(label))
+            return True
+        for attempt in range(1, retries + 1):
+            url = guest_operations_manager.fileManager.InitiateFileTransferToGuest(
+                vm=self.vm_obj,
+                auth=auth,
+                guestFilePath=f"/{auth.username}/{dest_file_path}",
+                fileAttributes=vim.vm.guest.FileManager.FileAttributes(),
+                fileSize=size,
+                overwrite=True,
+            )
+            url = re.sub(r"^https://\*:", "https://" + host_obj.name + ":", url)
+            requester = sessions.session(host_obj.name) if sessions else requests
+            try:
+                with ProgressReader(local_path, label) as body:
+                    resp = requester.put(url, data=body, verify=False)
+                if resp.status_code == 200:
+                    self.logger.info("Successfully uploaded {0}".format(label))
+                    if manifest is not None:
+                        manifest.record(dest_file_path, digest)
+                    return True
+                error = "HTTP status {0}".format(resp.status_code)
+            except requests.RequestException as e:
+                error = str(e)
+            self.logger.warning(
+                "Attempt {0}/{1} to upload {2} failed: {3}".format(
+                    attempt, retries, label, error
+                )
+            )
+            if attempt < retries:
+                time.sleep(5 * attempt)
+        self.logger.error("Couldn't upload {0}".format(label))
+        return False
+
+    def _guest_file_size(self, guest_operations_manager, auth, dest_file_path):
+        """get the size of a file in the home folder of a user in the VM
+        guest OS, or None if it doesn't exist"""
+
+        dir_path, file_name = os.path.split(f"/{auth.username}/{dest_file_path}")
+        try:
+            listing = guest_operations_manager.fileManager.ListFilesInGuest(
+                vm=self.vm_obj,
+                auth=auth,
+                filePath=dir_path,
+                matchPattern="^{0}$".format(re.escape(file_name)),
+            )
+        except vim.fault.FileFault:
+            return None
+        for file_info in listing.files:
+            if os.path.basename(file_info.path) == file_name:
+                return file_info.size
+        return None
+
+    def load_upload_manifest(
+        self, guest_operations_manager, host_obj, username, password, sessions=None
+    ):
+        """
+        Download the manifest of the files uploaded to the VM guest OS
+
+        Args:
+            guest_operations_manager (GuestOperationsManager): the guest
+                        operations manager from service content
+            host_obj (vim.HostSystem): the host of the VM
+            username (str): username for authentication
+            password (str): password for authentication
+            sessions (SessionPool): keep-alive sessions per host
+
+        Returns:
+            UploadManifest: the manifest, empty if there is none (or it
+                            can't be read)
+        """
+        auth = vim.vm.guest.NamePasswordAuthentication()
+        auth.username = username
+        auth.password = password
+        try:
+            content = self.download_file(
+                guest_operations_manager,
+                host_obj,
+                auth,
+                f"/{username}/{MANIFEST_FILE}",
+                sessions=sessions,
+            )
+        except vim.fault.GuestOperationsUnavailable:
+            return UploadManifest()
+        except requests.RequestException as e:
+            self.logger.warning(
+                "Couldn't read upload manifest of {0}: {1}".format(self.vm_obj.name, e)
+            )
+            return UploadManifest()
+        return UploadManifest(content)
+
+    def download_file(
+        self, guest_operations_manager, host_obj, auth, guest_path, sessions=None
+    ):
+        """
+        Download a file from the VM guest OS
+
+        Args:
+            guest_operations_manager (GuestOperationsManager): the guest
+                        operations manager from service content
+            host_obj (vim.HostSystem): the host of the VM
+            auth (vim.vm.guest.NamePasswordAuthentication): guest OS auth
+            guest_path (str): the full path of the file in the guest OS
+            sessions (SessionPool): keep-alive sessions per host to download
+                        through. If None, a one-off connection is used.
+
+        Returns:
+            bytes: the file content, or None if the file doesn't exist
+        """
+        try:
+            info = guest_operations_manager.fileManager.InitiateFileTransferFromGuest(
+                vm=self.vm_obj, auth=auth, guestFilePath=guest_path
+            )
+        except vim.fault.FileFault:
+            return None
+        url = re.sub(r"^https://\*:", "https://" + host_obj.name + ":", info.url)
+        requester = sessions.session(host_obj.name) if sessions else requests
+        resp = requester.get(url, verify=False)
+        return resp.content if resp.status_code == 200 else None
+
+    def save_upload_manifest(
+        self,
+        guest_operations_manager,
+        host_obj,
+        manifest,
+        username,
+        password,
+        sessions=None,
+    ):
+        """
+        Upload the manifest of the files uploaded to the VM guest OS, if
+        it has changed
+
+        Args:
+            guest_operations_manager (GuestOperationsManager): the guest
+                        operations manager from service content
+            host_obj (vim.HostSystem): the host of the VM
+            manifest (UploadManifest): the manifest to save
+            username (str): username for authentication
+            password (str): password for authentication
+            sessions (SessionPool): keep-alive sessions per host
+
+        Returns:
+            None
+        """
+        if not manifest.changed:
+            return
+        auth = vim.vm.guest.NamePasswordAuthentication()
+        auth.username = username
+        auth.password = password
+        self.upload_file(
+            guest_operations_manager,
+            host_obj,
+            manifest.dumps(),
+            auth,
+            MANIFEST_FILE,
+            sessions=sessions,
+        )
+
+    def upload_payloads(
+        self,
+        guest_operations_manager,
+        host_obj,
+        payloads,
+        username,
+        password,
+        sessions=None,
+        manifest=None,
+    ):
+        """
+        Upload local payload files (e.g. installers needed by post scripts)
+        to the home folder of a user in the VM guest OS
+
+        Args:
+            guest_operations_manager (GuestOperationsManager): the guest
+                        operations manager from service content
+            host_obj (vim.HostSystem): the host of the VM
+            payloads (list): the local files to upload
+            username (str): username for authentication
+            password (str): password for authentication
+            sessions (SessionPool): keep-alive sessions per host to upload
+                        through
+            manifest (UploadManifest): the uploads recorded in the guest,
+                        to skip unchanged files
+
+        Returns:
+            None
+        """
+        auth = vim.vm.guest.NamePasswordAuthentication()
+        auth.username = username
+        auth.password = password
+        for payload in payloads:
+            retries = 0
+            while True:
+                try:
+                    uploaded = self.upload_local_file(
+                        guest_operations_manager=guest_operations_manager,
+                        host_obj=host_obj,
+                        local_path=payload,
+                        auth=auth,
+                        dest_file_path=os.path.basename(payload),
+                        sessions=sessions,
+                        manifest=manifest,
+                    )
+                except OSError:
+                    self.logger.error("Can not open payload {0}".format(payload))
+                    raise SystemExit
+                except vim.fault.InvalidGuestLogin as e:
+                    self.logger.error(e.msg)
+                    raise SystemExit
+                except vim.fault.GuestOperationsUnavailable:
+                    retries += 1
+                    if retries < 4:
+                        self.logger.info("Guest agent could not be contacted. Retrying")
+                        time.sleep(5 * retries)
+                        continue
+                    self.logger.error("Guest agent could not be contacted. Exiting")
+                    raise SystemExit
+                if not uploaded:
+                    raise SystemExit
+                break
 
     def execute_script(
         self,
@@ -923,6 +1331,11 @@ class ConfigVM(object):
         script,
         username,
         password,
+        sessions=None,
+        manifest=None,
+        command=None,
+        log_path=None,
+        upload=True,
     ):
         """
         Execute a post script for a VM
@@ -939,13 +1352,23 @@ class ConfigVM(object):
             script (str): the script to be executed. Should be in Path
             username (str): username for authentication
             password (str): password for authentication
+            sessions (SessionPool): keep-alive sessions per host to upload
+                        the script through
+            manifest (UploadManifest): the uploads recorded in the guest,
+                        to skip an unchanged script
+            command (str): the shell command to run after the upload,
+                        e.g. to unpack and run a bundle. If None, the
+                        uploaded script is run.
+            log_path (str): the file (relative to the home folder) to
+                        capture the output in. If None,
+                        vhpc_toolkit_logs/<script>.log
+            upload (bool): False if the script is already in the guest OS
+                        (e.g. distributed from a head VM)
 
         Returns:
-            tuple:  pid, auth, self.vm_obj
-                    where pid (long) is the pid of the program started
-                    auth (vim.vm.guest.NamePasswordAuthentication) contains
-                    guest OS authentication info
-                    self.vm_obj (vim.VirtualMachine): the VM object
+            GuestProc: the pid of the program started, the guest OS
+                       authentication info, the VM object, the script name
+                       and the guest path of its log
 
         References:
              pyvmomi/docs/vim/vm/guest/GuestOperationsManager.rst
@@ -956,19 +1379,28 @@ class ConfigVM(object):
         retries = 0
         while True:
             try:
-                self.upload_file(
+                if upload and not self.upload_local_file(
                     guest_operations_manager=guest_operations_manager,
                     host_obj=host_obj,
-                    script_content=open(script).read(),
+                    local_path=script,
                     auth=auth,
                     dest_file_path=os.path.basename(script),
-                )
+                    sessions=sessions,
+                    manifest=manifest,
+                ):
+                    raise SystemExit
 
                 program_spec = vim.vm.guest.ProcessManager.ProgramSpec()
                 program_spec.programPath = "/bin/sh"
-                log_file = "/var/log/vhpc_toolkit.log"
-                execute_content = os.path.basename(script) + " 2>&1 | tee " + log_file
-                program_spec.arguments = execute_content
+                log_file = log_path or "vhpc_toolkit_logs/{0}.log".format(
+                    os.path.basename(script)
+                )
+                execute_content = "mkdir -p {0} && ({1}) > {2} 2>&1".format(
+                    shlex.quote(os.path.dirname(log_file) or "."),
+                    command or "sh " + shlex.quote(os.path.basename(script)),
+                    shlex.quote(log_file),
+                )
+                program_spec.arguments = "-c " + shlex.quote(execute_content)
                 pid = process_manager.StartProgramInGuest(
                     self.vm_obj, auth, program_spec
                 )
@@ -998,7 +1430,14 @@ class ConfigVM(object):
                     self.logger.error("Guest agent could not be contacted. Exiting")
                     raise SystemExit
             else:
-                return pid, auth, self.vm_obj
+                return GuestProc(
+                    pid,
+                    auth,
+                    self.vm_obj,
+                    self.vm_obj.name,
+                    os.path.basename(script),
+                    f"/{username}/{log_file}",
+                )
 
 
 class ConfigHost(object):
@@ -1060,7 +1499,7 @@ class ConfigHost(object):
             enable_sriov: Whether to enable or disable SRIOV for the NIC
 
         Returns:
-            None
+            bool: True if the configuration is successful
         """
         config = vim.host.SriovConfig()
         config.sriovEnabled = enable_sriov
@@ -1074,10 +1513,12 @@ class ConfigHost(object):
             self.logger.info(
                 f"{'enabled' if enable_sriov else 'disabled'} SRIOV for PCIe device : {device_id} on host {self.host_obj.name}"
             )
+            return True
         except vim.fault.HostConfigFault as e:
             self.logger.error(f"Caught HostConfig fault: " + e.msg)
         except vmodl.RuntimeFault as e:
             self.logger.error("Caught vmodl fault: " + e.msg)
+        return False
 
     def destroy_svs(self, svs_name):
         """
@@ -1111,6 +1552,24 @@ class ConfigHost(object):
             pyvmomi/docs/vim/host/NetworkSystem.rst
             pyvmomi/docs/vim/host/PortGroup.rst
         """
+        host_network_obj = self.host_obj.configManager.networkSystem
+        host_network_obj.AddPortGroup(
+            portgrp=self._svs_pg_spec(svs_name, pg_name, vlan_id)
+        )
+
+    @staticmethod
+    def _svs_pg_spec(svs_name, pg_name, vlan_id=0):
+        """
+        Get the specification of a port group within standard virtual switch
+
+        Args:
+            svs_name (str): The name of SVS of the port group
+            pg_name (str): The name of port group
+            vlan_id (int): The VLAN ID for ports using this port group.
+
+        Returns:
+            vim.host.PortGroup.Specification
+        """
         pg_spec = vim.host.PortGroup.Specification()
         pg_spec.name = pg_name
         pg_spec.vlanId = vlan_id
@@ -1120,8 +1579,74 @@ class ConfigHost(object):
         security_policy.forgedTransmits = True
         security_policy.macChanges = False
         pg_spec.policy = vim.host.NetworkPolicy(security=security_policy)
+        return pg_spec
+
+    def setup_svs(self, switches):
+        """
+        Create standard virtual switches together with their uplinks, MTU
+        and port groups in one network configuration changeset. The
+        switches and port groups already existing on the host are left out.
+        It calls UpdateNetworkConfig method from HostNetworkSystem. It
+        doesn't return a Task to track
+
+        Args:
+            switches (list): a list of dicts, one per SVS, with keys "name",
+                             "pnics" (list of physical adapters), "mtu"
+                             and "num_ports" (optional) and "port_groups"
+                             (list)
+
+        Returns:
+            None
+
+        References:
+            pyvmomi/docs/vim/host/NetworkSystem.rst
+            pyvmomi/docs/vim/host/NetworkConfig.rst
+        """
         host_network_obj = self.host_obj.configManager.networkSystem
-        host_network_obj.AddPortGroup(portgrp=pg_spec)
+        network_info = host_network_obj.networkInfo
+        existing_svs = {vswitch.name for vswitch in network_info.vswitch}
+        existing_pgs = {portgroup.spec.name for portgroup in network_info.portgroup}
+        network_config = vim.host.NetworkConfig()
+        network_config.vswitch = []
+        network_config.portgroup = []
+        for switch in switches:
+            if switch["name"] in existing_svs:
+                self.logger.info(
+                    "SVS {0} already exists on host {1}".format(
+                        switch["name"], self.host_obj.name
+                    )
+                )
+            else:
+                svs = vim.host.VirtualSwitch.Specification()
+                svs.numPorts = switch.get("num_ports", 8)
+                svs.bridge = vim.host.VirtualSwitch.BondBridge(
+                    nicDevice=switch["pnics"]
+                )
+                if switch.get("mtu"):
+                    svs.mtu = switch["mtu"]
+                network_config.vswitch.append(
+                    vim.host.VirtualSwitch.Config(
+                        changeOperation="add", name=switch["name"], spec=svs
+                    )
+                )
+            for pg_name in switch["port_groups"]:
+                if pg_name in existing_pgs:
+                    self.logger.info(
+                        "Port group {0} already exists on host {1}".format(
+                            pg_name, self.host_obj.name
+                        )
+                    )
+                    continue
+                network_config.portgroup.append(
+                    vim.host.PortGroup.Config(
+                        changeOperation="add",
+                        spec=self._svs_pg_spec(switch["name"], pg_name),
+                    )
+                )
+        if network_config.vswitch or network_config.portgroup:
+            host_network_obj.UpdateNetworkConfig(
+                config=network_config, changeMode="modify"
+            )
 
     def destroy_pg(self, pg_name):
         """
@@ -1154,7 +1679,7 @@ class ConfigHost(object):
             power_policy_key: The key that corresponds to the power policy it must be set to
 
         Returns:
-            None
+            bool: True if the power policy is changed
         """
         power_policy_mapping = {
             1: "High Performance",
@@ -1172,6 +1697,7 @@ class ConfigHost(object):
                 self.logger.info(
                     f"Successfully set power policy to {power_policy_mapping[power_policy_key]} on host {self.host_obj.name}"
                 )
+                return True
             except vim.fault.HostConfigFault:
                 self.logger.error(
                     f"Error changing power policy for host {self.host_obj.name}."
@@ -1184,6 +1710,7 @@ class ConfigHost(object):
             self.logger.warning(
                 f"Could not find the power policy {power_policy_key} for host {self.host_obj.name}"
             )
+        return False
 
     def toggle_pci_device_availability(self, pci_device_id: str, available=True):
         """
@@ -1193,7 +1720,7 @@ class ConfigHost(object):
             available: Whether the device should be enabled for the host or not
 
         Returns:
-            None
+            bool: True if the availability is changed
         """
         passthru_object = self.host_obj.configManager.pciPassthruSystem
         try:
@@ -1205,6 +1732,7 @@ class ConfigHost(object):
                 f"Successfully {'enabled' if available else 'disabled'} "
                 f"pci device {pci_device_id} on host {self.host_obj.name}"
             )
+            return True
         except vim.fault.HostConfigFault:
             self.logger.error(
                 "Error trying to toggle passthrough device availability. Please make sure configuration is correct"
@@ -1213,6 +1741,139 @@ class ConfigHost(object):
             self.logger.error(
                 "Runtime error when trying to change passthru device availability.Please try again later"
             )
+        return False
+
+    def update_pci_passthru(self, passthru=None, sriov=None):
+        """
+        Change passthrough and SR-IOV configuration of PCI devices on a host
+        in one update
+
+        Args:
+            passthru (dict): PCI device ID to True/False to enable/disable
+                             passthrough
+            sriov (dict): PCI device ID to the number of virtual functions,
+                          0 to disable SR-IOV
+
+        Returns:
+            None
+
+        References:
+            pyvmomi/docs/vim/host/PciPassthruSystem.rst
+        """
+        configs = []
+        for device_id, enabled in (passthru or {}).items():
+            config = vim.host.PciPassthruConfig()
+            config.id = device_id.lower()
+            config.passthruEnabled = bool(enabled)
+            configs.append(config)
+        for device_id, num_virtual_functions in (sriov or {}).items():
+            config = vim.host.SriovConfig()
+            config.id = device_id.lower()
+            config.sriovEnabled = num_virtual_functions > 0
+            config.passthruEnabled = False
+            if num_virtual_functions > 0:
+                config.numVirtualFunction = num_virtual_functions
+            configs.append(config)
+        if configs:
+            self.host_obj.configManager.pciPassthruSystem.UpdatePassthruConfig(
+                config=configs
+            )
+
+    def update_advanced_options(self, options):
+        """
+        Change advanced options of a host
+
+        Args:
+            options (dict): option key to value, with the value in the type
+                            of the option (e.g. long, str, bool)
+
+        Returns:
+            None
+
+        References:
+            pyvmomi/docs/vim/option/OptionManager.rst
+        """
+        changed_values = [
+            vim.option.OptionValue(key=key, value=value)
+            for key, value in options.items()
+        ]
+        if changed_values:
+            self.host_obj.configManager.advancedOption.UpdateOptions(
+                changedValue=changed_values
+            )
+
+    def change_svs_mtu(self, svs_name, mtu):
+        """
+        Change the MTU of a standard virtual switch
+
+        Args:
+            svs_name (str): The name of SVS
+            mtu (int): MTU for the SVS
+
+        Returns:
+            bool: True if the SVS exists and its MTU is changed
+
+        References:
+            pyvmomi/docs/vim/host/NetworkSystem.rst
+        """
+        host_network_obj = self.host_obj.configManager.networkSystem
+        for vswitch in host_network_obj.networkInfo.vswitch:
+            if vswitch.name == svs_name:
+                spec = vswitch.spec
+                spec.mtu = mtu
+                host_network_obj.UpdateVirtualSwitch(vswitchName=svs_name, spec=spec)
+                return True
+        self.logger.error(
+            "Couldn't find SVS {0} on host {1}".format(svs_name, self.host_obj.name)
+        )
+        return False
+
+    def enter_maintenance(self, timeout=1800):
+        """
+        Put the host into maintenance mode. In a DRS cluster, the powered-on
+        VMs are migrated off the host, together with the powered-off ones.
+        Without DRS, the task fails at the timeout if VMs are still
+        powered on.
+
+        Args:
+            timeout (int): seconds to wait for entering maintenance mode
+                           before failing the task
+
+        Returns:
+            Task
+        """
+        self.logger.info(
+            "Host {0} is entering maintenance mode".format(self.host_obj.name)
+        )
+        return self.host_obj.EnterMaintenanceMode_Task(
+            timeout=timeout, evacuatePoweredOffVms=True
+        )
+
+    def exit_maintenance(self, timeout=0):
+        """
+        Take the host out of maintenance mode
+
+        Args:
+            timeout (int): seconds to wait for exiting maintenance mode
+                           before failing the task, 0 to wait forever
+
+        Returns:
+            Task
+        """
+        self.logger.info(
+            "Host {0} is exiting maintenance mode".format(self.host_obj.name)
+        )
+        return self.host_obj.ExitMaintenanceMode_Task(timeout=timeout)
+
+    def reboot(self):
+        """
+        Reboot the host. The host must be in maintenance mode.
+
+        Returns:
+            Task
+        """
+        self.logger.info("Rebooting host {0}".format(self.host_obj.name))
+        return self.host_obj.RebootHost_Task(force=False)
 
 
 class ConfigDatacenter(object):
@@ -1233,6 +1894,24 @@ class ConfigDatacenter(object):
         self.datacenter_obj = datacenter_obj
         self.logger = log.my_logger(name=self.__class__.__name__)
 
+    def power_on_vms(self, vm_objs):
+        """
+        Power on multiple VMs of the datacenter in one batch. For VMs in a
+        DRS cluster, the placement recommendations are made in one call.
+
+        Args:
+            vm_objs (list): a list of vim.VirtualMachine to power on
+
+        Returns:
+            Task: its result is a vim.cluster.PowerOnVmResult
+        """
+        self.logger.info(
+            "Powering on {0} VMs in datacenter {1}".format(
+                len(vm_objs), self.datacenter_obj.name
+            )
+        )
+        return self.datacenter_obj.PowerOnMultiVM_Task(vm=vm_objs)
+
     def create_dvs(self, host_vmnics, dvs_name, num_uplinks=4, mtu: int = None):
         """
         Create a distributed virtual switch within the datacenter
@@ -1332,24 +2011,43 @@ class ConfigDVS(object):
         """
         self.dvs_obj = dvs_obj
 
-    def create_pg_in_dvs(self, dvs_pg_name, num_ports=1):
+    def create_pg_in_dvs(self, dvs_pg_name, num_ports=8):
         """
         Create a port group in the DVS.
 
         Args:
             dvs_pg_name (str): the port group name to be created
-            num_ports (int): number of ports in this port group
+            num_ports (int): initial number of ports in this port group
+
+        Returns:
+            Task
+        """
+        return self.create_pgs_in_dvs([dvs_pg_name], num_ports=num_ports)
+
+    def create_pgs_in_dvs(self, dvs_pg_names, num_ports=8):
+        """
+        Create port groups in the DVS in one task. The port groups use
+        elastic ports: the number of ports grows automatically when all
+        ports are in use.
+
+        Args:
+            dvs_pg_names (list): the port group names to be created
+            num_ports (int): initial number of ports in each port group
 
         Returns:
             Task
         """
-        dpg_spec = vim.dvs.DistributedVirtualPortgroup.ConfigSpec()
-        dpg_spec.name = dvs_pg_name
-        dpg_policy = vim.dvs.DistributedVirtualPortgroup.PortgroupPolicy()
-        dpg_spec.policy = dpg_policy
-        dpg_spec.numPorts = num_ports
-        dpg_spec.type = "earlyBinding"
-        task = self.dvs_obj.AddDVPortgroup_Task(spec=[dpg_spec])
+        dpg_specs = []
+        for dvs_pg_name in dvs_pg_names:
+            dpg_spec = vim.dvs.DistributedVirtualPortgroup.ConfigSpec()
+            dpg_spec.name = dvs_pg_name
+            dpg_policy = vim.dvs.DistributedVirtualPortgroup.PortgroupPolicy()
+            dpg_spec.policy = dpg_policy
+            dpg_spec.numPorts = num_ports
+            dpg_spec.autoExpand = True
+            dpg_spec.type = "earlyBinding"
+            dpg_specs.append(dpg_spec)
+        task = self.dvs_obj.AddDVPortgroup_Task(spec=dpg_specs)
         return task
 
     def destroy_dvs(self):
@@ -0,0 +1,105 @@
+# Virtualized High Performance Computing Toolkit
+#
+# Copyright (c) 2018-2019 VMware, Inc. All Rights Reserved.
+#
+# This product is licensed to you under the Apache 2.0 license (the
+# "License"). You may not use this product except in compliance with the
+# Apache 2.0 License. This product may include a number of subcomponents with
+#  separate copyright notices and license terms. Your use of these
+# subcomponents is subject to the terms and conditions of the subcomponent's
+# license, as noted in the LICENSE file.
+# SPDX-License-Identifier: Apache-2.0
+# coding=utf-8
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from pyVmomi import vmodl
+from texttable import Texttable
+
+from vhpc_toolkit import log
+
+Outcome = namedtuple("Outcome", ["item", "status", "result", "duration", "error"])
+
+
+class Executor(object):
+    """
+    A class for running an operation on many items (e.g. hosts) in parallel,
+    with failures isolated per item
+
+    """
+
+    def __init__(self, parallel=8):
+        """
+
+        Args:
+            parallel (int): max number of items to operate on concurrently
+
+        """
+        self.parallel = max(1, parallel)
+        self.logger = log.my_logger(name=self.__class__.__name__)
+
+    def run(self, items, func, name=str):
+        """
+        Run func on every item in a thread pool. An item fails if func
+        raises an exception or returns False.
+
+        Args:
+            items (list): a list of items to operate on
+            func (function): the operation, called as func(item)
+            name (function): get the display name of an item
+
+        Returns:
+            list: a list of Outcome, in the order of items
+        """
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            futures = [pool.submit(self._run_one, item, func, name) for item in items]
+            return [future.result() for future in futures]
+
+    def _run_one(self, item, func, name):
+        """run func on one item and capture its outcome"""
+
+        start = time.time()
+        try:
+            result = func(item)
+        except vmodl.MethodFault as error:
+            self.logger.error("{0}: {1}".format(name(item), error.msg))
+            return Outcome(name(item), "failed", None, time.time() - start, error.msg)
+        except (Exception, SystemExit) as error:
+            self.logger.error("{0}: {1}".format(name(item), repr(error)))
+            return Outcome(name(item), "failed", None, time.time() - start, repr(error))
+        status = "failed" if result is False else "ok"
+        return Outcome(name(item), status, result, time.time() - start, None)
+
+    @staticmethod
+    def print_outcomes(outcomes, title="Item"):
+        """
+        print a table of the outcomes and durations per item
+
+        Args:
+            outcomes (list): a list of Outcome
+            title (str): the column title of the items
+
+        Returns:
+            None
+        """
+        table = Texttable()
+        table_rows = [[title, "Status", "Duration (s)", "Error"]]
+        for outcome in outcomes:
+            table_rows.append(
+                [
+                    outcome.item,
+                    outcome.status,
+                    "{0:.1f}".format(outcome.duration),
+                    outcome.error or "",
+                ]
+            )
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
+        failed = [outcome for outcome in outcomes if outcome.status != "ok"]
+        print(
+            "{0} succeeded, {1} failed\n".format(
+                len(outcomes) - len(failed), len(failed)
+            )
+        )
@@ -115,7 +115,36 @@ def get_args():
         help="Enable linked clone."
         "If linked clone is enabled, "
         "the dest datastore will be same "
-        "as template's datastore. ",
+        "as template's datastore, \n"
+        "unless a shadow VM of the template "
+        "exists on the dest datastore (see --warm_up). ",
+    )
+    clone_parser.add_argument(
+        "--base_snapshot",
+        required=False,
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the base snapshot of the template for linked clone. \n"
+        "If a snapshot of this exact name exists, it will be used. \n"
+        "Otherwise the latest version <name>-v<N> will be used "
+        "(created if none exists). \n"
+        "If omitted, vhpc_toolkit-base will be used.",
+    )
+    clone_parser.add_argument(
+        "--new_base_snapshot",
+        action="store_true",
+        help="Take a new version of the base snapshot of the template "
+        "before linked cloning, \n"
+        "e.g. after the template has been updated.",
+    )
+    clone_parser.add_argument(
+        "--warm_up",
+        action="store_true",
+        help="Before linked cloning, create a shadow VM of the template "
+        "(with the same base snapshot) \n"
+        "on each dest datastore if not existing, "
+        "and linked clone from the shadow VM.",
     )
     clone_parser.add_argument(
         "--template",
@@ -145,6 +174,11 @@ def get_args():
         "If omitted, the first VM folder in the specified/default datacenter"
         " will be used.",
     )
+    clone_parser.add_argument(
+        "--create_folder",
+        action="store_true",
+        help="Create the destination VM folder if not existing",
+    )
     clone_parser.add_argument(
         "--cluster",
         required=False,
@@ -202,6 +236,125 @@ def get_args():
         help="Number of CPUs for the cloned VM(s). \n"
         "If omitted, it will be the same as the template VM.",
     )
+    clone_parser.add_argument(
+        "--pool",
+        required=False,
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the pool to claim pre-provisioned VM(s) from. \n"
+        "An available pool member is renamed instead of cloning a new VM, \n"
+        "and the pool is refilled in the background. \n"
+        "If the pool has no available member, the VM will be cloned.",
+    )
+    pool_parser = subparsers.add_parser(
+        "pool",
+        help="Fill/list/drain a warm pool of pre-provisioned VMs",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    pool_group1 = pool_parser.add_mutually_exclusive_group(required=True)
+    pool_group1.add_argument(
+        "--fill",
+        action="store_true",
+        help="Clone VMs into the pool until it reaches the pool size",
+    )
+    pool_group1.add_argument(
+        "--list",
+        action="store_true",
+        help="List the available members of the pool",
+    )
+    pool_group1.add_argument(
+        "--drain",
+        action="store_true",
+        help="Destroy all available members of the pool",
+    )
+    pool_parser.add_argument(
+        "--name",
+        required=True,
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the pool. Pool members are named <name>-pool-<N>",
+    )
+    pool_parser.add_argument(
+        "--size",
+        required=False,
+        action="store",
+        default=None,
+        type=int,
+        help="Number of VMs to keep in the pool (required by --fill)",
+    )
+    pool_parser.add_argument(
+        "--template",
+        required=False,
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the template VM to clone pool members from "
+        "(required by --fill)",
+    )
+    pool_parser.add_argument(
+        "--suspend",
+        action="store_true",
+        help="Boot the pool members and suspend them, \n"
+        "instead of leaving them powered off. \n"
+        "Suspended members are only claimed "
+        "if no further hardware reconfiguration is needed.",
+    )
+    pool_parser.add_argument(
+        "--linked",
+        action="store_true",
+        help="Fill the pool via linked clone",
+    )
+    pool_parser.add_argument(
+        "--base_snapshot",
+        required=False,
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the base snapshot of the template for linked clone",
+    )
+    pool_parser.add_argument(
+        "--warm_up",
+        action="store_true",
+        help="Create a shadow VM of the template on the dest datastore "
+        "before linked cloning",
+    )
+    for dest in [
+        "datacenter",
+        "vm_folder",
+        "cluster",
+        "host",
+        "datastore",
+        "resource_pool",
+    ]:
+        pool_parser.add_argument(
+            "--{0}".format(dest),
+            required=False,
+            action="store",
+            default=None,
+            type=str,
+            help="Name of the destination {0} for pool members. \n"
+            "Same default as the clone command.".format(dest.replace("_", " ")),
+        )
+    pool_parser.add_argument(
+        "--memory",
+        required=False,
+        action="store",
+        default=None,
+        type=float,
+        help="Memory (in GB) for the pool members. \n"
+        "If omitted, it will be the same as the template VM.",
+    )
+    pool_parser.add_argument(
+        "--cpu",
+        required=False,
+        action="store",
+        default=None,
+        type=int,
+        help="Number of CPUs for the pool members. \n"
+        "If omitted, it will be the same as the template VM.",
+    )
     destroy_parser = subparsers.add_parser(
         "destroy",
         help="Destroy VM(s)",
@@ -222,6 +375,21 @@ def get_args():
         type=str,
         help="Name of the file containing a list of VMs," " one per line to destroy",
     )
+    destroy_parser.add_argument(
+        "--shutdown",
+        action="store_true",
+        help="Shut down the guest OS of all VMs concurrently before power off. \n"
+        "Only the VMs still powered on after the shutdown timeout \n"
+        "(or without VMware Tools running) are hard powered off.",
+    )
+    destroy_parser.add_argument(
+        "--shutdown_timeout",
+        required=False,
+        action="store",
+        default=120,
+        type=int,
+        help="Seconds to wait for the guest OS to shut down. Default: 120",
+    )
     power_parser = subparsers.add_parser(
         "power",
         help="Power on/off VM(s)",
@@ -246,6 +414,48 @@ def get_args():
     )
     power_group2.add_argument("--on", action="store_true", help="Power on")
     power_group2.add_argument("--off", action="store_true", help="Power off")
+    power_parser.add_argument(
+        "--shutdown",
+        action="store_true",
+        help="Shut down the guest OS of all VMs concurrently before power off. \n"
+        "Only the VMs still powered on after the shutdown timeout \n"
+        "(or without VMware Tools running) are hard powered off.",
+    )
+    power_parser.add_argument(
+        "--shutdown_timeout",
+        required=False,
+        action="store",
+        default=120,
+        type=int,
+        help="Seconds to wait for the guest OS to shut down. Default: 120",
+    )
+    power_parser.add_argument(
+        "--wave_size",
+        required=False,
+        action="store",
+        default=None,
+        type=int,
+        help="Number of VMs to power on per wave. \n"
+        "Each wave is powered on via one PowerOnMultiVM task per datacenter. \n"
+        "If omitted, all VMs are powered on in one wave.",
+    )
+    power_parser.add_argument(
+        "--stagger",
+        required=False,
+        action="store",
+        default=None,
+        type=float,
+        help="Seconds between the starts of two power-on waves",
+    )
+    power_parser.add_argument(
+        "--tools_timeout",
+        required=False,
+        action="store",
+        default=0,
+        type=int,
+        help="Seconds to wait for VMware Tools running after power-on, \n"
+        "for reporting the boot time of each VM. Default: 0 (skip)",
+    )
 
     migrate_vm_parser = subparsers.add_parser(
         "migrate_vm",
@@ -273,8 +483,27 @@ def get_args():
         default=None,
         action="store",
         type=str,
+        nargs="+",
         required=True,
-        help="The name of the destination host VM(s) should be migrated to",
+        help="The name(s) of the destination host(s) VM(s) should be migrated to. \n"
+        "VMs are balanced across the hosts by free memory and CPU.",
+    )
+    migrate_vm_parser.add_argument(
+        "--max_per_host",
+        default=4,
+        action="store",
+        type=_positive_int,
+        required=False,
+        help="Max concurrent migrations per (source or destination) host. "
+        "Default: 4",
+    )
+    migrate_vm_parser.add_argument(
+        "--max_per_network",
+        default=8,
+        action="store",
+        type=_positive_int,
+        required=False,
+        help="Max concurrent migrations per vMotion network. Default: 8",
     )
 
     power_policy_parser = subparsers.add_parser(
@@ -309,6 +538,152 @@ def get_args():
         required=True,
         choices=[1, 2, 3, 4],
     )
+    power_policy_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=8,
+        type=int,
+        required=False,
+        help="Number of hosts to configure in parallel. Default: 8",
+    )
+
+    hosts_parser = subparsers.add_parser(
+        "hosts",
+        help="Collect and view the capabilities of all hosts",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    hosts_group1 = hosts_parser.add_mutually_exclusive_group(required=False)
+    hosts_group1.add_argument(
+        "--host",
+        action="store",
+        nargs="+",
+        default=None,
+        type=str,
+        help="Name(s) of the host(s) to view. Default: all hosts",
+    )
+    hosts_group1.add_argument(
+        "--file",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the file containing a list of hosts, one per line, to view",
+    )
+    hosts_parser.add_argument(
+        "--json",
+        action="store_true",
+        default=False,
+        help="Print the capabilities as JSON instead of a table",
+    )
+    hosts_parser.add_argument(
+        "--snapshot",
+        action="store",
+        default=None,
+        type=str,
+        required=False,
+        help="Path of the local snapshot file to save. "
+        "Default: ~/vhpc_toolkit/hosts.json",
+    )
+
+    host_profile_parser = subparsers.add_parser(
+        "host_profile",
+        help="Apply/check a host tuning profile on host(s)",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    host_profile_group1 = host_profile_parser.add_mutually_exclusive_group(
+        required=True
+    )
+    host_profile_group2 = host_profile_parser.add_mutually_exclusive_group(
+        required=True
+    )
+    host_profile_group1.add_argument(
+        "--host",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the host to apply/check the profile",
+    )
+    host_profile_group1.add_argument(
+        "--file",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the file containing a list of hosts, "
+        "one per line, to apply/check the profile",
+    )
+    host_profile_group2.add_argument(
+        "--apply",
+        action="store_true",
+        help="Apply the profile on the host(s) and verify it afterwards",
+    )
+    host_profile_group2.add_argument(
+        "--check",
+        action="store_true",
+        help="Check the host(s) for drift from the profile",
+    )
+    host_profile_parser.add_argument(
+        "--profile",
+        action="store",
+        type=str,
+        required=True,
+        help="Name of the host profile",
+    )
+    host_profile_parser.add_argument(
+        "--profile_file",
+        action="store",
+        default="host-profiles.yaml",
+        type=str,
+        required=False,
+        help="Name of the YAML file defining the host profiles. "
+        "Default: host-profiles.yaml",
+    )
+    host_profile_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=8,
+        type=int,
+        required=False,
+        help="Number of hosts to configure in parallel. Default: 8",
+    )
+    host_profile_parser.add_argument(
+        "--reboot",
+        action="store_true",
+        default=False,
+        help="Reboot the hosts which require a reboot after applying the "
+        "profile, in waves through maintenance mode",
+    )
+    _add_reboot_wave_args(host_profile_parser)
+
+    rolling_reboot_parser = subparsers.add_parser(
+        "rolling_reboot",
+        help="Reboot hosts in waves through maintenance mode",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    rolling_reboot_group1 = rolling_reboot_parser.add_mutually_exclusive_group(
+        required=True
+    )
+    rolling_reboot_group1.add_argument(
+        "--host",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the host to reboot",
+    )
+    rolling_reboot_group1.add_argument(
+        "--file",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the file containing a list of hosts, one per line, to reboot",
+    )
+    rolling_reboot_parser.add_argument(
+        "--reboot_timeout",
+        action="store",
+        default=1800,
+        type=int,
+        required=False,
+        help="Seconds to wait for a host to reconnect after reboot. Default: 1800",
+    )
+    _add_reboot_wave_args(rolling_reboot_parser)
 
     secure_boot_parser = subparsers.add_parser(
         "secure_boot",
@@ -673,11 +1048,34 @@ def get_args():
     post_parser.add_argument(
         "--script",
         action="store",
-        required=True,
+        required=False,
+        nargs="+",
+        type=str,
+        default=None,
+        help="Local post script(s) to be executed in guest OS. \n"
+        "With --bundle, the script(s) in the bundle to run in order",
+    )
+    post_parser.add_argument(
+        "--bundle",
+        action="store",
+        required=False,
+        type=str,
+        default=None,
+        help="Local directory of scripts and assets to be packed into one \n"
+        "archive, uploaded once per VM, unpacked in the guest OS and the \n"
+        "scripts run from it in order. Without --script, the *.sh \n"
+        "files at the top of the directory run in name order.",
+    )
+    post_parser.add_argument(
+        "--payload",
+        action="store",
+        required=False,
         nargs="+",
         type=str,
         default=None,
-        help="Local post script(s) to be executed in guest OS",
+        help="Local file(s) (e.g. installers used by the scripts) to be \n"
+        "uploaded to the home folder of the guest user before the \n"
+        "script(s) are executed. Files of any size are streamed.",
     )
     post_parser.add_argument(
         "--guest_username",
@@ -702,6 +1100,209 @@ def get_args():
         default=False,
         help="Wait for the script execution finish",
     )
+    _add_post_args(post_parser)
+    exec_parser = subparsers.add_parser(
+        "exec",
+        help="Run a command in guest OS of VM(s) concurrently",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    exec_group = exec_parser.add_mutually_exclusive_group(required=True)
+    exec_group.add_argument(
+        "--vm",
+        action="store",
+        default=None,
+        nargs="+",
+        type=str,
+        help="Name(s) of the VM(s) to run the command in",
+    )
+    exec_group.add_argument(
+        "--file",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the file containing a list of VMs, one per line,"
+        " to run the command in",
+    )
+    exec_group.add_argument(
+        "--pattern",
+        action="store",
+        default=None,
+        type=str,
+        help="Regular expression of the names of the (powered on) VMs \n"
+        "to run the command in",
+    )
+    exec_parser.add_argument(
+        "--cmd",
+        action="store",
+        required=True,
+        type=str,
+        help="The shell command to run in guest OS",
+    )
+    exec_parser.add_argument(
+        "--guest_username",
+        action="store",
+        required=False,
+        type=str,
+        default="root",
+        help="Guest OS username (default: %(default)s)",
+    )
+    exec_parser.add_argument(
+        "--guest_password",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="Guest OS password. If omitted, it will be prompted.",
+    )
+    exec_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=32,
+        type=int,
+        required=False,
+        help="Number of VMs to run the command in concurrently. Default: 32",
+    )
+    exec_parser.add_argument(
+        "--timeout",
+        action="store",
+        default=60,
+        type=int,
+        required=False,
+        help="Seconds to wait for the command in each VM before it is \n"
+        "terminated. Default: 60",
+    )
+    validate_parser = subparsers.add_parser(
+        "validate",
+        help="Validate memory and RDMA interconnect performance of VMs \n"
+        "with in-guest microbenchmarks",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    validate_group = validate_parser.add_mutually_exclusive_group(required=True)
+    validate_group.add_argument(
+        "--vm",
+        action="store",
+        default=None,
+        nargs="+",
+        type=str,
+        help="Name(s) of the VM(s) to validate",
+    )
+    validate_group.add_argument(
+        "--file",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the file containing a list of VMs, one per line, to validate",
+    )
+    validate_group.add_argument(
+        "--pattern",
+        action="store",
+        default=None,
+        type=str,
+        help="Regular expression of the names of the (powered on) VMs to validate",
+    )
+    validate_parser.add_argument(
+        "--test",
+        action="store",
+        default=None,
+        nargs="+",
+        choices=["stream", "mtu", "bw", "lat"],
+        help="The test(s) to run. Default: all \n"
+        "stream: memory bandwidth (STREAM Triad) per VM \n"
+        "mtu: active MTU of the RDMA ports (ibv_devinfo) per VM \n"
+        "bw: RDMA write bandwidth (ib_write_bw) per pair of VMs \n"
+        "lat: RDMA write latency (ib_write_lat) per pair of VMs",
+    )
+    validate_parser.add_argument(
+        "--stream_cmd",
+        action="store",
+        default="stream",
+        type=str,
+        required=False,
+        help="The command to run STREAM in guest OS. Default: stream",
+    )
+    validate_parser.add_argument(
+        "--rdma_device",
+        action="store",
+        default=None,
+        type=str,
+        required=False,
+        help="The RDMA device for perftest in guest OS, e.g. mlx5_0 \n"
+        "If omitted, the first device is used.",
+    )
+    validate_parser.add_argument(
+        "--tolerance",
+        action="store",
+        default=10,
+        type=float,
+        required=False,
+        help="Tolerance (in percent) of the results to the targets, or to \n"
+        "the median of all nodes/links without target. Default: 10",
+    )
+    validate_parser.add_argument(
+        "--mem_target",
+        action="store",
+        default=None,
+        type=float,
+        required=False,
+        help="Expected STREAM Triad bandwidth (MB/s) per VM",
+    )
+    validate_parser.add_argument(
+        "--bw_target",
+        action="store",
+        default=None,
+        type=float,
+        required=False,
+        help="Expected RDMA write bandwidth (MB/s) per link",
+    )
+    validate_parser.add_argument(
+        "--lat_target",
+        action="store",
+        default=None,
+        type=float,
+        required=False,
+        help="Expected RDMA write latency (usec) per link",
+    )
+    validate_parser.add_argument(
+        "--mtu",
+        action="store",
+        default=4096,
+        type=int,
+        required=False,
+        help="Expected active MTU of the RDMA ports. Default: 4096",
+    )
+    validate_parser.add_argument(
+        "--guest_username",
+        action="store",
+        required=False,
+        type=str,
+        default="root",
+        help="Guest OS username (default: %(default)s)",
+    )
+    validate_parser.add_argument(
+        "--guest_password",
+        action="store",
+        type=str,
+        required=False,
+        default=None,
+        help="Guest OS password. If omitted, it will be prompted.",
+    )
+    validate_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=32,
+        type=int,
+        required=False,
+        help="Number of VMs (or pairs of VMs) to test concurrently. Default: 32",
+    )
+    validate_parser.add_argument(
+        "--timeout",
+        action="store",
+        default=300,
+        type=int,
+        required=False,
+        help="Seconds to wait for each benchmark before it is terminated. \n"
+        "Default: 300",
+    )
     passthru_parser = subparsers.add_parser(
         "passthru",
         help="Add/Remove (large) PCI device(s) in Passthrough mode",
@@ -797,6 +1398,22 @@ def get_args():
     passthru_host_group3.add_argument(
         "--off", action="store_true", help="Enable device"
     )
+    passthru_host_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=8,
+        type=int,
+        required=False,
+        help="Number of hosts to configure in parallel. Default: 8",
+    )
+    passthru_host_parser.add_argument(
+        "--reboot",
+        action="store_true",
+        default=False,
+        help="Reboot the configured hosts in waves through maintenance mode "
+        "to apply the change",
+    )
+    _add_reboot_wave_args(passthru_host_parser)
 
     sriov_parser = subparsers.add_parser(
         "sriov",
@@ -902,6 +1519,22 @@ def get_args():
         help="Number of virtual functions. This argument is ignored if used with --off flag. "
         "num_func must be equal or smaller than the VF enabled in firmware",
     )
+    sriov_host_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=8,
+        type=int,
+        required=False,
+        help="Number of hosts to configure in parallel. Default: 8",
+    )
+    sriov_host_parser.add_argument(
+        "--reboot",
+        action="store_true",
+        default=False,
+        help="Reboot the configured hosts in waves through maintenance mode "
+        "to apply the change",
+    )
+    _add_reboot_wave_args(sriov_host_parser)
 
     pvrdma_parser = subparsers.add_parser(
         "pvrdma",
@@ -1016,16 +1649,18 @@ def get_args():
     svs_parser.add_argument(
         "--pnic",
         action="store",
+        nargs="+",
         required=False,
         type=str,
-        help="Physical NIC to be added into its standard virtual switch, "
-        "e.g. vmnic0",
+        help="Physical NIC(s) to be added into its standard virtual switch "
+        "as uplinks, e.g. vmnic0 vmnic1",
     )
     svs_parser.add_argument(
         "--port_group",
         action="store",
+        nargs="+",
         type=str,
-        help="Name of virtual port group to be created within "
+        help="Name(s) of virtual port group(s) to be created within "
         "this standard virtual switch",
     )
     svs_parser.add_argument(
@@ -1035,6 +1670,14 @@ def get_args():
         help="MTU to be set for the SVS. This argument is optional",
         required=False,
     )
+    svs_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=8,
+        type=int,
+        required=False,
+        help="Number of hosts to configure in parallel. Default: 8",
+    )
     dvs_parser = subparsers.add_parser(
         "dvs",
         help="Create/destroy a distributed virtual switch",
@@ -1084,9 +1727,10 @@ def get_args():
     dvs_parser.add_argument(
         "--port_group",
         action="store",
+        nargs="+",
         type=str,
         required=False,
-        help="Name of virtual port group to be created "
+        help="Name(s) of virtual port group(s) to be created "
         "within this distributed virtual switch",
     )
     dvs_parser.add_argument(
@@ -1096,6 +1740,15 @@ def get_args():
         help="MTU to be set for the DVS. This argument is optional",
         required=False,
     )
+    dvs_parser.add_argument(
+        "--num_ports",
+        action="store",
+        default=8,
+        type=int,
+        required=False,
+        help="Initial number of ports of each port group. The ports "
+        "expand automatically when they are all in use. Default: 8",
+    )
     latency_parser = subparsers.add_parser(
         "latency",
         help="Configure/Check latency sensitivity",
@@ -1127,6 +1780,43 @@ def get_args():
     latency_parser.add_argument(
         "--check", action="store_true", help="Check Latency Sensitivity level"
     )
+    vm_profile_parser = subparsers.add_parser(
+        "vm_profile",
+        help="Apply a VM tuning profile (extraConfig entries)",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    vm_profile_group = vm_profile_parser.add_mutually_exclusive_group(required=True)
+    vm_profile_group.add_argument(
+        "--vm",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the VM on which to apply the profile",
+    )
+    vm_profile_group.add_argument(
+        "--file",
+        action="store",
+        default=None,
+        type=str,
+        help="Name of the file containing a list of VMs, "
+        "one per line, to apply the profile",
+    )
+    vm_profile_parser.add_argument(
+        "--profile",
+        action="store",
+        type=str,
+        required=True,
+        help="Name of the VM profile",
+    )
+    vm_profile_parser.add_argument(
+        "--profile_file",
+        action="store",
+        default="vm-profiles.yaml",
+        type=str,
+        required=False,
+        help="Name of the YAML file defining the VM profiles. "
+        "Default: vm-profiles.yaml",
+    )
     cluster_parser = subparsers.add_parser(
         "cluster",
         help="Create/Destroy vHPC cluster based on cluster configuration file",
@@ -1144,9 +1834,177 @@ def get_args():
         default=None,
         help="Name of the cluster configuration file",
     )
+    cluster_parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Parse the cluster configuration file again, instead of loading \n"
+        "it from the compiled cache of an unchanged file",
+    )
+    cluster_parser.add_argument(
+        "--parallel",
+        action="store",
+        default=8,
+        type=int,
+        required=False,
+        help="Number of hosts to configure in parallel. Default: 8",
+    )
+    cluster_parser.add_argument(
+        "--shutdown",
+        action="store_true",
+        help="Shut down the guest OS of all VMs concurrently before power off. \n"
+        "Only the VMs still powered on after the shutdown timeout \n"
+        "(or without VMware Tools running) are hard powered off.",
+    )
+    cluster_parser.add_argument(
+        "--shutdown_timeout",
+        required=False,
+        action="store",
+        default=120,
+        type=int,
+        help="Seconds to wait for the guest OS to shut down. Default: 120",
+    )
+    cluster_parser.add_argument(
+        "--wave_size",
+        required=False,
+        action="store",
+        default=None,
+        type=int,
+        help="Number of VMs to power on per wave. \n"
+        "Each wave is powered on via one PowerOnMultiVM task per datacenter. \n"
+        "If omitted, all VMs are powered on in one wave.",
+    )
+    cluster_parser.add_argument(
+        "--stagger",
+        required=False,
+        action="store",
+        default=None,
+        type=float,
+        help="Seconds between the starts of two power-on waves",
+    )
+    cluster_parser.add_argument(
+        "--tools_timeout",
+        required=False,
+        action="store",
+        default=0,
+        type=int,
+        help="Seconds to wait for VMware Tools running after power-on, \n"
+        "for reporting the boot time of each VM. Default: 0 (skip)",
+    )
+    _add_post_args(cluster_parser)
     return main_parser
 
 
+def _add_post_args(parser):
+    """add the arguments for uploading post scripts to VMs and fetching
+    their logs"""
+
+    parser.add_argument(
+        "--upload_parallel",
+        required=False,
+        action="store",
+        default=32,
+        type=int,
+        help="Number of VMs to upload and launch post script(s) in \n"
+        "concurrently. Default: 32",
+    )
+    parser.add_argument(
+        "--force_upload",
+        required=False,
+        action="store_true",
+        default=False,
+        help="Upload all post script(s) and payload(s), even if the guest \n"
+        "already holds the same content",
+    )
+    parser.add_argument(
+        "--head",
+        required=False,
+        action="store",
+        default=None,
+        type=str,
+        help="Name of a head VM to upload the post script(s) and \n"
+        "payload(s) to once, which distributes them to the home folder \n"
+        "of the guest user of the other VMs over the guest network \n"
+        "(scp/ssh) in a tree. Requires passwordless SSH from the head \n"
+        "VM to the guest users of the other VMs.",
+    )
+    parser.add_argument(
+        "--head_after",
+        required=False,
+        action="store",
+        default=None,
+        type=int,
+        help="Sequence of the post script(s) of the head VM (e.g. the one \n"
+        "setting up SSH) after which the files of the next steps are \n"
+        "distributed from it, for cluster --create. Default: before the \n"
+        "first step",
+    )
+    parser.add_argument(
+        "--fanout",
+        required=False,
+        action="store",
+        default=4,
+        type=int,
+        help="Number of VMs each VM of the distribution tree copies \n"
+        "the files to. Default: 4",
+    )
+    parser.add_argument(
+        "--log_dir",
+        required=False,
+        action="store",
+        default="vhpc_logs",
+        type=str,
+        help="Local folder to fetch the logs of post script(s) in, as \n"
+        "<log_dir>/<run id>/<VM>/<script>.log, while waiting for them. \n"
+        "Default: vhpc_logs",
+    )
+
+
+def _add_reboot_wave_args(parser):
+    """
+    add the arguments sizing the waves of a rolling host reboot
+
+    Args:
+        parser (ArgumentParser): the parser to add arguments to
+
+    Returns:
+        None
+    """
+    parser.add_argument(
+        "--min_online",
+        action="store",
+        default=0.5,
+        type=float,
+        required=False,
+        help="Share of the memory capacity of each cluster which must stay "
+        "online during the reboot. Default: 0.5",
+    )
+    parser.add_argument(
+        "--max_wave",
+        action="store",
+        default=None,
+        type=int,
+        required=False,
+        help="Max number of hosts per cluster to reboot in one wave",
+    )
+    parser.add_argument(
+        "--maintenance_timeout",
+        action="store",
+        default=1800,
+        type=int,
+        required=False,
+        help="Seconds to wait for a host to enter maintenance mode, e.g. "
+        "while its VMs are migrated off. Default: 1800",
+    )
+
+
+def _positive_int(string):
+    """argparse type of an integer of at least 1"""
+
+    if not string.isdigit() or int(string) < 1:
+        raise argparse.ArgumentTypeError("must be an integer of at least 1")
+    return int(string)
+
+
 def _find_vcenter_conf_file(file):
     """locate the vcenter conf file
 
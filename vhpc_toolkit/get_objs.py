@@ -10,6 +10,7 @@
 # license, as noted in the LICENSE file.
 # SPDX-License-Identifier: Apache-2.0
 # coding=utf-8
+import re
 from typing import List
 from typing import Optional
 
@@ -53,6 +54,54 @@ class GetObjects(object):
         )
         return container.view
 
+    def collect_properties(self, type_paths):
+        """
+        Collect properties of all managed objects of the given types in one
+        property collector sweep over the inventory
+
+        Args:
+            type_paths (dict): managed object type to a list of property
+                               paths to collect, e.g.
+                               {vim.HostSystem: ["name", "hardware.pciDevice"]}
+
+        Returns:
+            dict: managed object to a dict of property path to value. A
+                  property which is unset on an object is left out.
+        """
+        container = self.content.viewManager.CreateContainerView(
+            self.content.rootFolder, list(type_paths), True
+        )
+        traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+            name="traverseView", path="view", skip=False, type=vim.view.ContainerView
+        )
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec()
+        filter_spec.objectSet = [
+            vmodl.query.PropertyCollector.ObjectSpec(
+                obj=container, skip=True, selectSet=[traversal_spec]
+            )
+        ]
+        filter_spec.propSet = [
+            vmodl.query.PropertyCollector.PropertySpec(type=vimtype, pathSet=paths)
+            for vimtype, paths in type_paths.items()
+        ]
+        property_collector = self.content.propertyCollector
+        properties = {}
+        try:
+            result = property_collector.RetrievePropertiesEx(
+                [filter_spec], vmodl.query.PropertyCollector.RetrieveOptions()
+            )
+            while result:
+                for obj_content in result.objects:
+                    properties[obj_content.obj] = {
+                        prop.name: prop.val for prop in obj_content.propSet
+                    }
+                if not result.token:
+                    break
+                result = property_collector.ContinueRetrievePropertiesEx(result.token)
+        finally:
+            container.Destroy()
+        return properties
+
     def get_objs(self, vimtype: List, name: str):
         """
         Get all managed objects of the given name
@@ -185,6 +234,29 @@ class GetObjects(object):
             else:
                 return None
 
+    def get_hosts(self, host_names, _exit=True):
+        """
+        Get the host managed objects by names from one container view
+
+        Args:
+            host_names (list): the names of hosts to get
+            _exit (bool): if any host is not found, whether exit the program
+
+        Returns:
+            list: a list of vim.HostSystem in the order of host_names
+                  (the hosts not found are skipped)
+        """
+        host_objs = {}
+        for host_obj in self.get_container_view([vim.HostSystem]):
+            if host_obj.name in host_names:
+                host_objs[host_obj.name] = host_obj
+        missing = [name for name in host_names if name not in host_objs]
+        if missing:
+            self.logger.error("Cannot find host(s) {0}".format(missing))
+            if _exit:
+                raise SystemExit
+        return [host_objs[name] for name in host_names if name in host_objs]
+
     def get_host_by_vm(self, vm_obj):
         """
         Get the host managed object by vm
@@ -300,6 +372,26 @@ class GetObjects(object):
             else:
                 return None
 
+    def get_custom_field_key(self, field_name, create=False):
+        """
+        Get the key of a global custom field by name
+
+        Args:
+            field_name (str): the name of the custom field
+            create (bool): whether to create the custom field if not exists
+
+        Returns:
+            int: the key of the custom field if exists, otherwise None
+        """
+        custom_fields_manager = self.content.customFieldsManager
+        for field in custom_fields_manager.field:
+            if field.name == field_name and field.managedObjectType is None:
+                return field.key
+        if create:
+            self.logger.info("Creating custom field {0}".format(field_name))
+            return custom_fields_manager.AddCustomFieldDef(name=field_name).key
+        return None
+
     def get_network(
         self, network_name, dvs_name=None, _exit=True
     ) -> Optional[vim.Network]:
@@ -569,6 +661,100 @@ class GetHost(object):
         """
         return self.host_obj.summary.hardware.cpuMhz
 
+    def free_memory_mb(self):
+        """
+        get free memory of a host
+
+        Returns:
+            int: memory (in MB) not used on the host
+
+        """
+        summary = self.host_obj.summary
+        return (
+            summary.hardware.memorySize // (1024 * 1024)
+            - summary.quickStats.overallMemoryUsage
+        )
+
+    def free_cpu_mhz(self):
+        """
+        get free CPU capacity of a host
+
+        Returns:
+            int: CPU capacity (in MHz) not used on the host
+
+        """
+        summary = self.host_obj.summary
+        return (
+            summary.hardware.cpuMhz * summary.hardware.numCpuCores
+            - summary.quickStats.overallCpuUsage
+        )
+
+    def vmotion_networks(self):
+        """
+        get the networks of the vMotion VMkernel adapters of a host
+
+        Returns:
+            list: a list of port group names (or DVS port group keys) of the
+                  VMkernel adapters selected for vMotion
+
+        """
+        net_config = self.host_obj.configManager.virtualNicManager.QueryNetConfig(
+            "vmotion"
+        )
+        if net_config is None:
+            return []
+        networks = []
+        for vnic in net_config.candidateVnic:
+            if vnic.key not in net_config.selectedVnic:
+                continue
+            if vnic.portgroup:
+                networks.append(vnic.portgroup)
+            elif vnic.spec.distributedVirtualPort:
+                networks.append(vnic.spec.distributedVirtualPort.portgroupKey)
+        return networks
+
+    def power_policy(self):
+        """
+        get the current power policy of a host
+
+        Returns:
+            int: the key of the current power policy
+
+        """
+        return self.host_obj.configManager.powerSystem.info.currentPolicy.key
+
+    def advanced_option(self, option_key):
+        """
+        get the value of an advanced option of a host
+
+        Args:
+            option_key (str): the key of the advanced option,
+                              e.g. "Numa.LocalityWeightActionAffinity"
+
+        Returns:
+            the value of the option if exists, otherwise None
+
+        """
+        try:
+            options = self.host_obj.configManager.advancedOption.QueryOptions(
+                option_key
+            )
+        except vim.fault.InvalidName:
+            return None
+        return options[0].value if options else None
+
+    def pci_passthru_info(self):
+        """
+        get the passthrough and SR-IOV configuration of the PCI devices of
+        a host
+
+        Returns:
+            dict: a dict of PCI ID to vim.host.PciPassthruInfo (or
+                  vim.host.SriovInfo for SR-IOV capable devices)
+
+        """
+        return {info.id: info for info in self.host_obj.config.pciPassthruInfo}
+
 
 class GetVM(object):
     """
@@ -617,6 +803,17 @@ class GetVM(object):
         """
         return self.vm_obj.parent.parent.name
 
+    def datacenter_obj(self):
+        """
+
+        Returns:
+            vim.Datacenter: the datacenter that the VM belongs to
+        """
+        entity = self.vm_obj.parent
+        while entity is not None and not isinstance(entity, vim.Datacenter):
+            entity = entity.parent
+        return entity
+
     def cluster(self):
         """
 
@@ -771,6 +968,22 @@ class GetVM(object):
         """
         return self.vm_obj.runtime.powerState == vim.VirtualMachinePowerState.poweredOn
 
+    def is_suspended(self):
+        """
+
+        Returns:
+            bool: True if the VM is suspended
+        """
+        return self.vm_obj.runtime.powerState == vim.VirtualMachinePowerState.suspended
+
+    def annotation(self):
+        """
+
+        Returns:
+            str: the annotation (notes) of the VM
+        """
+        return self.vm_obj.config.annotation or ""
+
     def network_obj(self, network_name, device_type=vim.VirtualVmxnet3):
         """
 
@@ -987,6 +1200,60 @@ class GetVM(object):
                 return extra_config.value
         return None
 
+    def snapshot_trees(self):
+        """
+        Get all snapshots of the VM, walking the snapshot tree breadth first
+
+        Returns:
+            list: a list of vim.vm.SnapshotTree, empty if the VM has no snapshot
+        """
+        if self.vm_obj.snapshot is None:
+            return []
+        snapshot_trees = []
+        to_visit = list(self.vm_obj.snapshot.rootSnapshotList)
+        while to_visit:
+            snapshot_tree = to_visit.pop(0)
+            snapshot_trees.append(snapshot_tree)
+            to_visit.extend(snapshot_tree.childSnapshotList)
+        return snapshot_trees
+
+    def snapshot_obj(self, snapshot_name):
+        """
+        Get a snapshot of the VM by name
+
+        Args:
+            snapshot_name (str): the name of the snapshot
+
+        Returns:
+            vim.vm.Snapshot: the snapshot if exists, otherwise None
+        """
+        for snapshot_tree in self.snapshot_trees():
+            if snapshot_tree.name == snapshot_name:
+                return snapshot_tree.snapshot
+        return None
+
+    def versioned_snapshots(self, base_name):
+        """
+        Get the versioned snapshots of a base snapshot family, named as
+        "<base_name>-v<version>"
+
+        Args:
+            base_name (str): the name of the base snapshot family
+
+        Returns:
+            list: a list of tuples (version, snapshot name, vim.vm.Snapshot)
+                  sorted by version
+        """
+        version_re = re.compile(r"^{0}-v(\d+)$".format(re.escape(base_name)))
+        snapshots = []
+        for snapshot_tree in self.snapshot_trees():
+            match = version_re.match(snapshot_tree.name)
+            if match:
+                snapshots.append(
+                    (int(match.group(1)), snapshot_tree.name, snapshot_tree.snapshot)
+                )
+        return sorted(snapshots, key=lambda snapshot: snapshot[0])
+
     def uefi(self):
         """
         Check UEFI installation
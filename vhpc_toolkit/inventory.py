@@ -0,0 +1,305 @@
+# Virtualized High Performance Computing Toolkit
+#
+# Copyright (c) 2018-2019 VMware, Inc. All Rights Reserved.
+#
+# This product is licensed to you under the Apache 2.0 license (the
+# "License"). You may not use this product except in compliance with the
+# Apache 2.0 License. This product may include a number of subcomponents with
+#  separate copyright notices and license terms. Your use of these
+# subcomponents is subject to the terms and conditions of the subcomponent's
+# license, as noted in the LICENSE file.
+# SPDX-License-Identifier: Apache-2.0
+# coding=utf-8
+import json
+import os
+import time
+from os.path import expanduser
+
+from pyVmomi import vim
+from texttable import Texttable
+
+from vhpc_toolkit import log
+
+HOST_PROPERTIES = [
+    "name",
+    "parent",
+    "runtime.connectionState",
+    "summary.hardware.cpuMhz",
+    "summary.hardware.numCpuCores",
+    "summary.hardware.memorySize",
+    "hardware.numaInfo.numNodes",
+    "hardware.pciDevice",
+    "config.pciPassthruInfo",
+    "config.sharedPassthruGpuTypes",
+    "config.network.pnic",
+]
+VM_PROPERTIES = ["name", "runtime.host", "runtime.powerState", "config.hardware.device"]
+# PCI class of display controllers, and vendors of GPUs
+DISPLAY_CLASS = 0x03
+GPU_VENDORS = [0x10DE, 0x1002]
+DEFAULT_SNAPSHOT = "%s/vhpc_toolkit/hosts.json" % expanduser("~")
+
+
+class HostInventory(object):
+    """
+    A snapshot of the capabilities of all hosts (PCI devices, passthrough
+    and SR-IOV state, vGPU types, NUMA nodes, pnics and CPU), collected in
+    one property collector sweep
+
+    """
+
+    def __init__(self, snapshot_file=DEFAULT_SNAPSHOT):
+        """
+
+        Args:
+            snapshot_file (str): the local JSON file to save/load the snapshot
+
+        """
+        self.snapshot_file = snapshot_file
+        # names of all VMs seen by the last collection (not saved)
+        self.vm_names = set()
+        self.logger = log.my_logger(name=self.__class__.__name__)
+
+    def collect(self, objs):
+        """
+        collect the capabilities of all hosts
+
+        Args:
+            objs (GetObjects): the vCenter objects getter
+
+        Returns:
+            dict: the snapshot, with the collection time and a dict of host
+                  name to its capabilities
+        """
+        properties = objs.collect_properties(
+            {
+                vim.HostSystem: HOST_PROPERTIES,
+                vim.VirtualMachine: VM_PROPERTIES,
+                vim.ComputeResource: ["name"],
+            }
+        )
+        used_devices = self._count_used_devices(properties)
+        self.vm_names = {
+            props["name"]
+            for obj, props in properties.items()
+            if isinstance(obj, vim.VirtualMachine) and "name" in props
+        }
+        hosts = {}
+        for obj, props in properties.items():
+            if not isinstance(obj, vim.HostSystem):
+                continue
+            parent = props.get("parent")
+            hosts[props["name"]] = self._host_record(
+                props,
+                cluster=properties.get(parent, {}).get("name"),
+                used=used_devices.get(obj, {}),
+            )
+        self.logger.info("Collected capabilities of {0} host(s)".format(len(hosts)))
+        return {"collected": int(time.time()), "hosts": hosts}
+
+    @staticmethod
+    def _count_used_devices(properties):
+        """count the devices used by VMs per host: SR-IOV virtual functions
+        (per physical function) used by powered-on VMs, and passthrough
+        devices and vGPUs (per profile) configured on any VM"""
+
+        used_devices = {}
+        for obj, props in properties.items():
+            if not isinstance(obj, vim.VirtualMachine):
+                continue
+            used = used_devices.setdefault(
+                props.get("runtime.host"), {"vfs": {}, "passthru": [], "vgpus": {}}
+            )
+            powered_on = (
+                props.get("runtime.powerState")
+                == vim.VirtualMachinePowerState.poweredOn
+            )
+            for device in props.get("config.hardware.device", []):
+                if isinstance(device, vim.vm.device.VirtualSriovEthernetCard):
+                    pf = device.sriovBacking.physicalFunctionBacking
+                    if powered_on and pf is not None:
+                        used["vfs"][pf.id] = used["vfs"].get(pf.id, 0) + 1
+                elif isinstance(device, vim.vm.device.VirtualPCIPassthrough):
+                    backing = device.backing
+                    if isinstance(
+                        backing, vim.vm.device.VirtualPCIPassthrough.DeviceBackingInfo
+                    ):
+                        used["passthru"].append(backing.id)
+                    elif isinstance(
+                        backing, vim.vm.device.VirtualPCIPassthrough.VmiopBackingInfo
+                    ):
+                        used["vgpus"][backing.vgpu] = (
+                            used["vgpus"].get(backing.vgpu, 0) + 1
+                        )
+        return used_devices
+
+    @staticmethod
+    def _host_record(props, cluster, used):
+        """build the JSON-serializable capabilities of one host"""
+
+        pci_devices = {
+            device.id: device for device in props.get("hardware.pciDevice", [])
+        }
+        passthru = []
+        sriov = []
+        passthru_ids = set()
+        for info in props.get("config.pciPassthruInfo", []):
+            device = pci_devices.get(info.id)
+            name = (
+                "{0} {1}".format(device.vendorName, device.deviceName) if device else ""
+            )
+            if isinstance(info, vim.host.SriovInfo) and info.sriovCapable:
+                sriov.append(
+                    {
+                        "id": info.id,
+                        "name": name,
+                        "enabled": info.sriovEnabled,
+                        "num_vf": info.numVirtualFunction,
+                        "free_vf": max(
+                            0,
+                            info.numVirtualFunction
+                            - used.get("vfs", {}).get(info.id, 0),
+                        ),
+                    }
+                )
+            elif info.passthruCapable:
+                if info.passthruEnabled:
+                    passthru_ids.add(info.id)
+                passthru.append(
+                    {
+                        "id": info.id,
+                        "name": name,
+                        "enabled": info.passthruEnabled,
+                        "active": info.passthruActive,
+                        "gpu": bool(device) and HostInventory._is_gpu(device),
+                        "used": info.id in used.get("passthru", []),
+                    }
+                )
+        return {
+            "cluster": cluster,
+            "connection_state": props.get("runtime.connectionState"),
+            "cpu_mhz_per_core": props.get("summary.hardware.cpuMhz"),
+            "cores": props.get("summary.hardware.numCpuCores"),
+            "memory_gb": props.get("summary.hardware.memorySize", 0) // 1024**3,
+            "numa_nodes": props.get("hardware.numaInfo.numNodes"),
+            "pnics": [pnic.device for pnic in props.get("config.network.pnic", [])],
+            "vgpu_types": list(props.get("config.sharedPassthruGpuTypes", [])),
+            # GPUs which are not in passthrough mode can back vGPUs
+            "vgpu_gpus": len(
+                [
+                    device
+                    for device in pci_devices.values()
+                    if HostInventory._is_gpu(device) and device.id not in passthru_ids
+                ]
+            ),
+            "vgpu_used": used.get("vgpus", {}),
+            "passthru": passthru,
+            "sriov": sriov,
+        }
+
+    @staticmethod
+    def _is_gpu(device):
+        """whether a PCI device is a GPU"""
+
+        return (device.classId >> 8) & 0xFF == DISPLAY_CLASS and (
+            device.vendorId & 0xFFFF
+        ) in GPU_VENDORS
+
+    def save(self, snapshot):
+        """
+        save a snapshot to the local snapshot file
+
+        Args:
+            snapshot (dict): the snapshot from collect()
+
+        Returns:
+            None
+        """
+        snapshot_dir = os.path.dirname(self.snapshot_file)
+        if snapshot_dir and not os.path.isdir(snapshot_dir):
+            os.makedirs(snapshot_dir)
+        with open(self.snapshot_file, "w") as f:
+            json.dump(snapshot, f, indent=1, sort_keys=True)
+        self.logger.info("Saved host snapshot to {0}".format(self.snapshot_file))
+
+    def load(self, max_age=None):
+        """
+        load the snapshot from the local snapshot file
+
+        Args:
+            max_age (int): max age of the snapshot in seconds, None for any age
+
+        Returns:
+            dict: the snapshot, or None if there is no (fresh enough) snapshot
+        """
+        try:
+            with open(self.snapshot_file, "r") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if max_age is not None and time.time() - snapshot["collected"] > max_age:
+            self.logger.info(
+                "Host snapshot {0} is older than {1} seconds".format(
+                    self.snapshot_file, max_age
+                )
+            )
+            return None
+        return snapshot
+
+    @staticmethod
+    def print_snapshot(snapshot, hosts=None):
+        """
+        print a table of the host capabilities
+
+        Args:
+            snapshot (dict): the snapshot from collect() or load()
+            hosts (list): the host names to print, None for all hosts
+
+        Returns:
+            None
+        """
+        table = Texttable(max_width=0)
+        table.set_cols_dtype(["t"] * 9)
+        table_rows = [
+            [
+                "Host",
+                "Cluster",
+                "MHz/Core",
+                "Cores",
+                "NUMA",
+                "pNICs",
+                "Passthru (*used)",
+                "SR-IOV (free/VFs)",
+                "vGPU Types",
+            ]
+        ]
+        for host in sorted(hosts or snapshot["hosts"]):
+            record = snapshot["hosts"].get(host)
+            if record is None:
+                continue
+            table_rows.append(
+                [
+                    host,
+                    record["cluster"] or "",
+                    record["cpu_mhz_per_core"],
+                    record["cores"],
+                    record["numa_nodes"],
+                    " ".join(record["pnics"]),
+                    " ".join(
+                        device["id"] + ("*" if device.get("used") else "")
+                        for device in record["passthru"]
+                        if device["enabled"]
+                    ),
+                    " ".join(
+                        "{0} {1}/{2}".format(
+                            device["id"], device["free_vf"], device["num_vf"]
+                        )
+                        for device in record["sriov"]
+                        if device["enabled"]
+                    ),
+                    " ".join(record["vgpu_types"]),
+                ]
+            )
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
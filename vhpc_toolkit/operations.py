@@ -10,14 +10,21 @@
 # license, as noted in the LICENSE file.
 # SPDX-License-Identifier: Apache-2.0
 # coding=utf-8
+import functools
 import itertools
 import json
 import logging
+import os
+import re
+import shlex
+import threading
+import time
 from typing import List
 
 from distutils.util import strtobool
 from pyVmomi import vim
 from pyVmomi import vmodl
+from texttable import Texttable
 from textwrap3 import TextWrapper
 
 from vhpc_toolkit import get_args
@@ -29,14 +36,35 @@ from vhpc_toolkit.config_objs import ConfigDVS
 from vhpc_toolkit.config_objs import ConfigHost
 from vhpc_toolkit.config_objs import ConfigVM
 from vhpc_toolkit.connect import Connect
+from vhpc_toolkit.executor import Executor
 from vhpc_toolkit.get_objs import GetClone
 from vhpc_toolkit.get_objs import GetCluster
 from vhpc_toolkit.get_objs import GetDatacenter
 from vhpc_toolkit.get_objs import GetHost
 from vhpc_toolkit.get_objs import GetObjects
 from vhpc_toolkit.get_objs import GetVM
+from vhpc_toolkit.inventory import DEFAULT_SNAPSHOT
+from vhpc_toolkit.inventory import HostInventory
+from vhpc_toolkit.planner import DevicePlanner
+from vhpc_toolkit.profiles import HostProfile
+from vhpc_toolkit.profiles import VMProfile
+from vhpc_toolkit.transfer import Bundle
+from vhpc_toolkit.transfer import FanOut
+from vhpc_toolkit.transfer import GuestLogCollector
+from vhpc_toolkit.transfer import SessionPool
+from vhpc_toolkit.transfer import UploadManifest
+from vhpc_toolkit.validate import NODE_TESTS
+from vhpc_toolkit.validate import out_of_tolerance
+from vhpc_toolkit.validate import PAIR_COLUMNS
+from vhpc_toolkit.validate import pair_rounds
+from vhpc_toolkit.validate import PAIR_TESTS
+from vhpc_toolkit.validate import parse_active_mtu
+from vhpc_toolkit.validate import parse_perftest
+from vhpc_toolkit.validate import parse_stream
+from vhpc_toolkit.validate import print_matrix
 from vhpc_toolkit.view import View
 from vhpc_toolkit.wait import GetWait
+from vhpc_toolkit.wait import HostGetWait
 from vhpc_toolkit.wait import VMGetWait
 
 
@@ -63,6 +91,19 @@ class Operations(object):
         # retrieve vCenter managed objects
         self.objs = GetObjects(self.content)
 
+        # base snapshots and shadow VMs resolved for linked clone in this run
+        self.base_snapshots = {}
+        self.shadow_vms = {}
+
+        # unclaimed pool members, claimed members to refill in this run and
+        # claimed members to power on like a linked clone
+        self.pool_members = {}
+        self.pool_refills = []
+        self.pool_power_ons = []
+
+        # the id of this run, to keep the logs of post scripts per run
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+
         # set logging level
         if self.cfg["debug"]:
             self.logger = log.my_logger(
@@ -141,12 +182,10 @@ class Operations(object):
         vms = [vm_cfg["vm"] for vm_cfg in vm_cfgs]
 
         if self.cfg["on"]:
-            tasks = self._get_poweron_tasks(vms)
-            GetWait().wait_for_tasks(tasks, task_name="Power on")
+            self._power_on_vms(vms)
         
         if self.cfg["off"]:
-            tasks = self._get_poweroff_tasks(vms)
-            GetWait().wait_for_tasks(tasks, task_name="Power off")
+            self._power_off_vms(vms)
 
     def _power_cluster(self, vm_cfgs, key):
         """
@@ -165,11 +204,124 @@ class Operations(object):
             else:
                 on_vms.append(vm_cfg["vm"])
         if on_vms:
-            tasks = self._get_poweron_tasks(on_vms)
-            GetWait().wait_for_tasks(tasks, task_name="Power on")
+            self._power_on_vms(on_vms)
         if off_vms:
-            tasks = self._get_poweroff_tasks(off_vms)
-            GetWait().wait_for_tasks(tasks, task_name="Power off")
+            self._power_off_vms(off_vms)
+
+    def _power_on_vms(self, vms):
+        """
+        Power on VMs in waves. Each wave is powered on via one
+        PowerOnMultiVM task per datacenter, and the next wave starts after
+        the stagger interval. With a tools timeout, the time from power-on
+        to VMware Tools running is reported for every VM.
+
+        Args:
+            vms (list): a list of VMs to power on
+
+        Returns:
+            None
+        """
+        vm_objs = []
+        for vm in vms:
+            vm_obj = self.objs.get_vm(vm)
+            if GetVM(vm_obj).is_power_on():
+                self.logger.info("VM {0} is already in power on state".format(vm))
+            else:
+                vm_objs.append(vm_obj)
+        if not vm_objs:
+            return
+        wave_size = self.cfg.get("wave_size") or len(vm_objs)
+        stagger = self.cfg.get("stagger") or 0
+        tools_timeout = self.cfg.get("tools_timeout") or 0
+        waves = [vm_objs[i : i + wave_size] for i in range(0, len(vm_objs), wave_size)]
+        started = {}
+        tools_ready = {}
+        wave_of = {}
+        for wave_num, wave in enumerate(waves, start=1):
+            datacenters = {}
+            for vm_obj in wave:
+                datacenter_obj = GetVM(vm_obj).datacenter_obj()
+                datacenters.setdefault(datacenter_obj, []).append(vm_obj)
+            wave_start = time.time()
+            tasks = [
+                ConfigDatacenter(datacenter_obj).power_on_vms(wave_vm_objs)
+                for datacenter_obj, wave_vm_objs in datacenters.items()
+            ]
+            GetWait().wait_for_tasks(
+                tasks, task_name="Power on wave {0}/{1}".format(wave_num, len(waves))
+            )
+            vm_tasks = []
+            for task in tasks:
+                result = task.info.result
+                if result is None:
+                    continue
+                for attempted in result.attempted:
+                    started[attempted.vm] = wave_start
+                    wave_of[attempted.vm] = wave_num
+                    vm_tasks.append(attempted.task)
+                for not_attempted in result.notAttempted:
+                    self.logger.error(
+                        "VM {0} is not powered on: {1}".format(
+                            not_attempted.vm.name,
+                            not_attempted.fault.localizedMessage,
+                        )
+                    )
+            GetWait().wait_for_tasks(vm_tasks, task_name="Power on")
+            # watch VMware Tools during the stagger interval
+            if wave_num < len(waves) and stagger:
+                if tools_timeout:
+                    GetWait().wait_for_vms_tools(
+                        self.content, started, tools_ready, until=wave_start + stagger
+                    )
+                time.sleep(max(0, wave_start + stagger - time.time()))
+        if started and tools_timeout:
+            if not GetWait().wait_for_vms_tools(
+                self.content, started, tools_ready, until=time.time() + tools_timeout
+            ):
+                self.logger.warning(
+                    "VMware Tools is not running in {0} VMs after {1} seconds".format(
+                        len(started) - len(tools_ready), tools_timeout
+                    )
+                )
+            self._print_power_on_times(started, tools_ready, wave_of)
+
+    @staticmethod
+    def _print_power_on_times(started, tools_ready, wave_of):
+        """
+        print the time from power-on to VMware Tools running of VMs
+
+        Args:
+            started (dict): {vm_obj: time when its power-on was issued}
+            tools_ready (dict): {vm_obj: seconds to VMware Tools running}
+            wave_of (dict): {vm_obj: wave number}
+
+        Returns:
+            None
+        """
+        table = Texttable()
+        table_rows = [["VM", "Wave", "Host", "Tools running (s)"]]
+        for vm_obj in started:
+            if vm_obj in tools_ready:
+                ready = "{0:.1f}".format(tools_ready[vm_obj])
+            else:
+                ready = "timeout"
+            host = vm_obj.runtime.host.name if vm_obj.runtime.host else ""
+            table_rows.append([vm_obj.name, wave_of[vm_obj], host, ready])
+        if tools_ready:
+            times = sorted(tools_ready.values())
+            table_rows.append(
+                [
+                    "min/median/max",
+                    "",
+                    "",
+                    "{0:.1f}/{1:.1f}/{2:.1f}".format(
+                        times[0], times[len(times) // 2], times[-1]
+                    ),
+                ]
+            )
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
 
     def _get_poweron_tasks(self, vms):
         """
@@ -193,27 +345,85 @@ class Operations(object):
         
         return tasks
 
-    def _get_poweroff_tasks(self, vms):
+    def _power_off_vms(self, vms):
         """
-        Power off VMs and get Tasks
+        Power off VMs
 
         Args:
             vms (list): a list of VMs to power off
 
         Returns:
-            list: a list of Tasks
+            None
         """
-        tasks = []
-
+        vm_objs = []
         for vm in vms:
             vm_obj = self.objs.get_vm(vm)
             if GetVM(vm_obj).is_power_on():
-                task = ConfigVM(vm_obj).power_off()
-                tasks.append(task)
+                vm_objs.append(vm_obj)
             else:
                 self.logger.info("VM {0} is already in power off state".format(vm))
-        
-        return tasks
+        self._power_off_vm_objs(vm_objs)
+
+    def _power_off_vm_objs(self, vm_objs, task_name="Power off"):
+        """
+        Power off VMs. If shutdown is specified, shut down the guest OS of
+        all VMs concurrently first, and only hard power off the VMs which
+        are still powered on after the shutdown timeout.
+
+        Args:
+            vm_objs (list): a list of vim.VirtualMachine to power off
+            task_name (str): the task name of the power off tasks
+
+        Returns:
+            None
+        """
+        vm_objs = [vm_obj for vm_obj in vm_objs if GetVM(vm_obj).is_power_on()]
+        if vm_objs and self.cfg.get("shutdown"):
+            vm_objs = self._shutdown_guests(vm_objs)
+        tasks = [ConfigVM(vm_obj).power_off() for vm_obj in vm_objs]
+        if tasks:
+            GetWait().wait_for_tasks(tasks, task_name=task_name)
+
+    def _shutdown_guests(self, vm_objs):
+        """
+        Shut down the guest OS of VMs concurrently and wait for them to be
+        powered off until the shutdown timeout
+
+        Args:
+            vm_objs (list): a list of vim.VirtualMachine to shut down
+
+        Returns:
+            list: a list of vim.VirtualMachine which are still powered on
+        """
+        timeout = self.cfg.get("shutdown_timeout", 120)
+        stragglers = []
+        shutting_down = []
+        for vm_obj in vm_objs:
+            try:
+                ConfigVM(vm_obj).shutdown_guest()
+                shutting_down.append(vm_obj)
+            except vmodl.MethodFault as error:
+                self.logger.warning(
+                    "Cannot shut down guest OS of VM {0} ({1}). "
+                    "It will be powered off.".format(vm_obj.name, error.msg)
+                )
+                stragglers.append(vm_obj)
+        if shutting_down:
+            self.logger.info(
+                "Waiting up to {0} seconds for {1} VMs to shut down".format(
+                    timeout, len(shutting_down)
+                )
+            )
+            still_on = GetWait().wait_for_power_off(
+                self.content, shutting_down, timeout
+            )
+            for vm_obj in still_on:
+                self.logger.warning(
+                    "VM {0} did not shut down in {1} seconds. "
+                    "It will be powered off.".format(vm_obj.name, timeout)
+                )
+            stragglers.extend(still_on)
+        return stragglers
 
     # ~~~~~~~~~~~~~~~~~~~~~~~ POWER END ~~~~~~~~~~~~~~~~~~~~~~#
 
@@ -294,10 +504,13 @@ class Operations(object):
         # unfolding the file that is parsed from cli operations
         # if '--file' is not used, original cfg will be returned
         vm_cfgs = self._extract_file(self.cfg, file_keys=clone_file_keys)
+        self._warm_up_shadows(vm_cfgs)
         tasks = [self._get_clone_task(vm_cfg) for vm_cfg in vm_cfgs]
         # wait for all tasks to finish
         if tasks:
             GetWait().wait_for_tasks(tasks, task_name="Clone VM")
+        self._power_on_claimed()
+        self._refill_pools()
 
     def _clone_cluster(self, vm_cfgs, *keys):
         """
@@ -310,13 +523,189 @@ class Operations(object):
         Returns:
                 None
         """
-        tasks = [
-            self._get_clone_task(vm_cfg)
-            for vm_cfg in vm_cfgs
-            if all(k in vm_cfg for k in keys)
-        ]
+        vm_cfgs = [vm_cfg for vm_cfg in vm_cfgs if all(k in vm_cfg for k in keys)]
+        self._warm_up_shadows(vm_cfgs)
+        tasks = [self._get_clone_task(vm_cfg) for vm_cfg in vm_cfgs]
         if tasks:
             GetWait().wait_for_tasks(tasks, task_name="Clone VM")
+        self._power_on_claimed()
+        self._refill_pools()
+
+    def _get_base_snapshot(self, template_obj, base_name=None, new_version=False):
+        """
+        get the toolkit managed base snapshot of a template for linked clone.
+        A snapshot of the exact base name is used if exists, otherwise the
+        latest version "<base_name>-v<N>" is used. A new version is taken if
+        none exists or a new version is requested. The result is cached, so
+        that all linked clones of a template in one run share the same base.
+
+        Args:
+            template_obj (vim.VirtualMachine): the template VM
+            base_name (str): the name of the base snapshot (family)
+            new_version (bool): whether to take a new version of the base
+                                snapshot
+
+        Returns:
+            tuple: (snapshot name, vim.vm.Snapshot)
+        """
+        if not base_name:
+            base_name = "vhpc_toolkit-base"
+        cache_key = (template_obj._moId, base_name)
+        if cache_key in self.base_snapshots:
+            return self.base_snapshots[cache_key]
+        template = GetVM(template_obj)
+        snapshot_obj = template.snapshot_obj(base_name)
+        versions = template.versioned_snapshots(base_name)
+        if snapshot_obj and not new_version:
+            snapshot_name = base_name
+        elif versions and not new_version:
+            _, snapshot_name, snapshot_obj = versions[-1]
+        else:
+            version = versions[-1][0] + 1 if versions else 1
+            snapshot_name = "{0}-v{1}".format(base_name, version)
+            task = ConfigVM(template_obj).create_snapshot(
+                snapshot_name, description="vhpc_toolkit base snapshot for linked clone"
+            )
+            GetWait().wait_for_tasks([task], task_name="Take base snapshot")
+            snapshot_obj = template.snapshot_obj(snapshot_name)
+            if snapshot_obj is None:
+                self.logger.error(
+                    "Failed to take base snapshot {0} of template {1}".format(
+                        snapshot_name, template_obj.name
+                    )
+                )
+                raise SystemExit
+        self.logger.info(
+            "Base snapshot {0} of template {1} is used for linked clone".format(
+                snapshot_name, template_obj.name
+            )
+        )
+        self.base_snapshots[cache_key] = (snapshot_name, snapshot_obj)
+        return snapshot_name, snapshot_obj
+
+    @staticmethod
+    def _shadow_vm_name(template_name, snapshot_name, datastore_name):
+        return "{0}-{1}-shadow-{2}".format(template_name, snapshot_name, datastore_name)
+
+    def _get_shadow_vm(self, shadow_vm_name):
+        """
+        get the shadow VM of a template by name (cached in this run)
+
+        Args:
+            shadow_vm_name (str): the name of the shadow VM
+
+        Returns:
+            vim.VirtualMachine: the shadow VM if exists, otherwise None
+        """
+        if shadow_vm_name not in self.shadow_vms:
+            self.shadow_vms[shadow_vm_name] = self.objs.get_obj(
+                [vim.VirtualMachine], shadow_vm_name
+            )
+        return self.shadow_vms[shadow_vm_name]
+
+    def _get_linked_clone_source(self, template_obj, vm_cfg):
+        """
+        get the source VM and its base snapshot for a linked clone.
+        If a shadow VM of the template exists on the dest datastore,
+        the shadow VM is the source. Otherwise the template is the source.
+
+        Args:
+            template_obj (vim.VirtualMachine): the template VM
+            vm_cfg (dict): a dict contains vm clone info
+
+        Returns:
+            tuple: (vim.VirtualMachine, vim.vm.Snapshot)
+        """
+        snapshot_name, snapshot_obj = self._get_base_snapshot(
+            template_obj,
+            base_name=vm_cfg.get("base_snapshot"),
+            new_version=Check().check_kv(vm_cfg, "new_base_snapshot"),
+        )
+        if Check().check_kv(vm_cfg, "datastore"):
+            shadow_vm_obj = self._get_shadow_vm(
+                self._shadow_vm_name(
+                    template_obj.name, snapshot_name, vm_cfg["datastore"]
+                )
+            )
+            if shadow_vm_obj:
+                shadow_snapshot_obj = GetVM(shadow_vm_obj).snapshot_obj(snapshot_name)
+                if shadow_snapshot_obj:
+                    self.logger.info(
+                        "Linked clone from shadow VM {0}".format(shadow_vm_obj.name)
+                    )
+                    return shadow_vm_obj, shadow_snapshot_obj
+        return template_obj, snapshot_obj
+
+    def _warm_up_shadows(self, vm_cfgs):
+        """
+        create a shadow VM (a full clone of the base snapshot, carrying a
+        snapshot of the same name) of the template on each dest datastore
+        of linked clones, so that the linked clones on that datastore do not
+        have to read their base disks across datastores
+
+        Args:
+            vm_cfgs (list): a list of dicts contains vm clone ops info
+
+        Returns:
+            None
+        """
+        shadows = {}
+        tasks = []
+        for vm_cfg in vm_cfgs:
+            if not all(
+                Check().check_kv(vm_cfg, key)
+                for key in ["linked", "warm_up", "datastore", "template"]
+            ):
+                continue
+            template_obj = self.objs.get_vm(vm_cfg["template"])
+            snapshot_name, snapshot_obj = self._get_base_snapshot(
+                template_obj,
+                base_name=vm_cfg.get("base_snapshot"),
+                new_version=Check().check_kv(vm_cfg, "new_base_snapshot"),
+            )
+            datastore_obj = self.objs.get_datastore(vm_cfg["datastore"])
+            if datastore_obj in template_obj.datastore:
+                continue
+            shadow_vm_name = self._shadow_vm_name(
+                template_obj.name, snapshot_name, datastore_obj.name
+            )
+            if shadow_vm_name in shadows or self._get_shadow_vm(shadow_vm_name):
+                continue
+            resource_pool_obj = template_obj.resourcePool
+            if resource_pool_obj is None:
+                resource_pool_obj = template_obj.runtime.host.parent.resourcePool
+            shadows[shadow_vm_name] = (snapshot_name, template_obj)
+            tasks.append(
+                ConfigVM(template_obj).full_clone(
+                    dest_vm_name=shadow_vm_name,
+                    host_obj=None,
+                    datastore_obj=datastore_obj,
+                    vm_folder_obj=template_obj.parent,
+                    resource_pool_obj=resource_pool_obj,
+                    cpu=None,
+                    mem=None,
+                    snapshot_obj=snapshot_obj,
+                )
+            )
+        if not tasks:
+            return
+        GetWait().wait_for_tasks(tasks, task_name="Warm up shadow VM")
+        tasks = []
+        for shadow_vm_name, (snapshot_name, template_obj) in shadows.items():
+            # refresh the cache since the shadow VM has just been created
+            self.shadow_vms.pop(shadow_vm_name, None)
+            shadow_vm_obj = self._get_shadow_vm(shadow_vm_name)
+            if shadow_vm_obj:
+                tasks.append(
+                    ConfigVM(shadow_vm_obj).create_snapshot(
+                        snapshot_name,
+                        description="vhpc_toolkit shadow of {0}".format(
+                            template_obj.name
+                        ),
+                    )
+                )
+        if tasks:
+            GetWait().wait_for_tasks(tasks, task_name="Take shadow base snapshot")
 
     def _create_resource_pool(
             self, resource_pool_name, destination_host: vim.HostSystem
@@ -335,9 +724,51 @@ class Operations(object):
             "Use default policy of resource pool creation. No limitation on CPU and memory allocation."
         )
 
-        return destination_host.parent.resourcePool.CreateResourcePool(
+        resource_pool_obj = destination_host.parent.resourcePool.CreateResourcePool(
             name=resource_pool_name, spec=resource_spec
         )
+        self._mark_toolkit_created(resource_pool_obj)
+        return resource_pool_obj
+
+    def _mark_toolkit_created(self, entity):
+        """
+        mark a managed entity (e.g. VM folder or resource pool) as created
+        by vhpc_toolkit, via a custom field
+
+        Args:
+            entity (vim.ManagedEntity): the managed entity to mark
+
+        Returns:
+            None
+        """
+        try:
+            key = self.objs.get_custom_field_key("vhpc_toolkit_created", create=True)
+            self.content.customFieldsManager.SetField(
+                entity=entity, key=key, value="yes"
+            )
+        except (vim.fault.NoPermission, vmodl.MethodFault) as e:
+            self.logger.warning(
+                "Couldn't mark {0} as created by vhpc_toolkit, so it won't be "
+                "destroyed with its VMs: {1}".format(entity.name, e.msg)
+            )
+
+    def _is_toolkit_created(self, entity):
+        """
+        check whether a managed entity is created by vhpc_toolkit
+
+        Args:
+            entity (vim.ManagedEntity): the managed entity to check
+
+        Returns:
+            bool: True if the entity is marked as created by vhpc_toolkit
+        """
+        key = self.objs.get_custom_field_key("vhpc_toolkit_created")
+        if key is None:
+            return False
+        return any(
+            custom_value.key == key and custom_value.value == "yes"
+            for custom_value in entity.customValue
+        )
 
     def _get_clone_object(self, clone_dests, template_obj):
         # get the default datacenter
@@ -345,7 +776,15 @@ class Operations(object):
 
         folder_name = clone_dests["vm_folder"]
         if folder_name:
-            dest_folder_obj = self.objs.get_folder(folder_name)
+            dest_folder_obj = self.objs.get_folder(
+                folder_name, _exit=not clone_dests["create_folder"]
+            )
+            if dest_folder_obj is None:
+                self.logger.info(
+                    f"VM folder: {folder_name} not found. So creating new VM folder"
+                )
+                dest_folder_obj = dest_datacenter_obj.vmFolder.CreateFolder(folder_name)
+                self._mark_toolkit_created(dest_folder_obj)
         else:
             dest_folder_obj = dest_datacenter_obj.vmFolder
             self.logger.info(
@@ -447,16 +886,23 @@ class Operations(object):
             memory=memory,
         )
 
-    def _get_clone_task(self, vm_cfg):
+    def _get_clone_task(self, vm_cfg, annotation=None, power_on=True):
         """
-        clone VM and get task
+        clone VM and get task. If a pool is specified, an available member
+        of the pool is claimed (renamed) instead of cloning a new VM.
 
         Args:
             vm_cfg (dict): a dict contains vm clone info
+            annotation (str): annotation (notes) of the cloned VM
+            power_on (bool): whether to power on a linked clone after cloning
 
         Returns:
             Task
         """
+        if Check().check_kv(vm_cfg, "pool"):
+            task = self._claim_pool_member(vm_cfg, power_on=power_on)
+            if task:
+                return task
         template_obj = self.objs.get_vm(vm_cfg["template"])
         if template_obj:
             dest_vm_name = vm_cfg["vm"]
@@ -465,6 +911,7 @@ class Operations(object):
             for clone_dest in [
                 "datacenter",
                 "vm_folder",
+                "create_folder",
                 "cluster",
                 "resource_pool",
                 "host",
@@ -480,13 +927,19 @@ class Operations(object):
             clone_objs = self._get_clone_object(clone_dests, template_obj)
             # linked clone
             if Check().check_kv(vm_cfg, "linked"):
-                task = ConfigVM(template_obj).linked_clone(
+                source_obj, snapshot_obj = self._get_linked_clone_source(
+                    template_obj, vm_cfg
+                )
+                task = ConfigVM(source_obj).linked_clone(
                     dest_vm=dest_vm_name,
                     host_obj=clone_objs.dest_host_obj,
                     folder_obj=clone_objs.dest_folder_obj,
                     resource_pool_obj=clone_objs.dest_resource_pool_obj,
                     cpu=clone_objs.cpu,
                     mem=clone_objs.memory,
+                    power_on=power_on,
+                    snapshot_obj=snapshot_obj,
+                    annotation=annotation,
                 )
 
             # full clone
@@ -499,6 +952,7 @@ class Operations(object):
                     resource_pool_obj=clone_objs.dest_resource_pool_obj,
                     cpu=clone_objs.cpu,
                     mem=clone_objs.memory,
+                    annotation=annotation,
                 )
             return task
         else:
@@ -509,6 +963,350 @@ class Operations(object):
 
     # ~~~~~~~~~~~~~~~~~~~~ CLONE END~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 
+    # ~~~~~~~~~~~~~~~~~~~~~~~~ POOL ~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+    # keys that require the claimed pool member to be powered off
+    # for further reconfiguration in cluster creation
+    POOL_HARDWARE_KEYS = [
+        "cores_per_socket",
+        "cpu_reservation",
+        "memory_reservation",
+        "port_group",
+        "latency",
+        "device",
+        "vgpu",
+        "sriov_port_group",
+        "pvrdma_port_group",
+        "secure_boot",
+    ]
+
+    def pool_cli(self):
+        """
+        fill, list or drain a warm pool of pre-provisioned VMs
+
+        Returns:
+            None
+        """
+        pool_name = self.cfg["name"]
+        if self.cfg["fill"]:
+            Check().check_kv(self.cfg, "template", required=True)
+            Check().check_kv(self.cfg, "size", required=True)
+            self._fill_pool(self.cfg)
+        elif self.cfg["list"]:
+            self._print_pool(pool_name)
+        elif self.cfg["drain"]:
+            vms = [vm_obj.name for vm_obj in self._get_pool_members(pool_name)]
+            if not vms:
+                self.logger.info("Pool {0} is empty".format(pool_name))
+                return
+            confirm = input(
+                "[ACTION] Do you really want to destroy pool members {0} ? ".format(vms)
+            )
+            try:
+                if strtobool(confirm) == 1:
+                    self._destroy_vms(vms, task_name="Drain pool")
+                else:
+                    self.logger.info("Not draining pool {0}".format(pool_name))
+            except ValueError:
+                self.logger.info("Not a valid answer")
+
+    @staticmethod
+    def _pool_annotation(pool_name, template_name, linked):
+        return "vhpc_toolkit pool={0} template={1} clone={2}".format(
+            pool_name, template_name, "linked" if linked else "full"
+        )
+
+    @staticmethod
+    def _parse_pool_annotation(annotation):
+        """
+        parse the annotation of a pool member
+
+        Args:
+            annotation (str): the annotation of a VM
+
+        Returns:
+            dict: the pool, template and clone type of the pool member,
+                  or None if the VM is not a pool member
+        """
+        match = re.match(
+            r"^vhpc_toolkit pool=(\S+) template=(\S+) clone=(linked|full)$",
+            annotation,
+        )
+        if match:
+            return {
+                "pool": match.group(1),
+                "template": match.group(2),
+                "linked": match.group(3) == "linked",
+            }
+        return None
+
+    def _get_pool_members(self, pool_name):
+        """
+        get the unclaimed members of a pool
+
+        Args:
+            pool_name (str): the name of the pool
+
+        Returns:
+            list: a list of vim.VirtualMachine
+        """
+        properties = self.objs.collect_properties(
+            {vim.VirtualMachine: ["name", "config.annotation"]}
+        )
+        members = []
+        for vm_obj, props in properties.items():
+            if "config.annotation" not in props:
+                continue
+            member = self._parse_pool_annotation(props["config.annotation"])
+            if member and member["pool"] == pool_name:
+                members.append(vm_obj)
+        return sorted(members, key=lambda vm_obj: properties[vm_obj]["name"])
+
+    def _fill_pool(self, pool_cfg):
+        """
+        clone VMs into a pool until it reaches its size. Pool members are
+        left powered off, or booted and suspended if suspend is specified.
+
+        Args:
+            pool_cfg (dict): a dict contains pool name, size, template
+                             and clone destination info
+
+        Returns:
+            None
+        """
+        pool_name = pool_cfg["name"]
+        members = self._get_pool_members(pool_name)
+        num_missing = pool_cfg["size"] - len(members)
+        if num_missing <= 0:
+            self.logger.info(
+                "Pool {0} already has {1} members".format(pool_name, len(members))
+            )
+            return
+        member_names = [vm_obj.name for vm_obj in members]
+        annotation = self._pool_annotation(
+            pool_name, pool_cfg["template"], Check().check_kv(pool_cfg, "linked")
+        )
+        vm_cfgs = []
+        for index in itertools.count(1):
+            if len(vm_cfgs) == num_missing:
+                break
+            vm_name = "{0}-pool-{1}".format(pool_name, index)
+            if vm_name in member_names or self.objs.get_obj(
+                [vim.VirtualMachine], vm_name
+            ):
+                continue
+            vm_cfg = dict(pool_cfg)
+            vm_cfg["vm"] = vm_name
+            vm_cfgs.append(vm_cfg)
+        self._warm_up_shadows(vm_cfgs)
+        tasks = [
+            self._get_clone_task(vm_cfg, annotation=annotation, power_on=False)
+            for vm_cfg in vm_cfgs
+        ]
+        GetWait().wait_for_tasks(tasks, task_name="Fill pool")
+        if Check().check_kv(pool_cfg, "suspend"):
+            vm_objs = [self.objs.get_vm(vm_cfg["vm"]) for vm_cfg in vm_cfgs]
+            tasks = [ConfigVM(vm_obj).power_on() for vm_obj in vm_objs]
+            GetWait().wait_for_tasks(tasks, task_name="Power on pool members")
+            for vm_obj in vm_objs:
+                VMGetWait(vm_obj).wait_for_vmtools()
+            tasks = [ConfigVM(vm_obj).suspend() for vm_obj in vm_objs]
+            GetWait().wait_for_tasks(tasks, task_name="Suspend pool members")
+
+    def _print_pool(self, pool_name):
+        """
+        print the members of a pool
+
+        Args:
+            pool_name (str): the name of the pool
+
+        Returns:
+            None
+        """
+        members = self._get_pool_members(pool_name)
+        if not members:
+            self.logger.info("Pool {0} is empty".format(pool_name))
+            return
+        table = Texttable()
+        table_rows = [
+            [
+                "VM",
+                "Template",
+                "Clone",
+                "Power",
+                "Host",
+                "Datastore",
+                "CPU",
+                "Memory(GB)",
+            ]
+        ]
+        for vm_obj in members:
+            vm = GetVM(vm_obj)
+            member = self._parse_pool_annotation(vm.annotation())
+            table_rows.append(
+                [
+                    vm_obj.name,
+                    member["template"],
+                    "linked" if member["linked"] else "full",
+                    vm_obj.runtime.powerState,
+                    vm_obj.runtime.host.name,
+                    vm.datastore(),
+                    vm.cpu(),
+                    vm.memory_in_gb(),
+                ]
+            )
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
+
+    def _claim_pool_member(self, vm_cfg, power_on=True):
+        """
+        claim a member of a pool by renaming it, with CPU/memory
+        reconfiguration only if they differ from the requested ones.
+        The claimed member is refilled after all clone tasks are done, and
+        powered on (or resumed) as a linked clone would be.
+
+        Args:
+            vm_cfg (dict): a dict contains vm clone info and the pool name
+            power_on (bool): whether to power on a linked clone after cloning
+
+        Returns:
+            Task: the claim Task, or None if no pool member is available
+        """
+        pool_name = vm_cfg["pool"]
+        if pool_name not in self.pool_members:
+            self.pool_members[pool_name] = self._get_pool_members(pool_name)
+        cpu = vm_cfg["cpu"] if Check().check_kv(vm_cfg, "cpu") else None
+        mem = (
+            int(float(vm_cfg["memory"]) * 1024)
+            if Check().check_kv(vm_cfg, "memory")
+            else None
+        )
+        needs_power_off = any(
+            Check().check_kv(vm_cfg, key) for key in self.POOL_HARDWARE_KEYS
+        )
+        candidates = []
+        for vm_obj in self.pool_members[pool_name]:
+            vm = GetVM(vm_obj)
+            member = self._parse_pool_annotation(vm.annotation())
+            if Check().check_kv(vm_cfg, "template") and (
+                member["template"] != vm_cfg["template"]
+            ):
+                continue
+            if Check().check_kv(vm_cfg, "host") and (
+                vm_obj.runtime.host.name != vm_cfg["host"]
+            ):
+                continue
+            if Check().check_kv(vm_cfg, "datastore") and (
+                vm_cfg["datastore"] not in [ds.name for ds in vm_obj.datastore]
+            ):
+                continue
+            needs_reconfig = (cpu and cpu != vm.cpu()) or (mem and mem != vm.memory())
+            if vm.is_suspended() and (needs_reconfig or needs_power_off):
+                continue
+            candidates.append((bool(needs_reconfig), vm_obj, member))
+        if not candidates:
+            self.logger.info(
+                "No available member in pool {0} for VM {1}. "
+                "Cloning it instead.".format(pool_name, vm_cfg["vm"])
+            )
+            return None
+        # prefer members which need no reconfiguration
+        needs_reconfig, vm_obj, member = sorted(candidates, key=lambda c: c[0])[0]
+        self.pool_members[pool_name].remove(vm_obj)
+        self.pool_refills.append(
+            {
+                "vm": vm_obj.name,
+                "pool": pool_name,
+                "template": member["template"],
+                "linked": member["linked"],
+                "base_snapshot": vm_cfg.get("base_snapshot"),
+                "host_obj": vm_obj.runtime.host,
+                "datastore_obj": GetVM(vm_obj).datastore_obj(),
+                "folder_obj": vm_obj.parent,
+                "resource_pool_obj": vm_obj.resourcePool,
+                "cpu": GetVM(vm_obj).cpu(),
+                "memory": GetVM(vm_obj).memory(),
+            }
+        )
+        self.logger.info(
+            "Claiming pool member {0} as VM {1}".format(vm_obj.name, vm_cfg["vm"])
+        )
+        if power_on and Check().check_kv(vm_cfg, "linked"):
+            self.pool_power_ons.append(vm_obj)
+        if needs_reconfig:
+            return ConfigVM(vm_obj).rename(
+                vm_cfg["vm"], cpu=cpu, mem=mem, annotation=""
+            )
+        return ConfigVM(vm_obj).rename(vm_cfg["vm"], annotation="")
+
+    def _power_on_claimed(self):
+        """
+        power on (or resume) the claimed pool members of linked clones,
+        as a linked clone is powered on after cloning
+
+        Returns:
+            None
+        """
+        tasks = [
+            ConfigVM(vm_obj).power_on()
+            for vm_obj in self.pool_power_ons
+            if vm_obj.runtime.powerState != vim.VirtualMachinePowerState.poweredOn
+        ]
+        self.pool_power_ons = []
+        if tasks:
+            GetWait().wait_for_tasks(tasks, task_name="Power on claimed pool members")
+
+    def _refill_pools(self):
+        """
+        replace the claimed pool members with new clones at the same place.
+        The clone tasks are not waited for, so the pools are refilled
+        in the background.
+
+        Returns:
+            None
+        """
+        for refill in self.pool_refills:
+            template_obj = self.objs.get_vm(refill["template"], _exit=False)
+            if template_obj is None:
+                continue
+            annotation = self._pool_annotation(
+                refill["pool"], refill["template"], refill["linked"]
+            )
+            if refill["linked"]:
+                _, snapshot_obj = self._get_base_snapshot(
+                    template_obj, base_name=refill["base_snapshot"]
+                )
+                task = ConfigVM(template_obj).linked_clone(
+                    dest_vm=refill["vm"],
+                    host_obj=refill["host_obj"],
+                    folder_obj=refill["folder_obj"],
+                    resource_pool_obj=refill["resource_pool_obj"],
+                    cpu=refill["cpu"],
+                    mem=refill["memory"],
+                    power_on=False,
+                    snapshot_obj=snapshot_obj,
+                    annotation=annotation,
+                )
+            else:
+                task = ConfigVM(template_obj).full_clone(
+                    dest_vm_name=refill["vm"],
+                    host_obj=refill["host_obj"],
+                    datastore_obj=refill["datastore_obj"],
+                    vm_folder_obj=refill["folder_obj"],
+                    resource_pool_obj=refill["resource_pool_obj"],
+                    cpu=refill["cpu"],
+                    mem=refill["memory"],
+                    annotation=annotation,
+                )
+            self.logger.info(
+                "Refilling pool {0} with {1} in the background ({2})".format(
+                    refill["pool"], refill["vm"], task.info.key
+                )
+            )
+        self.pool_refills = []
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~ POOL END ~~~~~~~~~~~~~~~~~~~~~~~~#
+
     # ~~~~~~~~~~~~~~~~~~~~~~~~ DESTROY ~~~~~~~~~~~~~~~~~~~~~~~~~#
     def destroy_cli(self):
         """
@@ -526,9 +1324,7 @@ class Operations(object):
                     "[ACTION] Do you really want to destroy {0} ? ".format(vms)
                 )
                 if strtobool(confirm) == 1:
-                    tasks = self._get_destroy_tasks(vms)
-                    if tasks:
-                        GetWait().wait_for_tasks(tasks, task_name="Destroy VM")
+                    self._destroy_vms(vms)
                 elif strtobool(confirm) == 0:
                     self.logger.info("Not destroying any VMs")
             except ValueError:
@@ -536,55 +1332,232 @@ class Operations(object):
         else:
             self.logger.warning("No VMs specified to destroy")
 
-    def _get_destroy_tasks(self, vms):
+    def _destroy_vms(self, vms, task_name="Destroy VM"):
         """
-        destroy VM and get task
+        destroy VMs
 
         Args:
             vms (list): a list of vm names for destroy
+            task_name (str): the task name of the destroy tasks
 
         Returns:
-            list: a list of destroy Tasks
+            None
         """
         vm_objs = []
-        power_tasks = []
-
-        # Check whether VMs are powered off
         for vm in vms:
             vm_obj = self.objs.get_vm(vm, _exit=False)
             if vm_obj is not None:
                 vm_objs.append(vm_obj)
-                if vm_obj.runtime.powerState == vim.VirtualMachinePowerState.poweredOn:
-                    power_tasks.append(ConfigVM(vm_obj).power_off())
-        if power_tasks:
-            GetWait().wait_for_tasks(
-                power_tasks, task_name="Power off VMs before destroying"
-            )
-        
-        # Destroy VMs
-        destroy_tasks = [ConfigVM(vm_obj).destroy() for vm_obj in vm_objs]
+        self._destroy_vm_objs(vm_objs, task_name=task_name)
 
-        return destroy_tasks
+    def _destroy_vm_objs(self, vm_objs, task_name="Destroy VM", destroy=True):
+        """
+        destroy VMs as a pipeline: each VM is destroyed as soon as it is
+        powered off, without waiting for the other VMs
+
+        Args:
+            vm_objs (list): a list of vim.VirtualMachine to destroy
+            task_name (str): the task name of the destroy tasks
+            destroy (bool): if False, only power off the VMs
+
+        Returns:
+            None
+        """
+        if self.cfg.get("shutdown"):
+            powered_on = [vm_obj for vm_obj in vm_objs if GetVM(vm_obj).is_power_on()]
+            if powered_on:
+                # stragglers are powered off in the pipeline below
+                self._shutdown_guests(powered_on)
+        chains = []
+        for vm_obj in vm_objs:
+            chain = []
+            if GetVM(vm_obj).is_power_on():
+                chain.append(ConfigVM(vm_obj).power_off)
+            if destroy:
+                chain.append(ConfigVM(vm_obj).destroy)
+            chains.append(chain)
+        if chains:
+            GetWait().wait_for_task_chains(chains, task_name=task_name)
 
     # ~~~~~~~~~~~~~~~~~~~~~~~ DESTROY END ~~~~~~~~~~~~~~~~~~~#
 
     #~~~~~~~~~~~~~~~~~~~~~ MIGRATE ~~~~~~~~~~~~~~~~~~~~~~~~~~#
 
     def migrate_vm_cli(self):
-        tasks = []
-        for vm_cfg in self._extract_file(self.cfg):
-            vm_obj = self.objs.get_vm(vm_cfg["vm"])
-            host_obj = self.objs.get_host(self.cfg["destination"])
+        """
+        Migrate VMs to a set of destination hosts. VMs are balanced across
+        the destination hosts by free memory and CPU, largest memory first,
+        and the migrations are scheduled within the per-host and
+        per-vMotion-network concurrency limits.
+
+        Returns:
+            None
+        """
+        vm_objs = [
+            self.objs.get_vm(vm_cfg["vm"]) for vm_cfg in self._extract_file(self.cfg)
+        ]
+        host_objs = [self.objs.get_host(host) for host in self.cfg["destination"]]
+        migrations = self._place_migrations(vm_objs, host_objs)
+        if migrations:
+            self._schedule_migrations(
+                migrations,
+                max_per_host=self.cfg.get("max_per_host", 4),
+                max_per_network=self.cfg.get("max_per_network", 8),
+            )
+
+    def _place_migrations(self, vm_objs, host_objs):
+        """
+        Place VMs onto destination hosts, largest memory footprint first,
+        each onto the host with the most free memory (then free CPU)
+
+        Args:
+            vm_objs (list): a list of vim.VirtualMachine to migrate
+            host_objs (list): a list of destination vim.HostSystem
+
+        Returns:
+            list: a list of (vim.VirtualMachine, vim.HostSystem) in the order
+                  of memory footprint
+        """
+        free = {
+            host_obj: [
+                GetHost(host_obj).free_memory_mb(),
+                GetHost(host_obj).free_cpu_mhz(),
+            ]
+            for host_obj in host_objs
+        }
+        # the VMs on a destination host are placed again, so their
+        # resources are not counted as used until they are placed
+        for vm_obj in vm_objs:
+            if vm_obj.runtime.host in free:
+                free[vm_obj.runtime.host][0] += GetVM(vm_obj).memory()
+                free[vm_obj.runtime.host][1] += (
+                    vm_obj.summary.quickStats.overallCpuUsage or 0
+                )
+        migrations = []
+        for vm_obj in sorted(
+            vm_objs, key=lambda vm_obj: GetVM(vm_obj).memory(), reverse=True
+        ):
+            memory = GetVM(vm_obj).memory()
+            cpu = vm_obj.summary.quickStats.overallCpuUsage or 0
+            host_obj = max(host_objs, key=lambda host_obj: tuple(free[host_obj]))
+            free[host_obj][0] -= memory
+            free[host_obj][1] -= cpu
+            if vm_obj.runtime.host == host_obj:
+                self.logger.info(
+                    "VM {0} is already on host {1}".format(vm_obj.name, host_obj.name)
+                )
+                continue
+            if free[host_obj][0] < 0:
+                self.logger.warning(
+                    "Host {0} may not have enough free memory for VM {1}".format(
+                        host_obj.name, vm_obj.name
+                    )
+                )
             self.logger.info(
-                f"Migrating VM {vm_cfg['vm']} to host {self.cfg['destination']}"
+                "VM {0} ({1} MB) will be migrated to host {2}".format(
+                    vm_obj.name, memory, host_obj.name
+                )
             )
-            if GetVM(vm_obj).is_power_on():
+            migrations.append((vm_obj, host_obj))
+        return migrations
+
+    def _schedule_migrations(self, migrations, max_per_host, max_per_network):
+        """
+        Run migrations in order, starting a migration only if neither its
+        source host nor its destination host runs max_per_host migrations,
+        and none of their vMotion networks carries max_per_network
+        migrations. The achieved migration rate is reported at the end.
+
+        Args:
+            migrations (list): a list of (vim.VirtualMachine, vim.HostSystem)
+            max_per_host (int): max concurrent migrations per host
+            max_per_network (int): max concurrent migrations per vMotion network
+
+        Returns:
+            None
+        """
+        networks = {}
+        for vm_obj, host_obj in migrations:
+            for host in [vm_obj.runtime.host, host_obj]:
+                if host not in networks:
+                    networks[host] = GetHost(host).vmotion_networks()
+        pending = list(migrations)
+        running = []
+        host_load = {}
+        network_load = {}
+        succeeded = []
+        failed = []
+        start = time.time()
+        while pending or running:
+            # start as many pending migrations as the limits allow
+            for vm_obj, host_obj in list(pending):
+                source = vm_obj.runtime.host
+                if source == host_obj:
+                    # moved meanwhile, e.g. by DRS
+                    self.logger.info(
+                        "VM {0} is already on host {1}. Skipping.".format(
+                            vm_obj.name, host_obj.name
+                        )
+                    )
+                    pending.remove((vm_obj, host_obj))
+                    continue
+                if source not in networks:
+                    self.logger.info(
+                        "VM {0} has moved to host {1}".format(vm_obj.name, source.name)
+                    )
+                    networks[source] = GetHost(source).vmotion_networks()
+                hosts = [source, host_obj]
+                nets = set(networks[source] + networks[host_obj])
+                if any(host_load.get(host, 0) >= max_per_host for host in hosts) or any(
+                    network_load.get(net, 0) >= max_per_network for net in nets
+                ):
+                    continue
                 self.logger.info(
-                    f"VM {vm_cfg['vm']} is powered on. So migration task might take some time"
+                    "Migrating VM {0} from host {1} to host {2}".format(
+                        vm_obj.name, source.name, host_obj.name
+                    )
                 )
-            tasks.append(ConfigVM(vm_obj).migrate_vm(host_obj))
-
-        GetWait().wait_for_tasks(tasks, task_name="Migrate VM(s)")
+                task = ConfigVM(vm_obj).migrate_vm(host_obj)
+                for host in hosts:
+                    host_load[host] = host_load.get(host, 0) + 1
+                for net in nets:
+                    network_load[net] = network_load.get(net, 0) + 1
+                running.append((task, vm_obj, hosts, nets))
+                pending.remove((vm_obj, host_obj))
+            time.sleep(1)
+            still_running = []
+            for task, vm_obj, hosts, nets in running:
+                state = task.info.state
+                if state in (vim.TaskInfo.State.success, vim.TaskInfo.State.error):
+                    for host in hosts:
+                        host_load[host] -= 1
+                    for net in nets:
+                        network_load[net] -= 1
+                    if state == vim.TaskInfo.State.success:
+                        self.logger.info("VM {0} is migrated".format(vm_obj.name))
+                        succeeded.append(vm_obj)
+                    else:
+                        self.logger.error(
+                            "Failed to migrate VM {0} - {1}".format(
+                                vm_obj.name, task.info.error.msg
+                            )
+                        )
+                        failed.append(vm_obj)
+                else:
+                    still_running.append((task, vm_obj, hosts, nets))
+            running = still_running
+        elapsed = time.time() - start
+        memory_gb = sum(GetVM(vm_obj).memory() for vm_obj in succeeded) / 1024.0
+        self.logger.info(
+            "Migrated {0} VMs ({1} failed) in {2:.1f} seconds: "
+            "{3:.2f} migrations/s, {4:.2f} GB/s of VM memory".format(
+                len(succeeded),
+                len(failed),
+                elapsed,
+                len(succeeded) / elapsed,
+                memory_gb / elapsed,
+            )
+        )
 
     #~~~~~~~~~~~~~~~~~~~~~ MIGRATE END ~~~~~~~~~~~~~~~~~~~~~#
 
@@ -603,6 +1576,9 @@ class Operations(object):
             self.cfg["guest_password"] = getpass.getpass(
                 "[ACTION] Please enter password for Guest OS(s): "
             )
+        if not self.cfg.get("script") and not self.cfg.get("bundle"):
+            self.logger.error("Either --script or --bundle is required")
+            raise SystemExit
         tasks = []
         vm_cfgs = self._extract_file(self.cfg)
         for vm_cfg in vm_cfgs:
@@ -616,23 +1592,108 @@ class Operations(object):
                 )
                 tasks.append(ConfigVM(vm_obj).power_on())
         GetWait().wait_for_tasks(tasks, task_name="Power on VM")
-        procs = []
+        specs = []
         for vm_cfg in vm_cfgs:
             Check().check_kv(vm_cfg, "guest_username", required=True)
             Check().check_kv(vm_cfg, "guest_password", required=True)
-            procs.extend(
-                self._get_post_procs(
+            specs.append(
+                (
                     vm_cfg["guest_username"],
                     vm_cfg["guest_password"],
                     vm_cfg["vm"],
                     vm_cfg["script"],
+                    vm_cfg.get("payload"),
                 )
             )
+        bundle = None
+        if self.cfg.get("bundle"):
+            bundle = Bundle(self.cfg["bundle"], self.cfg.get("script"))
+        try:
+            distributed = set()
+            if Check().check_kv(self.cfg, "head"):
+                distributed = self._fan_out_posts(specs, bundle)
+            procs = self._get_posts_procs(specs, bundle=bundle, distributed=distributed)
+        finally:
+            if bundle is not None:
+                bundle.cleanup()
         if Check().check_kv(self.cfg, "wait"):
-            proc_mng = self.content.guestOperationsManager.processManager
-            GetWait().wait_for_procs(proc_mng, procs)
+            self._wait_for_post_procs(procs)
+
+    def _wait_for_post_procs(self, procs):
+        """
+        wait for the post processes to finish, while their logs are fetched
+        into <log_dir>/<run id>/<VM>/<script>.log
+
+        Args:
+            procs (list): a list of GuestProc
+
+        Returns:
+            None
+        """
+        collector = GuestLogCollector(
+            self.content.guestOperationsManager,
+            os.path.join(self.cfg.get("log_dir", "vhpc_logs"), self.run_id),
+            parallel=self.cfg.get("upload_parallel", 32),
+        )
+        try:
+            GetWait().wait_for_procs(
+                self.content.guestOperationsManager.processManager,
+                procs,
+                on_progress=collector.fetch,
+            )
+        finally:
+            collector.close()
+
+    def _get_posts_procs(self, specs, bundle=None, distributed=()):
+        """
+        Execute the post script(s) in many VMs concurrently (--upload_parallel
+        VMs at a time) and return processes to track. The scripts of one VM
+        are uploaded and launched in order. The uploads share keep-alive
+        sessions per ESXi host.
+
+        Args:
+            specs (list): a list of tuples (username, password, vm, scripts)
+                          or (username, password, vm, scripts, payloads)
+            bundle (Bundle): the bundle to run instead of the scripts
+            distributed (set): the names of the VMs which already got the
+                               files from the head VM
 
-    def _get_post_procs(self, username, password, vm, scripts):
+        Returns:
+            a list of tuples, each element in tuple has post execution info
+        """
+        if not specs:
+            return []
+        parallel = self.cfg.get("upload_parallel", 32)
+        with SessionPool(pool_size=parallel) as sessions:
+            outcomes = Executor(parallel=parallel).run(
+                specs,
+                lambda spec: self._get_post_procs(
+                    *spec,
+                    sessions=sessions,
+                    bundle=bundle,
+                    distributed=spec[2] in distributed,
+                ),
+                name=lambda spec: spec[2],
+            )
+        failed = [outcome.item for outcome in outcomes if outcome.status != "ok"]
+        if failed:
+            self.logger.error(
+                "Couldn't execute post script(s) in VM(s) {0}".format(failed)
+            )
+            raise SystemExit
+        return [proc for outcome in outcomes for proc in outcome.result]
+
+    def _get_post_procs(
+        self,
+        username,
+        password,
+        vm,
+        scripts,
+        payloads=None,
+        sessions=None,
+        bundle=None,
+        distributed=False,
+    ):
         """
         Execute the post script(s) in a VM and return process to track
 
@@ -641,6 +1702,14 @@ class Operations(object):
             password (str): the password for the VM guest OS
             vm (str): the VM name for post execution
             scripts (list): a list of scripts with full path for post execution
+            payloads (list): local files to upload before the scripts run
+            sessions (SessionPool): keep-alive sessions per host to upload
+                                    the scripts through
+            bundle (Bundle): the bundle to upload once, unpack and run
+                             instead of the scripts
+            distributed (bool): whether the scripts, payloads or bundle are
+                                already distributed to the VM from the head
+                                VM, so only have to be launched
 
         Returns:
             a list of tuples, each element in tuple has post execution info
@@ -652,20 +1721,736 @@ class Operations(object):
         proc_mng = self.content.guestOperationsManager.processManager
         guest_operations_manager = self.content.guestOperationsManager
         if vm_status.wait_for_vmtools():
-            for script in scripts:
+            host_obj = self.objs.get_host_by_vm(vm_obj)
+            # unchanged files are skipped per the manifest in the guest.
+            # Forced uploads start a new manifest, so no entry goes stale.
+            if distributed:
+                manifest = None
+            elif self.cfg.get("force_upload"):
+                manifest = UploadManifest()
+            else:
+                manifest = vm_update.load_upload_manifest(
+                    guest_operations_manager, host_obj, username, password, sessions
+                )
+            if payloads and not distributed:
+                vm_update.upload_payloads(
+                    guest_operations_manager,
+                    host_obj,
+                    payloads,
+                    username,
+                    password,
+                    sessions=sessions,
+                    manifest=manifest,
+                )
+            if bundle is not None:
                 proc = vm_update.execute_script(
                     proc_mng,
                     guest_operations_manager,
-                    self.objs.get_host_by_vm(vm_obj),
-                    script,
+                    host_obj,
+                    bundle.archive,
                     username,
                     password,
+                    sessions=sessions,
+                    manifest=manifest,
+                    command=bundle.command(),
+                    log_path="vhpc_toolkit_logs/{0}/vhpc_bundle_{1}.log".format(
+                        self.run_id, bundle.name
+                    ),
+                    upload=not distributed,
                 )
                 procs.append(proc)
+            else:
+                for script in scripts:
+                    proc = vm_update.execute_script(
+                        proc_mng,
+                        guest_operations_manager,
+                        host_obj,
+                        script,
+                        username,
+                        password,
+                        sessions=sessions,
+                        manifest=manifest,
+                        log_path="vhpc_toolkit_logs/{0}/{1}.log".format(
+                            self.run_id, os.path.basename(script)
+                        ),
+                        upload=not distributed,
+                    )
+                    procs.append(proc)
+            if manifest is not None:
+                vm_update.save_upload_manifest(
+                    guest_operations_manager,
+                    host_obj,
+                    manifest,
+                    username,
+                    password,
+                    sessions,
+                )
         return procs
 
+    def _fan_out_posts(self, specs, bundle):
+        """
+        Distribute the post scripts and payloads (or the bundle) of the VMs
+        from the head VM (--head) once, and wait for it
+
+        Args:
+            specs (list): a list of tuples (username, password, vm, scripts)
+                          or (username, password, vm, scripts, payloads)
+            bundle (Bundle): the bundle to distribute instead of the scripts
+
+        Returns:
+            set: the names of the VMs which got the files
+        """
+        with SessionPool(pool_size=self.cfg.get("upload_parallel", 32)) as sessions:
+            fan_out = self._start_fan_out(specs, bundle, sessions)
+            if fan_out is None:
+                return set()
+            try:
+                self._wait_for_post_procs([fan_out.proc])
+            except SystemExit:
+                pass
+            return self._finish_fan_out(fan_out, specs, sessions)
+
+    def _head_credentials(self, specs):
+        """the guest credentials of the head VM: the ones of its own post
+        config, or else of the first VM"""
+
+        head_specs = [spec for spec in specs if spec[2] == self.cfg["head"]]
+        return (head_specs or specs)[0][:2]
+
+    def _start_fan_out(self, specs, bundle, sessions=None):
+        """
+        Upload the post scripts and payloads (or the bundle) of the VMs
+        once to the head VM (--head), and launch their distribution to the
+        other VMs over the guest network in a tree (--fanout children per
+        VM), into the home folder of the guest user of each VM. The head VM
+        itself and the VMs without an IP address are left to direct
+        uploads.
+
+        Args:
+            specs (list): a list of tuples (username, password, vm, scripts)
+                          or (username, password, vm, scripts, payloads)
+            bundle (Bundle): the bundle to distribute instead of the scripts
+            sessions (SessionPool): keep-alive sessions per host
+
+        Returns:
+            FanOut: the distribution, with its process in the head VM, or
+                    None if there is no VM to distribute the files to
+        """
+        head = self.cfg["head"]
+        head_obj = self.objs.get_vm(head)
+        others = [spec for spec in specs if spec[2] != head]
+        if not others:
+            return None
+        properties = self.objs.collect_properties(
+            {vim.VirtualMachine: ["name", "guest.ipAddress"]}
+        )
+        ips = {
+            props["name"]: props["guest.ipAddress"]
+            for props in properties.values()
+            if props.get("guest.ipAddress")
+        }
+        targets = {
+            "{0}@{1}".format(spec[0], ips[spec[2]]): spec[2]
+            for spec in others
+            if spec[2] in ips
+        }
+        no_ip = sorted({spec[2] for spec in others if spec[2] not in ips})
+        if no_ip:
+            self.logger.info(
+                "VM(s) {0} have no IP address. Uploading to them "
+                "directly.".format(no_ip)
+            )
+        if not targets:
+            return None
+        if bundle is not None:
+            files = [bundle.archive]
+        else:
+            files = []
+            for spec in others:
+                payloads = spec[4] if len(spec) > 4 and spec[4] else []
+                for file in list(spec[3]) + list(payloads):
+                    if file not in files:
+                        files.append(file)
+        username, password = self._head_credentials(specs)
+        fan_out = FanOut(files, targets, fanout=self.cfg.get("fanout", 4))
+        try:
+            vm_update = ConfigVM(head_obj)
+            guest_operations_manager = self.content.guestOperationsManager
+            host_obj = self.objs.get_host_by_vm(head_obj)
+            if not VMGetWait(head_obj).wait_for_vmtools():
+                self.logger.error("VMware Tools isn't running in {0}".format(head))
+                raise SystemExit
+            if self.cfg.get("force_upload"):
+                manifest = UploadManifest()
+            else:
+                manifest = vm_update.load_upload_manifest(
+                    guest_operations_manager, host_obj, username, password, sessions
+                )
+            vm_update.upload_payloads(
+                guest_operations_manager,
+                host_obj,
+                files + [fan_out.file_list],
+                username,
+                password,
+                sessions=sessions,
+                manifest=manifest,
+            )
+            fan_out.proc = vm_update.execute_script(
+                guest_operations_manager.processManager,
+                guest_operations_manager,
+                host_obj,
+                fan_out.script,
+                username,
+                password,
+                sessions=sessions,
+                manifest=manifest,
+                command=fan_out.command(),
+                log_path="vhpc_toolkit_logs/{0}/{1}.log".format(
+                    self.run_id, FanOut.SCRIPT
+                ),
+            )
+            vm_update.save_upload_manifest(
+                guest_operations_manager,
+                host_obj,
+                manifest,
+                username,
+                password,
+                sessions,
+            )
+        finally:
+            fan_out.cleanup()
+        self.logger.info(
+            "Distributing {0} file(s) from {1} to {2} VM(s)".format(
+                len(files), head, len(targets)
+            )
+        )
+        return fan_out
+
+    def _finish_fan_out(self, fan_out, specs, sessions=None):
+        """
+        Get the VMs which got the files from the head VM, once its
+        distribution process has ended
+
+        Args:
+            fan_out (FanOut): the distribution
+            specs (list): the post configs the distribution was started for
+            sessions (SessionPool): keep-alive sessions per host
+
+        Returns:
+            set: the names of the VMs which got the files. The others are
+                 left to direct uploads.
+        """
+        head_obj = self.objs.get_vm(self.cfg["head"])
+        auth = vim.vm.guest.NamePasswordAuthentication()
+        auth.username, auth.password = self._head_credentials(specs)
+        try:
+            done = ConfigVM(head_obj).download_file(
+                self.content.guestOperationsManager,
+                self.objs.get_host_by_vm(head_obj),
+                auth,
+                f"/{auth.username}/{FanOut.DONE}",
+                sessions=sessions,
+            )
+        except (vmodl.MethodFault, OSError) as e:
+            self.logger.warning(
+                "Couldn't read {0} in {1}: {2}".format(FanOut.DONE, head_obj.name, e)
+            )
+            done = None
+        distributed = fan_out.distributed(done)
+        missed = sorted(set(fan_out.targets.values()) - distributed)
+        if missed:
+            self.logger.warning(
+                "Couldn't distribute the files to VM(s) {0} from {1}. "
+                "Uploading to them directly.".format(missed, head_obj.name)
+            )
+        return distributed
+
     # ~~~~~~~~~~~~~~~~~~~~ POST END ~~~~~~~~~~~~~~~~~~~~~~~#
 
+    # ~~~~~~~~~~~~~~~~~~~~~~~ EXEC ~~~~~~~~~~~~~~~~~~~~~~~~~~#
+    def exec_cli(self):
+        """
+        Run an inline command in the guest OS of VM(s) concurrently over
+        VMware Tools, and print the aggregated output and per-VM latency
+
+        Returns:
+            None
+        """
+        if not Check().check_kv(self.cfg, "guest_password"):
+            import getpass
+
+            self.cfg["guest_password"] = getpass.getpass(
+                "[ACTION] Please enter password for Guest OS(s): "
+            )
+        vm_objs = self._get_exec_vms()
+        if not vm_objs:
+            self.logger.error("No VM to run the command in")
+            raise SystemExit
+        parallel = self.cfg.get("parallel", 32)
+        with SessionPool(pool_size=parallel) as sessions:
+            outcomes = Executor(parallel=parallel).run(
+                vm_objs,
+                lambda vm_obj: self._exec_on_vm(vm_obj, sessions),
+                name=lambda vm_obj: vm_obj.name,
+            )
+        self._print_exec_outcomes(outcomes)
+
+    def _get_exec_vms(self):
+        """
+        get the VMs to run the command in, from --vm, --file or the powered
+        on VMs whose names match --pattern
+
+        Returns:
+            list: a list of VM objects
+        """
+        if Check().check_kv(self.cfg, "pattern"):
+            try:
+                pattern = re.compile(self.cfg["pattern"])
+            except re.error as e:
+                self.logger.error(
+                    "Invalid pattern {0}: {1}".format(self.cfg["pattern"], e)
+                )
+                raise SystemExit
+            properties = self.objs.collect_properties(
+                {vim.VirtualMachine: ["name", "runtime.powerState"]}
+            )
+            return sorted(
+                [
+                    vm_obj
+                    for vm_obj, props in properties.items()
+                    if pattern.search(props.get("name", ""))
+                    and props.get("runtime.powerState")
+                    == vim.VirtualMachinePowerState.poweredOn
+                ],
+                key=lambda vm_obj: properties[vm_obj]["name"],
+            )
+        if Check().check_kv(self.cfg, "file"):
+            vms = [vm_cfg["vm"] for vm_cfg in self._extract_file(self.cfg)]
+        else:
+            vms = self.cfg["vm"]
+        return [self.objs.get_vm(vm) for vm in vms]
+
+    def _exec_on_vm(self, vm_obj, sessions, cmd=None, timeout=None, stop=None):
+        """
+        run the command in the guest OS of a VM, with stdout and stderr
+        captured in files which are fetched and removed afterwards. The
+        command is bounded by timeout(1) in the guest, which kills the
+        processes the command has started too. timeout(1) replaces the
+        shell, so terminating the guest process reaches them as well.
+
+        Args:
+            vm_obj (vim.VirtualMachine): the VM to run the command in
+            sessions (SessionPool): keep-alive sessions per host
+            cmd (str): the command to run, default: --cmd
+            timeout (int): seconds before the command is terminated,
+                           default: --timeout
+            stop (threading.Event): once set, the command is terminated
+                           if it is still running 10 seconds later
+
+        Returns:
+            dict: exit code (None if timed out), stdout and stderr
+        """
+        username = self.cfg["guest_username"]
+        auth = vim.vm.guest.NamePasswordAuthentication(
+            username=username, password=self.cfg["guest_password"]
+        )
+        guest_operations_manager = self.content.guestOperationsManager
+        proc_mng = guest_operations_manager.processManager
+        file_mng = guest_operations_manager.fileManager
+        outputs = {
+            name: "vhpc_toolkit_exec/{0}-{1}.{2}".format(self.run_id, os.getpid(), name)
+            for name in ["stdout", "stderr"]
+        }
+        timeout = int(timeout or self.cfg.get("timeout", 60))
+        program_spec = vim.vm.guest.ProcessManager.ProgramSpec()
+        program_spec.programPath = "/bin/sh"
+        # TERM the command at the timeout, KILL it if still running 5s later
+        program_spec.arguments = "-c " + shlex.quote(
+            "mkdir -p vhpc_toolkit_exec && exec timeout -k 5 {0} sh -c {1} "
+            "> {2} 2> {3}".format(
+                timeout,
+                shlex.quote(cmd or self.cfg["cmd"]),
+                outputs["stdout"],
+                outputs["stderr"],
+            )
+        )
+        start = time.time()
+        pid = proc_mng.StartProgramInGuest(vm_obj, auth, program_spec)
+        # the guest timeout should end it first, this is a backstop
+        deadline = start + timeout + 15
+        proc_info = proc_mng.ListProcessesInGuest(vm_obj, auth, [pid])[0]
+        stopping = False
+        while not proc_info.endTime and time.time() < deadline:
+            if stop is not None and stop.is_set() and not stopping:
+                stopping = True
+                deadline = min(deadline, time.time() + 10)
+            time.sleep(0.5)
+            proc_info = proc_mng.ListProcessesInGuest(vm_obj, auth, [pid])[0]
+        exit_code = proc_info.exitCode
+        if not proc_info.endTime:
+            proc_mng.TerminateProcessInGuest(vm_obj, auth, pid)
+            exit_code = None
+        elif exit_code in (124, 137) and time.time() - start >= timeout:
+            # killed by timeout(1)
+            exit_code = None
+        result = {"exit_code": exit_code}
+        vm_update = ConfigVM(vm_obj)
+        host_obj = self.objs.get_host_by_vm(vm_obj)
+        for name, output in outputs.items():
+            guest_path = f"/{username}/{output}"
+            content = vm_update.download_file(
+                guest_operations_manager, host_obj, auth, guest_path, sessions
+            )
+            result[name] = (content or b"").decode(errors="replace")
+            try:
+                file_mng.DeleteFileInGuest(vm_obj, auth, guest_path)
+            except vim.fault.FileFault:
+                pass
+        return result
+
+    def _print_exec_outcomes(self, outcomes):
+        """
+        print the output of the command aggregated over the VMs with
+        identical output and exit code, then the exit code and latency per
+        VM (slowest first)
+
+        Args:
+            outcomes (list): a list of Outcome of _exec_on_vm
+
+        Returns:
+            None
+        """
+        groups = {}
+        for outcome in outcomes:
+            if outcome.result is None:
+                key = ("error", outcome.error or "", "")
+            else:
+                key = (
+                    outcome.result["exit_code"],
+                    outcome.result["stdout"],
+                    outcome.result["stderr"],
+                )
+            groups.setdefault(key, []).append(outcome.item)
+        wrapper = TextWrapper(width=100)
+        for (exit_code, stdout, stderr), vms in sorted(
+            groups.items(), key=lambda group: -len(group[1])
+        ):
+            print("-" * 60)
+            print(wrapper.fill(", ".join(sorted(vms))))
+            if exit_code == "error":
+                status = "failed: {0}".format(stdout)
+                stdout = ""
+            elif exit_code is None:
+                status = "timed out"
+            else:
+                status = "exit code {0}".format(exit_code)
+            print("({0} VM(s), {1})".format(len(vms), status))
+            print("-" * 60)
+            if stdout:
+                print(stdout.rstrip("\n"))
+            if stderr:
+                print("[stderr]")
+                print(stderr.rstrip("\n"))
+        table = Texttable()
+        table.set_cols_dtype(["t", "t", "t"])
+        table_rows = [["VM", "Exit Code", "Latency (s)"]]
+        for outcome in sorted(outcomes, key=lambda outcome: -outcome.duration):
+            if outcome.result is None:
+                exit_code = "failed"
+            elif outcome.result["exit_code"] is None:
+                exit_code = "timed out"
+            else:
+                exit_code = outcome.result["exit_code"]
+            table_rows.append(
+                [outcome.item, exit_code, "{0:.1f}".format(outcome.duration)]
+            )
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
+        succeeded = [
+            outcome
+            for outcome in outcomes
+            if outcome.result is not None and outcome.result["exit_code"] == 0
+        ]
+        print(
+            "{0} succeeded, {1} failed\n".format(
+                len(succeeded), len(outcomes) - len(succeeded)
+            )
+        )
+
+    # ~~~~~~~~~~~~~~~~~~~~ EXEC END ~~~~~~~~~~~~~~~~~~~~~~~#
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~ VALIDATE ~~~~~~~~~~~~~~~~~~~~~~~#
+    def validate_cli(self):
+        """
+        Validate the memory bandwidth of each VM and the RDMA bandwidth and
+        latency between each pair of VMs with in-guest microbenchmarks
+        (STREAM and perftest) run over VMware Tools, and flag the nodes and
+        links which fall outside tolerance
+
+        Returns:
+            None
+        """
+        if not Check().check_kv(self.cfg, "guest_password"):
+            import getpass
+
+            self.cfg["guest_password"] = getpass.getpass(
+                "[ACTION] Please enter password for Guest OS(s): "
+            )
+        vm_objs = self._get_exec_vms()
+        if not vm_objs:
+            self.logger.error("No VM to validate")
+            raise SystemExit
+        tests = self.cfg.get("test") or NODE_TESTS + PAIR_TESTS
+        if len(vm_objs) < 2 and any(test in PAIR_TESTS for test in tests):
+            self.logger.error(
+                "At least 2 VMs are required for the tests {0}".format(PAIR_TESTS)
+            )
+            raise SystemExit
+        parallel = self.cfg.get("parallel", 32)
+        with SessionPool(pool_size=parallel) as sessions:
+            node_results = {}
+            if any(test in NODE_TESTS for test in tests):
+                outcomes = Executor(parallel=parallel).run(
+                    vm_objs,
+                    lambda vm_obj: self._validate_node(vm_obj, tests, sessions),
+                    name=lambda vm_obj: vm_obj.name,
+                )
+                node_results = {
+                    outcome.item: outcome.result or {} for outcome in outcomes
+                }
+            pair_results = {}
+            rounds = []
+            if any(test in PAIR_TESTS for test in tests):
+                rounds = pair_rounds(vm_objs)
+            for pairs in rounds:
+                self.logger.info(
+                    "Running pair tests between {0}".format(
+                        ", ".join(
+                            "{0} -> {1}".format(client.name, server.name)
+                            for client, server in pairs
+                        )
+                    )
+                )
+                outcomes = Executor(parallel=parallel).run(
+                    pairs,
+                    lambda pair: self._validate_pair(*pair, tests, sessions),
+                    name=lambda pair: (pair[0].name, pair[1].name),
+                )
+                for outcome in outcomes:
+                    pair_results[outcome.item] = outcome.result or {}
+        problems = self._report_nodes(
+            [vm_obj.name for vm_obj in vm_objs], tests, node_results
+        )
+        problems += self._report_pairs(
+            [vm_obj.name for vm_obj in vm_objs], tests, pair_results
+        )
+        if problems:
+            self.logger.error("{0} check(s) are out of tolerance".format(problems))
+            raise SystemExit
+        self.logger.info("All checks are within tolerance")
+
+    def _validate_node(self, vm_obj, tests, sessions):
+        """
+        run the node tests in the guest OS of a VM
+
+        Args:
+            vm_obj (vim.VirtualMachine): the VM to test
+            tests (list): the tests to run
+            sessions (SessionPool): keep-alive sessions per host
+
+        Returns:
+            dict: test to the measured value (None if it can't be measured)
+        """
+        results = {}
+        timeout = self.cfg.get("timeout", 300)
+        if "stream" in tests:
+            result = self._exec_on_vm(
+                vm_obj, sessions, self.cfg.get("stream_cmd", "stream"), timeout
+            )
+            results["stream"] = parse_stream(result["stdout"])
+        if "mtu" in tests:
+            result = self._exec_on_vm(vm_obj, sessions, "ibv_devinfo", timeout)
+            results["mtu"] = parse_active_mtu(result["stdout"])
+        return results
+
+    def _validate_pair(self, client, server, tests, sessions):
+        """
+        run the pair tests (perftest RDMA write bandwidth and latency) from
+        a client VM to a server VM. The server is started first, the client
+        connects to the IP address of the server reported by VMware Tools.
+        Once the client is done, the server is given 10 seconds to finish,
+        so a server whose client never connected doesn't hold the perftest
+        port for the next rounds.
+
+        Args:
+            client (vim.VirtualMachine): the VM to run the perftest client
+            server (vim.VirtualMachine): the VM to run the perftest server
+            tests (list): the tests to run
+            sessions (SessionPool): keep-alive sessions per host
+
+        Returns:
+            dict: test to the measured value (None if it can't be measured)
+        """
+        server_ip = server.summary.guest.ipAddress
+        if not server_ip:
+            self.logger.error("No IP address of VM {0}".format(server.name))
+            raise SystemExit
+        options = ""
+        if Check().check_kv(self.cfg, "rdma_device"):
+            options = " -d {0}".format(shlex.quote(self.cfg["rdma_device"]))
+        timeout = self.cfg.get("timeout", 300)
+        results = {}
+        for test, program in [("bw", "ib_write_bw"), ("lat", "ib_write_lat")]:
+            if test not in tests:
+                continue
+            client_done = threading.Event()
+
+            def run(cmd):
+                vm_obj, command, stop = cmd
+                try:
+                    return self._exec_on_vm(
+                        vm_obj, sessions, command, timeout, stop=stop
+                    )
+                finally:
+                    if vm_obj is client:
+                        client_done.set()
+
+            cmds = [
+                (server, program + options, client_done),
+                (
+                    client,
+                    "sleep 2 && {0}{1} {2}".format(program, options, server_ip),
+                    None,
+                ),
+            ]
+            outcomes = Executor(parallel=2).run(cmds, run, name=lambda cmd: cmd[0].name)
+            client_result = outcomes[1].result or {"stdout": ""}
+            results[test] = parse_perftest(
+                client_result["stdout"], PAIR_COLUMNS[test][0]
+            )
+        return results
+
+    def _report_nodes(self, names, tests, node_results):
+        """
+        print the results of the node tests and log the nodes out of
+        tolerance: STREAM below the tolerance of --mem_target (or of the
+        median of all nodes), or an active MTU other than --mtu
+
+        Args:
+            names (list): the VM names
+            tests (list): the tests which are run
+            node_results (dict): VM name to its results of _validate_node
+
+        Returns:
+            int: the number of checks out of tolerance or not measured
+        """
+        tests = [test for test in NODE_TESTS if test in tests]
+        if not tests:
+            return 0
+        problems = 0
+        flagged = {}
+        if "stream" in tests:
+            values = {name: node_results.get(name, {}).get("stream") for name in names}
+            reference, flagged["stream"] = out_of_tolerance(
+                values, self.cfg.get("tolerance", 10), self.cfg.get("mem_target")
+            )
+            for name, value in flagged["stream"].items():
+                self.logger.error(
+                    "VM {0}: STREAM Triad {1:.1f} MB/s is below {2}% of "
+                    "{3:.1f} MB/s".format(
+                        name, value, 100 - self.cfg.get("tolerance", 10), reference
+                    )
+                )
+        if "mtu" in tests:
+            expected = self.cfg.get("mtu", 4096)
+            flagged["mtu"] = {}
+            for name in names:
+                value = node_results.get(name, {}).get("mtu")
+                if value is not None and value != expected:
+                    flagged["mtu"][name] = value
+                    self.logger.error(
+                        "VM {0}: active MTU {1} of RDMA port is not {2}".format(
+                            name, value, expected
+                        )
+                    )
+        headers = {"stream": "STREAM Triad (MB/s)", "mtu": "Active MTU"}
+        table = Texttable(max_width=0)
+        table.set_cols_dtype(["t"] * (len(tests) + 1))
+        table_rows = [["VM"] + [headers[test] for test in tests]]
+        for name in names:
+            row = [name]
+            for test in tests:
+                value = node_results.get(name, {}).get(test)
+                if value is None:
+                    problems += 1
+                    row.append("n/a")
+                    continue
+                if name in flagged[test]:
+                    problems += 1
+                row.append(
+                    "{0}{1}".format(
+                        "{0:.1f}".format(value) if test == "stream" else value,
+                        "*" if name in flagged[test] else "",
+                    )
+                )
+            table_rows.append(row)
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
+        return problems
+
+    def _report_pairs(self, names, tests, pair_results):
+        """
+        print a node by node matrix per pair test and log the links out of
+        tolerance of --bw_target/--lat_target (or of the median of all
+        links)
+
+        Args:
+            names (list): the VM names
+            tests (list): the tests which are run
+            pair_results (dict): (client, server) to the results of
+                                 _validate_pair
+
+        Returns:
+            int: the number of checks out of tolerance or not measured
+        """
+        problems = 0
+        titles = {
+            "bw": ("RDMA write bandwidth (MB/s)", "bw_target"),
+            "lat": ("RDMA write latency (usec)", "lat_target"),
+        }
+        tolerance = self.cfg.get("tolerance", 10)
+        for test in [test for test in PAIR_TESTS if test in tests]:
+            title, target_key = titles[test]
+            higher_is_better = PAIR_COLUMNS[test][1]
+            values = {pair: results.get(test) for pair, results in pair_results.items()}
+            reference, flagged = out_of_tolerance(
+                values, tolerance, self.cfg.get(target_key), higher_is_better
+            )
+            for (client, server), value in sorted(flagged.items()):
+                self.logger.error(
+                    "Link {0} -> {1}: {2} {3:.2f} is {4} {5}% of {6:.2f}".format(
+                        client,
+                        server,
+                        title,
+                        value,
+                        "below" if higher_is_better else "above",
+                        100 - tolerance if higher_is_better else 100 + tolerance,
+                        reference,
+                    )
+                )
+            problems += len(flagged)
+            problems += len([value for value in values.values() if value is None])
+            print_matrix(
+                names,
+                {pair: (value, pair in flagged) for pair, value in values.items()},
+                title,
+            )
+        return problems
+
+    # ~~~~~~~~~~~~~~~~~~~~ VALIDATE END ~~~~~~~~~~~~~~~~~~~~~~~#
+
 # ======================= "Utility operations on one VM" End ===========================#
 
 # ================ "Operations to change compute resources on one VM" ==================#
@@ -1061,11 +2846,88 @@ class Operations(object):
                         ConfigVM(vm_obj).cpu_reservation(host_cpu_mhz, reser=1)
                     )
         if tasks:
-            GetWait().wait_for_tasks(
-                tasks, task_name="Configure memory/CPU reservation"
+            GetWait().wait_for_tasks(
+                tasks, task_name="Configure memory/CPU reservation"
+            )
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~ LATENCY END ~~~~~~~~~~~~~~~~~~#
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~ VM PROFILE ~~~~~~~~~~~~~~~~~~~~#
+    def vm_profile_cli(self):
+        """
+        Apply a VM tuning profile (extraConfig entries) on VM(s)
+
+        Returns:
+            None
+        """
+        profile = VMProfile(
+            self.cfg.get("profile_file", "vm-profiles.yaml"), self.cfg["profile"]
+        )
+        vm_cfgs = self._extract_file(self.cfg)
+        tasks = [self._get_vm_profile_task(vm_cfg, profile) for vm_cfg in vm_cfgs]
+        tasks = [task for task in tasks if task]
+        if tasks:
+            GetWait().wait_for_tasks(
+                tasks, task_name="Apply VM profile {0}".format(profile.name)
+            )
+
+    def _vm_profile_cluster(self, vm_cfgs, key):
+        """
+        Apply VM tuning profiles on VM(s) (defined in cluster conf file)
+
+        Args:
+            vm_cfgs (list): a list of dicts contains VM config info
+            key: the keyword that can trigger this configuration
+
+        Returns:
+            None
+        """
+        profiles = {}
+        tasks = []
+        for vm_cfg in vm_cfgs:
+            if key in vm_cfg:
+                profile_file = vm_cfg.get("profile_file", "vm-profiles.yaml")
+                if (profile_file, vm_cfg[key]) not in profiles:
+                    profiles[(profile_file, vm_cfg[key])] = VMProfile(
+                        profile_file, vm_cfg[key]
+                    )
+                task = self._get_vm_profile_task(
+                    vm_cfg, profiles[(profile_file, vm_cfg[key])]
+                )
+                if task:
+                    tasks.append(task)
+        if tasks:
+            GetWait().wait_for_tasks(tasks, task_name="Apply VM profile")
+
+    def _get_vm_profile_task(self, vm_cfg, profile):
+        """
+        Apply the extraConfig entries of a profile which differ on a VM in
+        one reconfiguration and get Task
+
+        Args:
+            vm_cfg (dict): a dict contains VM config info
+            profile (VMProfile): the VM profile to apply
+
+        Returns:
+            Task: None if the VM already complies with the profile
+        """
+        vm_obj = self.objs.get_vm(vm_cfg["vm"])
+        extra_configs = profile.drift(vm_obj)
+        if not extra_configs:
+            self.logger.info(
+                "VM {0} already complies with profile {1}".format(
+                    vm_obj.name, profile.name
+                )
+            )
+            return None
+        if GetVM(vm_obj).is_power_on():
+            self.logger.warning(
+                "VM {0} is powered on. Profile {1} takes effect "
+                "after the next power cycle.".format(vm_obj.name, profile.name)
             )
+        return ConfigVM(vm_obj).add_extra_configs(extra_configs)
 
-    # ~~~~~~~~~~~~~~~~~~~~~~~ LATENCY END ~~~~~~~~~~~~~~~~~~#
+    # ~~~~~~~~~~~~~~~~~~~~~~~ VM PROFILE END ~~~~~~~~~~~~~~~~#
 
     #~~~~~~~~~~~~~~~~~~~~~~ AFFINITY ~~~~~~~~~~~~~~~~~~~~~~~#
     def vm_scheduling_affinity_cli(self):
@@ -1747,8 +3609,10 @@ class Operations(object):
 
         for vm_cfg in vm_cfgs:
             if all(k in vm_cfg for k in keys):
-                vm_cfg["profile"] = vm_cfg["vgpu"]
-                tasks.extend(self._get_add_vgpu_tasks(vm_cfg))
+                # "profile" of a VM in cluster conf file is its VM profile
+                tasks.extend(
+                    self._get_add_vgpu_tasks(dict(vm_cfg, profile=vm_cfg["vgpu"]))
+                )
         if tasks:
             GetWait().wait_for_tasks(tasks, task_name="Add vGPU profile")
 
@@ -1976,56 +3840,82 @@ class Operations(object):
             None
         """
         if self.cfg["create"]:
-            self._create_svs(self.cfg)
+            self._create_svs([self.cfg])
 
         if self.cfg["destroy"]:
             self._destroy_svs(self.cfg)
 
-    def _create_svs(self, svs_cfg):
+    @staticmethod
+    def _as_list(value):
+        """wrap a single value (str) of a key into a list"""
+
+        if isinstance(value, list):
+            return value
+        return [value] if value else []
+
+    def _create_svs(self, svs_cfgs):
         """
-        create a standard virtual switch. Note that the API for
-        adding/destroying svs doesn't return Task to track
+        create standard virtual switches. All switches (with their uplinks,
+        MTU and port groups) of a host are created in one network
+        configuration changeset, concurrently across hosts.
+        Note that the API for adding/destroying svs doesn't return Task to
+        track
 
         Args:
-            svs_cfg (dict): a dict contains svs config info
+            svs_cfgs (list): a list of dicts contains svs config info
 
         Returns:
             None
         """
-        Check().check_kv(svs_cfg, "name", required=True)
-        Check().check_kv(svs_cfg, "pnic", required=True)
-        Check().check_kv(svs_cfg, "host", required=True)
-        svs = svs_cfg["name"]
-        pnic = svs_cfg["pnic"]
-        svs_hosts = []
-        if isinstance(svs_cfg["host"], str):
-            svs_hosts.append(svs_cfg["host"])
-        elif isinstance(svs_cfg["host"], list):
-            svs_hosts = svs_cfg["host"]
-        else:
-            pass
-        for svs_host in svs_hosts:
-            host_obj = self.objs.get_host(svs_host)
-            host_update = ConfigHost(host_obj)
-            try:
-                host_update.create_svs(svs_name=svs, vmnic=pnic, mtu=svs_cfg.get("mtu"))
-                self.logger.info(
-                    "Creating standard virtual switch {0} " "is successful.".format(svs)
+        host_switches = {}
+        for svs_cfg in svs_cfgs:
+            Check().check_kv(svs_cfg, "name", required=True)
+            Check().check_kv(svs_cfg, "pnic", required=True)
+            Check().check_kv(svs_cfg, "host", required=True)
+            switch = {
+                "name": svs_cfg["name"],
+                "pnics": self._as_list(svs_cfg["pnic"]),
+                "mtu": svs_cfg.get("mtu"),
+                "port_groups": self._as_list(svs_cfg.get("port_group")),
+            }
+            for svs_host in self._as_list(svs_cfg["host"]):
+                host_switches.setdefault(svs_host, []).append(switch)
+        self._run_on_hosts(
+            list(host_switches),
+            lambda host_obj: self._create_svs_on_host(
+                host_switches[host_obj.name], host_obj
+            ),
+            "Create standard virtual switch {0}".format(
+                ", ".join(svs_cfg["name"] for svs_cfg in svs_cfgs)
+            ),
+        )
+
+    def _create_svs_on_host(self, switches, host_obj):
+        """
+        create standard virtual switches (and their port groups) on one host
+        in one changeset
+
+        Args:
+            switches (list): a list of dicts, one per svs, with keys "name",
+                             "pnics", "mtu" and "port_groups"
+            host_obj (vim.HostSystem): the host to create the svs
+
+        Returns:
+            bool: True if the changeset is applied
+        """
+        try:
+            ConfigHost(host_obj).setup_svs(switches)
+        except vmodl.MethodFault as error:
+            self.logger.error("Caught vmodl fault: " + error.msg)
+            return False
+        for switch in switches:
+            self.logger.info(
+                "Creating standard virtual switch {0} with port group(s) {1} "
+                "on host {2} is successful.".format(
+                    switch["name"], switch["port_groups"], host_obj.name
                 )
-            except vmodl.MethodFault as error:
-                self.logger.error("Caught vmodl fault: " + error.msg)
-            if Check().check_kv(svs_cfg, "port_group"):
-                try:
-                    host_update.create_pg_in_svs(
-                        svs_name=svs, pg_name=svs_cfg["port_group"]
-                    )
-                    self.logger.info(
-                        "Creating port group {0} "
-                        "within virtual switch {1} is "
-                        "successful.".format(svs_cfg["port_group"], svs)
-                    )
-                except vmodl.MethodFault as error:
-                    self.logger.error("Caught vmodl fault: " + error.msg)
+            )
+        return True
 
     def _destroy_svs(self, svs_cfg):
         """
@@ -2047,28 +3937,46 @@ class Operations(object):
             svs_hosts = svs_cfg["host"]
         else:
             pass
+        self._run_on_hosts(
+            svs_hosts,
+            functools.partial(self._destroy_svs_on_host, svs_cfg),
+            "Destroy standard virtual switch {0}".format(svs_cfg["name"]),
+        )
+
+    def _destroy_svs_on_host(self, svs_cfg, host_obj):
+        """
+        destroy a standard virtual switch (and its port group) on one host
+
+        Args:
+            svs_cfg (dict): a dict contains svs config info
+            host_obj (vim.HostSystem): the host to destroy the svs
+
+        Returns:
+            bool: True if all steps are successful
+        """
         svs_name = svs_cfg["name"]
-        for svs_host in svs_hosts:
-            host_obj = self.objs.get_host(svs_host)
-            host_update = ConfigHost(host_obj)
-            # destroy port group within this svs first
-            if Check().check_kv(svs_cfg, "port_group"):
-                pg_name = svs_cfg["port_group"]
-                try:
-                    host_update.destroy_pg(pg_name)
-                    self.logger.info(
-                        "Destroying port group {0} "
-                        "is successful.".format(svs_cfg["port_group"])
-                    )
-                except vmodl.MethodFault as error:
-                    self.logger.error("Caught vmodl fault : " + error.msg)
+        host_update = ConfigHost(host_obj)
+        success = True
+        # destroy port groups within this svs first
+        for pg_name in self._as_list(svs_cfg.get("port_group")):
             try:
-                host_update.destroy_svs(svs_name)
+                host_update.destroy_pg(pg_name)
                 self.logger.info(
-                    "Destroying virtual switch {0} is " "successful.".format(svs_name)
+                    "Destroying port group {0} " "is successful.".format(pg_name)
                 )
             except vmodl.MethodFault as error:
                 self.logger.error("Caught vmodl fault : " + error.msg)
+                success = False
+        try:
+            host_update.destroy_svs(svs_name)
+            self.logger.info(
+                "Destroying virtual switch {0} "
+                "on host {1} is successful.".format(svs_name, host_obj.name)
+            )
+        except vmodl.MethodFault as error:
+            self.logger.error("Caught vmodl fault : " + error.msg)
+            success = False
+        return success
 
     #~~~~~~~~~~~~~~~~~~~~~~~~ SVS END ~~~~~~~~~~~~~~~~~~~~~~#
 
@@ -2081,19 +3989,38 @@ class Operations(object):
             None
         """
         if self.cfg["create"]:
-            self._create_dvs(self.cfg)
+            self._create_dvs([self.cfg])
         if self.cfg["destroy"]:
             self._destroy_dvs(self.cfg)
 
-    def _create_dvs(self, dvs_cfg):
+    def _create_dvs(self, dvs_cfgs):
         """
+        create distributed virtual switches and their port groups. The
+        switches are created concurrently, and the port groups of a switch
+        are created in one task as soon as the switch is created.
 
         Args:
-            dvs_cfg (dict): a dict contains dvs config info
+            dvs_cfgs (list): a list of dicts contains dvs config info
 
         Returns:
             None
         """
+        chains = [self._get_create_dvs_chain(dvs_cfg) for dvs_cfg in dvs_cfgs]
+        GetWait().wait_for_task_chains(
+            chains, task_name="Create distributed virtual switch"
+        )
+
+    def _get_create_dvs_chain(self, dvs_cfg):
+        """
+        check DVS arguments and get the chain of steps to create a DVS and
+        its port groups
+
+        Args:
+            dvs_cfg (dict): a dict contains dvs config info
+
+        Returns:
+            list: a list of callables, each of which starts a Task
+        """
         self.logger.info("Checking DVS arguments...")
         Check().check_kv(dvs_cfg, "name", required=True)
         Check().check_kv(dvs_cfg, "datacenter", required=True)
@@ -2103,6 +4030,7 @@ class Operations(object):
         dvs_name = dvs_cfg["name"]
         pnics = []
         dvs_hosts = []
+        port_groups = []
         if isinstance(dvs_cfg["host"], str):
             dvs_hosts.append(dvs_cfg["host"])
         elif isinstance(dvs_cfg["host"], list):
@@ -2115,23 +4043,36 @@ class Operations(object):
             pnics.extend(dvs_cfg["pnic"])
         else:
             pass
+        if Check().check_kv(dvs_cfg, "port_group"):
+            if isinstance(dvs_cfg["port_group"], str):
+                port_groups.append(dvs_cfg["port_group"])
+            elif isinstance(dvs_cfg["port_group"], list):
+                port_groups.extend(dvs_cfg["port_group"])
         host_vmnics = {}
         datacenter_obj = self.objs.get_datacenter(dvs_cfg["datacenter"])
-        for dvs_host in dvs_hosts:
-            host_obj = self.objs.get_host(dvs_host)
+        for host_obj in self.objs.get_hosts(dvs_hosts):
             host_vmnics[host_obj] = pnics
-        task = ConfigDatacenter(datacenter_obj).create_dvs(
-            host_vmnics, dvs_name, mtu=dvs_cfg.get("mtu")
-        )
-        GetWait().wait_for_tasks([task], task_name="Create distributed virtual switch")
-        # create port group within this DVS
-        if Check().check_kv(dvs_cfg, "port_group"):
+
+        def _create_pgs():
+            if not port_groups:
+                return None
+            self.logger.info(
+                "Creating port group(s) {0} within DVS {1}".format(
+                    port_groups, dvs_name
+                )
+            )
             dvs_obj = self.objs.get_dvs(dvs_name)
-            task = ConfigDVS(dvs_obj).create_pg_in_dvs(dvs_cfg["port_group"])
-            GetWait().wait_for_tasks(
-                [task], task_name="Create port group within this DVS"
+            return ConfigDVS(dvs_obj).create_pgs_in_dvs(
+                port_groups, num_ports=dvs_cfg.get("num_ports", 8)
             )
 
+        return [
+            lambda: ConfigDatacenter(datacenter_obj).create_dvs(
+                host_vmnics, dvs_name, mtu=dvs_cfg.get("mtu")
+            ),
+            _create_pgs,
+        ]
+
     def _destroy_dvs(self, dvs_cfg):
         """
 
@@ -2160,66 +4101,337 @@ class Operations(object):
 
     #~~~~~~~~~~~~~~~~~~~~~ HOSTSRIOV ~~~~~~~~~~~~~~~~~~~~~~~#
     def modify_host_sriov_cli(self):
-        hosts = []
-        if "host" in self.cfg:
-            hosts.append(self.cfg["host"])
-        else:
-            hosts.extend(
-                [
-                    host_cfg["host"]
-                    for host_cfg in self._extract_file(self.cfg, file_keys=["host"])
-                ]
-            )
-
-        for host in hosts:
-            ConfigHost(self.objs.get_host(host)).modify_sriov(
+        outcomes = self._run_on_hosts(
+            self._get_cli_hosts(),
+            lambda host_obj: ConfigHost(host_obj).modify_sriov(
                 self.cfg["device"],
                 num_virtual_functions=self.cfg.get("num_func"),
                 enable_sriov=bool(self.cfg["on"]),
+            ),
+            "Modify SR-IOV of device {0}".format(self.cfg["device"]),
+        )
+        if self.cfg.get("reboot"):
+            self._rolling_reboot(
+                [outcome.item for outcome in outcomes if outcome.status == "ok"]
             )
 
     #~~~~~~~~~~~~~~~~~~~~~ HOSTSRIOV END ~~~~~~~~~~~~~~~~~~~#
 
     # ~~~~~~~~~~~~~~~~~~~~~ PASSTHRUHOST ~~~~~~~~~~~~~~~~~~~#
     def passthru_host_cli(self):
-        hosts = []
-        if "host" in self.cfg:
-            hosts.append(self.cfg["host"])
-        else:
-            hosts.extend(
-                [
-                    host_cfg["host"]
-                    for host_cfg in self._extract_file(self.cfg, file_keys=["host"])
-                ]
-            )
-
-        for host in hosts:
-            host_obj = self.objs.get_host(host)
-            ConfigHost(host_obj).toggle_pci_device_availability(
+        outcomes = self._run_on_hosts(
+            self._get_cli_hosts(),
+            lambda host_obj: ConfigHost(host_obj).toggle_pci_device_availability(
                 self.cfg["device"], bool(self.cfg["on"])
+            ),
+            "Toggle passthrough of device {0}".format(self.cfg["device"]),
+        )
+        if self.cfg.get("reboot"):
+            self._rolling_reboot(
+                [outcome.item for outcome in outcomes if outcome.status == "ok"]
             )
 
     # ~~~~~~~~~~~~~~~~~~~~~ PASSTHRUHOST END ~~~~~~~~~~~~~~~#
 
     # ~~~~~~~~~~~~~~~~~~~~~~ POWER POLICY ~~~~~~~~~~~~~~~~~~#
     def power_policy_cli(self):
-        hosts = []
+        self._run_on_hosts(
+            self._get_cli_hosts(),
+            lambda host_obj: ConfigHost(host_obj).change_power_policy(
+                self.cfg["policy"]
+            ),
+            "Change power policy",
+        )
 
-        if "host" in self.cfg:
-            hosts.append(self.cfg["host"])
+    # ~~~~~~~~~~~~~~~~~~~~~ POWER POLICY END ~~~~~~~~~~~~~~~#
+
+    # ~~~~~~~~~~~~~~~~~~~~~ HOST INVENTORY ~~~~~~~~~~~~~~~~~#
+    def hosts_cli(self):
+        """
+        collect the capabilities of all hosts in one sweep, save them as a
+        local snapshot and print them as a table or JSON
+
+        Returns:
+            None
+        """
+        inventory = HostInventory(self.cfg.get("snapshot", DEFAULT_SNAPSHOT))
+        snapshot = inventory.collect(self.objs)
+        inventory.save(snapshot)
+        hosts = None
+        if "host" in self.cfg or "file" in self.cfg:
+            hosts = self._get_cli_hosts()
+            missing = [host for host in hosts if host not in snapshot["hosts"]]
+            if missing:
+                self.logger.error("Couldn't find host(s) {0}".format(missing))
+        if self.cfg.get("json"):
+            records = {
+                host: record
+                for host, record in snapshot["hosts"].items()
+                if hosts is None or host in hosts
+            }
+            print(json.dumps(records, indent=2, sort_keys=True))
         else:
-            hosts.extend(
-                [
-                    host_cfg["host"]
-                    for host_cfg in self._extract_file(self.cfg, file_keys=["host"])
-                ]
+            HostInventory.print_snapshot(snapshot, hosts=hosts)
+
+    # ~~~~~~~~~~~~~~~~~~~ HOST INVENTORY END ~~~~~~~~~~~~~~~#
+
+    # ~~~~~~~~~~~~~~~~~~~~~~ HOST PROFILE ~~~~~~~~~~~~~~~~~~#
+    def host_profile_cli(self):
+        """
+        apply a host profile on hosts and/or check them for drift from it
+
+        Returns:
+            None
+        """
+        profile = HostProfile(
+            self.cfg.get("profile_file", "host-profiles.yaml"), self.cfg["profile"]
+        )
+        hosts = self._get_cli_hosts()
+        if self.cfg.get("apply"):
+            outcomes = self._run_on_hosts(
+                hosts, profile.apply, "Apply profile {0}".format(profile.name)
             )
+            hosts = [outcome.item for outcome in outcomes if outcome.status == "ok"]
+            if self.cfg.get("reboot") and hosts:
+                self._rolling_reboot(
+                    [
+                        host_obj.name
+                        for host_obj in self.objs.get_hosts(hosts)
+                        if host_obj.summary.rebootRequired
+                    ]
+                )
+        if hosts:
+            self._check_host_profile(profile, hosts)
+
+    def _check_host_profile(self, profile, hosts):
+        """
+        check hosts for drift from a host profile and print the drifted
+        settings
+
+        Args:
+            profile (HostProfile): the host profile
+            hosts (list): a list of host names
+
+        Returns:
+            None
+        """
+        drifts = {}
+
+        def _check(host_obj):
+            drifts[host_obj.name] = profile.drift(host_obj)
+            return not drifts[host_obj.name]
 
+        self._run_on_hosts(hosts, _check, "Check profile {0}".format(profile.name))
+        table = Texttable()
+        table_rows = [["Host", "Setting", "Expected", "Actual"]]
         for host in hosts:
-            host_obj = self.objs.get_host(host)
-            ConfigHost(host_obj).change_power_policy(self.cfg["policy"])
+            for setting, expected, actual in drifts.get(host, []):
+                table_rows.append([host, setting, expected, actual])
+        if len(table_rows) == 1:
+            self.logger.info(
+                "No drift from profile {0} on {1} host(s)".format(
+                    profile.name, len(drifts)
+                )
+            )
+            return
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print("Drift from profile {0}:".format(profile.name))
+        print(table.draw())
 
-    # ~~~~~~~~~~~~~~~~~~~~~ POWER POLICY END ~~~~~~~~~~~~~~~#
+    # ~~~~~~~~~~~~~~~~~~~~~ HOST PROFILE END ~~~~~~~~~~~~~~~#
+
+    # ~~~~~~~~~~~~~~~~~~~~~~ ROLLING REBOOT ~~~~~~~~~~~~~~~~#
+    def rolling_reboot_cli(self):
+        self._rolling_reboot(self._get_cli_hosts())
+
+    def _rolling_reboot(self, hosts):
+        """
+        reboot hosts in waves: the hosts of a wave enter maintenance mode,
+        reboot, reconnect and exit maintenance mode in parallel. The waves
+        are sized so that at least min_online of the memory capacity of
+        each cluster stays online.
+
+        Args:
+            hosts (list): a list of host names to reboot
+
+        Returns:
+            None
+        """
+        if not hosts:
+            self.logger.info("No hosts to reboot")
+            return
+        host_objs = self.objs.get_hosts(hosts)
+        waves = self._plan_maintenance_waves(
+            host_objs,
+            min_online=self.cfg.get("min_online", 0.5),
+            max_wave=self.cfg.get("max_wave"),
+        )
+        table = Texttable()
+        table_rows = [["Wave", "Hosts"]]
+        for wave_num, wave in enumerate(waves, start=1):
+            table_rows.append([wave_num, " ".join(host_obj.name for host_obj in wave)])
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
+        confirm = input(
+            "[ACTION] Do you really want to reboot the hosts in these waves? "
+        )
+        try:
+            if strtobool(confirm) == 0:
+                self.logger.info("Not rebooting any hosts")
+                return
+        except ValueError:
+            raise SystemExit("Not a valid answer. Exit.")
+        for wave_num, wave in enumerate(waves, start=1):
+            self.logger.info("Rebooting wave {0}/{1}".format(wave_num, len(waves)))
+            outcomes = Executor(parallel=len(wave)).run(
+                wave, self._reboot_host, name=lambda host_obj: host_obj.name
+            )
+            print("Reboot wave {0}/{1}:".format(wave_num, len(waves)))
+            Executor.print_outcomes(outcomes, title="Host")
+            if any(outcome.status != "ok" for outcome in outcomes):
+                self.logger.error(
+                    "Wave {0} is not completed successfully. "
+                    "Stop rebooting the remaining waves.".format(wave_num)
+                )
+                raise SystemExit
+
+    def _plan_maintenance_waves(self, host_objs, min_online, max_wave=None):
+        """
+        plan the waves of hosts to enter maintenance mode. Per cluster, a
+        wave holds as many hosts as the memory capacity allowed to be offline
+        (1 - min_online of the online capacity), and at most max_wave hosts.
+        The waves of different clusters run together.
+
+        Args:
+            host_objs (list): a list of vim.HostSystem to reboot
+            min_online (float): the share of memory capacity of each cluster
+                                which must stay online
+            max_wave (int): max number of hosts of a cluster per wave
+
+        Returns:
+            list: a list of waves, each of which is a list of vim.HostSystem
+        """
+        clusters = {}
+        for host_obj in host_objs:
+            clusters.setdefault(host_obj.parent, []).append(host_obj)
+        cluster_waves = []
+        for cluster_obj, targets in clusters.items():
+            online = [
+                host_obj
+                for host_obj in cluster_obj.host
+                if host_obj.runtime.connectionState == "connected"
+                and not host_obj.runtime.inMaintenanceMode
+            ]
+            budget = sum(host_obj.hardware.memorySize for host_obj in online) * (
+                1 - min_online
+            )
+            waves = []
+            wave = []
+            offline = 0
+            for host_obj in targets:
+                memory = host_obj.hardware.memorySize if host_obj in online else 0
+                if wave and (
+                    offline + memory > budget or (max_wave and len(wave) >= max_wave)
+                ):
+                    waves.append(wave)
+                    wave = []
+                    offline = 0
+                if memory > budget:
+                    self.logger.warning(
+                        "Host {0} alone exceeds the capacity allowed to be "
+                        "offline in {1}. It will be rebooted alone.".format(
+                            host_obj.name, cluster_obj.name
+                        )
+                    )
+                wave.append(host_obj)
+                offline += memory
+            if wave:
+                waves.append(wave)
+            cluster_waves.append(waves)
+        return [
+            [host_obj for waves in wave_group if waves for host_obj in waves]
+            for wave_group in itertools.zip_longest(*cluster_waves)
+        ]
+
+    def _reboot_host(self, host_obj):
+        """
+        enter maintenance mode, reboot, wait for reconnection and exit
+        maintenance mode for one host
+
+        Args:
+            host_obj (vim.HostSystem): the host to reboot
+
+        Returns:
+            bool: True if all steps are successful
+        """
+        host_update = ConfigHost(host_obj)
+        if not host_obj.runtime.inMaintenanceMode:
+            timeout = self.cfg.get("maintenance_timeout", 1800)
+            task = host_update.enter_maintenance(timeout=timeout)
+            GetWait().wait_for_tasks([task], task_name="Enter maintenance mode")
+            if task.info.state != vim.TaskInfo.State.success:
+                self.logger.error(
+                    "Host {0} did not enter maintenance mode within {1} "
+                    "seconds".format(host_obj.name, timeout)
+                )
+                return False
+        last_boot_time = host_obj.runtime.bootTime
+        task = host_update.reboot()
+        GetWait().wait_for_tasks([task], task_name="Reboot host")
+        if task.info.state != vim.TaskInfo.State.success:
+            return False
+        if not HostGetWait(
+            host_obj, timeout=self.cfg.get("reboot_timeout", 1800)
+        ).wait_for_reboot(last_boot_time):
+            return False
+        task = host_update.exit_maintenance()
+        GetWait().wait_for_tasks([task], task_name="Exit maintenance mode")
+        return task.info.state == vim.TaskInfo.State.success
+
+    # ~~~~~~~~~~~~~~~~~~~~~ ROLLING REBOOT END ~~~~~~~~~~~~~#
+
+    # ~~~~~~~~~~~~~~~~~~~~~~ HOST EXECUTOR ~~~~~~~~~~~~~~~~~#
+    def _get_cli_hosts(self):
+        """
+        get the hosts from either --host or --file of host operations
+
+        Returns:
+            list: a list of host names
+        """
+        if "host" in self.cfg:
+            if isinstance(self.cfg["host"], list):
+                return self.cfg["host"]
+            return [self.cfg["host"]]
+        return [
+            host_cfg["host"]
+            for host_cfg in self._extract_file(self.cfg, file_keys=["host"])
+        ]
+
+    def _run_on_hosts(self, hosts, func, op_name):
+        """
+        run a host operation on hosts in parallel (--parallel hosts at a
+        time), and print a table of per-host outcomes and durations
+
+        Args:
+            hosts (list): a list of host names
+            func (function): the operation, called as func(host_obj),
+                             which fails if it raises or returns False
+            op_name (str): the name of the operation
+
+        Returns:
+            list: a list of Outcome per host
+        """
+        host_objs = self.objs.get_hosts(hosts)
+        outcomes = Executor(parallel=self.cfg.get("parallel", 8)).run(
+            host_objs, func, name=lambda host_obj: host_obj.name
+        )
+        print("{0}:".format(op_name))
+        Executor.print_outcomes(outcomes, title="Host")
+        return outcomes
+
+    # ~~~~~~~~~~~~~~~~~~~~~ HOST EXECUTOR END ~~~~~~~~~~~~~~#
 
 # ================ "Operations configured on host(s)" End ==============================#
 
@@ -2232,9 +4444,10 @@ class Operations(object):
             None
         """
         file_read = Cluster(self.cfg["file"])
-        svs_cfgs = file_read.read_svs_dvs_section(sec_def_key="_SVS_")
-        dvs_cfgs = file_read.read_svs_dvs_section(sec_def_key="_DVS_")
-        vm_cfgs = file_read.read_vm_section(sec_def_key="_VMS_")
+        model = file_read.compile(use_cache=not self.cfg.get("no_cache"))
+        svs_cfgs = model.svs
+        dvs_cfgs = model.dvs
+        vm_cfgs = model.vms
         if self.cfg["debug"]:
             if svs_cfgs:
                 for svs_cfg in svs_cfgs:
@@ -2263,7 +4476,7 @@ class Operations(object):
             if dvs_cfgs:
                 self._create_cluster_dvs(dvs_cfgs)
             if vm_cfgs:
-                self._create_cluster_vms(vm_cfgs)
+                self._create_cluster_vms(vm_cfgs, file_read)
         if self.cfg["destroy"]:
             if vm_cfgs:
                 self._destroy_cluster_vms(vm_cfgs)
@@ -2282,8 +4495,7 @@ class Operations(object):
         Returns:
             None
         """
-        for switch in switch_cfgs:
-            self._create_svs(switch)
+        self._create_svs(switch_cfgs)
 
     def _create_cluster_dvs(self, switch_cfgs):
         """
@@ -2294,18 +4506,19 @@ class Operations(object):
         Returns:
             None
         """
-        for switch in switch_cfgs:
-            self._create_dvs(switch)
+        self._create_dvs(switch_cfgs)
 
-    def _create_cluster_vms(self, vm_cfgs):
+    def _create_cluster_vms(self, vm_cfgs, file_read):
         """
 
         Args:
             vm_cfgs (list): a list of dicts contain VM config info which is extracted from cluster file
+            file_read (Cluster): the reader of the cluster file
 
         Returns:
             None
         """
+        self._plan_cluster_devices(vm_cfgs)
         self._clone_cluster(vm_cfgs, "template")
         self._cpu_shares_cluster(vm_cfgs, "cpu_shares")
         self._memory_shares_cluster(vm_cfgs, "memory_shares")
@@ -2314,28 +4527,199 @@ class Operations(object):
         self._network_cluster(vm_cfgs, "port_group")
         self._network_cfg_cluster(vm_cfgs, "ip", "is_dhcp")
         self._latency_cluster(vm_cfgs, "latency")
+        self._vm_profile_cluster(vm_cfgs, "profile")
         self._passthru_cluster(vm_cfgs, "device")
         self._vgpu_cluster(vm_cfgs, "vgpu")
         self._sriov_cluster(vm_cfgs, "sriov_port_group")
         self._pvrdma_cluster(vm_cfgs, "pvrdma_port_group")
         self._secure_boot_cluster(vm_cfgs, "secure_boot")
         self._power_cluster(vm_cfgs, "power")
-        # execute post scripts with enforced order
-        cluster_read = Cluster(self.cfg["file"])
-        sorted_posts = cluster_read.collect_scripts(vm_cfgs)
-        for post in sorted_posts:
-            tasks = []
-            for spec in post:
-                usr, pwd, vm, scripts, _ = spec
-                tasks.extend(self._get_post_procs(usr, pwd, vm, scripts))
-            if tasks:
-                proc_mng = self.content.guestOperationsManager.processManager
-                GetWait().wait_for_procs(proc_mng, tasks)
+        # execute post scripts in the order of their dependencies
+        steps, deps = file_read.collect_script_graph(vm_cfgs)
+        if steps:
+            self._run_post_graph(steps, deps)
         # get IP
         for vm_cfg in vm_cfgs:
             vm_obj = self.objs.get_vm(vm_cfg["vm"])
             GetVM(vm_obj).get_ip_addr()
 
+    def _run_post_graph(self, steps, deps):
+        """
+        execute the post script steps of a cluster as soon as the steps they
+        depend on are completed, while their logs are fetched into
+        <log_dir>/<run id>/<VM>/<script>.log. Once a step fails or can't be
+        launched, no more steps are launched, and the running ones are
+        waited for. With --head, the scripts of the steps left are
+        distributed from the head VM once, after its --head_after step
+        (e.g. the one setting up SSH). The steps of the other VMs which get
+        ready while the scripts are distributed wait for it.
+
+        Args:
+            steps (dict): a step (vm, sequence) to its post config tuple
+                          (username, password, vm, scripts)
+            deps (dict): a step to the set of steps it depends on
+
+        Returns:
+            None
+        """
+        head = self.cfg.get("head")
+        head_step = None
+        if head and self.cfg.get("head_after") is not None:
+            head_step = (head, self.cfg["head_after"])
+            if head_step not in steps:
+                self.logger.error(
+                    "VM {0} has no post script(s) of sequence {1}".format(
+                        head, self.cfg["head_after"]
+                    )
+                )
+                raise SystemExit
+        proc_mng = self.content.guestOperationsManager.processManager
+        collector = GuestLogCollector(
+            self.content.guestOperationsManager,
+            os.path.join(self.cfg.get("log_dir", "vhpc_logs"), self.run_id),
+            parallel=self.cfg.get("upload_parallel", 32),
+        )
+        pending = set(steps)
+        done = set()
+        # the running processes, the running step per VM, and the number of
+        # running processes per step
+        running = []
+        active = {}
+        remaining = {}
+        failed = []
+        unlaunched = []
+        # the distribution from the head VM: due until it is started, then
+        # running until the VMs which got the scripts are known
+        fan_out_due = bool(head)
+        fan_out = None
+        fan_out_specs = []
+        distributed = set()
+        last_progress = time.time()
+        try:
+            while pending or running or fan_out is not None:
+                stopped = failed or unlaunched
+                if (
+                    fan_out_due
+                    and not stopped
+                    and (head_step is None or head_step in done)
+                ):
+                    fan_out_due = False
+                    fan_out_specs = [
+                        steps[step]
+                        for step in sorted(steps)
+                        if step in pending or step[0] == head
+                    ]
+                    try:
+                        fan_out = self._start_fan_out(fan_out_specs, None)
+                    except SystemExit:
+                        self.logger.warning(
+                            "Couldn't distribute the post script(s) from {0}. "
+                            "Uploading them directly.".format(head)
+                        )
+                ready = [
+                    step
+                    for step in pending
+                    if deps[step] <= done and (fan_out is None or step[0] == head)
+                ]
+                if ready and not stopped:
+                    pending.difference_update(ready)
+                    try:
+                        procs = self._get_posts_procs(
+                            [steps[step] for step in sorted(ready)],
+                            distributed=distributed,
+                        )
+                    except SystemExit:
+                        # wait for the running processes before exiting
+                        unlaunched.extend(ready)
+                        continue
+                    # the steps of a VM depend on each other, so at most one
+                    # step per VM runs at a time
+                    for step in ready:
+                        active[step[0]] = step
+                        remaining[step] = 0
+                    for proc in procs:
+                        remaining[active[proc.vm_name]] += 1
+                    running.extend(procs)
+                    done.update(step for step in ready if not remaining[step])
+                    continue
+                polled = running + ([fan_out.proc] if fan_out is not None else [])
+                if not polled:
+                    break
+                running, finished, finished_failed = GetWait().check_procs(
+                    proc_mng, polled, parallel=self.cfg.get("upload_parallel", 32)
+                )
+                if finished:
+                    collector.fetch(finished)
+                if fan_out is not None:
+                    if fan_out.proc in running:
+                        running.remove(fan_out.proc)
+                    else:
+                        # the VMs which missed the scripts are uploaded to
+                        finished.remove(fan_out.proc)
+                        if fan_out.proc in finished_failed:
+                            finished_failed.remove(fan_out.proc)
+                        distributed = self._finish_fan_out(fan_out, fan_out_specs)
+                        fan_out = None
+                failed.extend(finished_failed)
+                for proc in finished:
+                    step = active[proc.vm_name]
+                    remaining[step] -= 1
+                    if not remaining[step]:
+                        done.add(step)
+                if running and time.time() - last_progress >= 10:
+                    collector.fetch(running, tail=True)
+                    last_progress = time.time()
+                if (running or fan_out is not None) and not finished:
+                    time.sleep(1)
+        finally:
+            collector.close()
+        if failed or unlaunched:
+            self.logger.error(
+                "{0} post process(es) are finished with an error, {1} post "
+                "step(s) couldn't be launched, {2} post step(s) are not "
+                "executed".format(len(failed), len(unlaunched), len(pending))
+            )
+            raise SystemExit
+
+    def _plan_cluster_devices(self, vm_cfgs):
+        """
+        plan the hosts and devices (passthrough devices, SR-IOV VFs and vGPU
+        capacity) of the VMs to be created which request them, over a fresh
+        host inventory snapshot. The planned "host", "device" and "pf" are
+        filled into the VM configs. Exit before any clone if the plan is
+        infeasible.
+
+        Args:
+            vm_cfgs (list): a list of dicts contain VM config info
+
+        Returns:
+            None
+        """
+        if not any(DevicePlanner.needs_plan(vm_cfg) for vm_cfg in vm_cfgs):
+            return
+        inventory = HostInventory(self.cfg.get("snapshot", DEFAULT_SNAPSHOT))
+        snapshot = inventory.collect(self.objs)
+        inventory.save(snapshot)
+        # existing VMs already hold their devices in the inventory
+        new_vm_cfgs = [
+            vm_cfg for vm_cfg in vm_cfgs if vm_cfg["vm"] not in inventory.vm_names
+        ]
+        failures = DevicePlanner(snapshot).plan(new_vm_cfgs)
+        if failures:
+            table = Texttable()
+            table_rows = [["VM", "Reason"]]
+            table_rows.extend([list(failure) for failure in failures])
+            table.add_rows(table_rows)
+            table.set_deco(Texttable.VLINES | Texttable.HEADER)
+            print(table.draw())
+            self.logger.error(
+                "The devices requested by {0} VM(s) can't be placed. "
+                "No VM is cloned.".format(len(failures))
+            )
+            raise SystemExit
+        print("Device plan:")
+        DevicePlanner.print_plan(new_vm_cfgs)
+
     def _destroy_cluster_vms(self, vm_cfgs):
         """
 
@@ -2351,9 +4735,7 @@ class Operations(object):
             confirm = input("[ACTION] Do you really want to destroy {0} ? ".format(vms))
             try:
                 if bool(strtobool(confirm)):
-                    tasks = self._get_destroy_tasks(vms)
-                    if tasks:
-                        GetWait().wait_for_tasks(tasks, task_name="Destroy VM")
+                    self._teardown_cluster_vms(vms)
                 else:
                     self.logger.info("Not destroying any VMs")
             except ValueError:
@@ -2361,6 +4743,66 @@ class Operations(object):
         else:
             self.logger.info("No VMs specified to destroy")
 
+    def _teardown_cluster_vms(self, vms):
+        """
+        destroy the VMs of a cluster. A VM folder created by vhpc_toolkit
+        whose children are all to be destroyed is destroyed in bulk (after
+        its VMs are powered off). The rest of the VMs are destroyed as a
+        pipeline. Resource pools created by vhpc_toolkit are destroyed once
+        they have no VMs left.
+
+        Args:
+            vms (list): a list of vm names for destroy
+
+        Returns:
+            None
+        """
+        vm_objs = []
+        folders = {}
+        resource_pools = []
+        for vm in vms:
+            vm_obj = self.objs.get_vm(vm, _exit=False)
+            if vm_obj is None:
+                continue
+            vm_objs.append(vm_obj)
+            folders.setdefault(vm_obj.parent, []).append(vm_obj)
+            if vm_obj.resourcePool and vm_obj.resourcePool not in resource_pools:
+                resource_pools.append(vm_obj.resourcePool)
+        bulk_folders = [
+            folder_obj
+            for folder_obj, folder_vm_objs in folders.items()
+            if self._is_toolkit_created(folder_obj)
+            and set(folder_obj.childEntity) <= set(folder_vm_objs)
+        ]
+        bulk_vm_objs = [vm_obj for vm_obj in vm_objs if vm_obj.parent in bulk_folders]
+        if bulk_vm_objs:
+            self._destroy_vm_objs(
+                bulk_vm_objs, task_name="Power off VMs before destroying", destroy=False
+            )
+            tasks = []
+            for folder_obj in bulk_folders:
+                self.logger.info("Destroying VM folder {0}".format(folder_obj.name))
+                tasks.append(folder_obj.Destroy_Task())
+            GetWait().wait_for_tasks(tasks, task_name="Destroy VM folder")
+        self._destroy_vm_objs(
+            [vm_obj for vm_obj in vm_objs if vm_obj not in bulk_vm_objs]
+        )
+        # destroying a resource pool does not destroy its VMs,
+        # so it is only destroyed after its VMs are gone
+        tasks = []
+        for resource_pool_obj in resource_pools:
+            if (
+                self._is_toolkit_created(resource_pool_obj)
+                and not resource_pool_obj.vm
+                and not resource_pool_obj.resourcePool
+            ):
+                self.logger.info(
+                    "Destroying resource pool {0}".format(resource_pool_obj.name)
+                )
+                tasks.append(resource_pool_obj.Destroy_Task())
+        if tasks:
+            GetWait().wait_for_tasks(tasks, task_name="Destroy resource pool")
+
     def _destroy_cluster_svs(self, switch_cfgs):
         """
 
@@ -0,0 +1,285 @@
+# Virtualized High Performance Computing Toolkit
+#
+# Copyright (c) 2018-2019 VMware, Inc. All Rights Reserved.
+#
+# This product is licensed to you under the Apache 2.0 license (the
+# "License"). You may not use this product except in compliance with the
+# Apache 2.0 License. This product may include a number of subcomponents with
+#  separate copyright notices and license terms. Your use of these
+# subcomponents is subject to the terms and conditions of the subcomponent's
+# license, as noted in the LICENSE file.
+# SPDX-License-Identifier: Apache-2.0
+# coding=utf-8
+import math
+import re
+
+from texttable import Texttable
+
+from vhpc_toolkit import log
+
+# keys of a VM config which request accelerators or VFs
+DEVICE_KEYS = ["device", "gpus", "vgpu", "sriov_port_group"]
+
+
+def vgpu_framebuffer(profile):
+    """get the frame buffer size (GB) from a vGPU profile name,
+    e.g. 8 for grid_v100-8q. None if it can't be told from the name"""
+
+    match = re.search(r"-(\d+)[a-z]*$", profile)
+    return int(match.group(1)) if match else None
+
+
+class DevicePlanner(object):
+    """
+    Plan the assignment of VMs to hosts and devices (passthrough devices,
+    SR-IOV virtual functions and vGPU capacity) over a host inventory
+    snapshot, before any VM is cloned
+
+    """
+
+    def __init__(self, snapshot):
+        """
+
+        Args:
+            snapshot (dict): the host inventory snapshot (see HostInventory)
+
+        """
+        self.logger = log.my_logger(name=self.__class__.__name__)
+        self.hosts = {}
+        for host, record in snapshot["hosts"].items():
+            if record.get("connection_state") != "connected":
+                continue
+            self.hosts[host] = {
+                "cluster": record["cluster"],
+                "passthru": [
+                    device["id"]
+                    for device in record["passthru"]
+                    if device["enabled"] and not device["used"]
+                ],
+                "gpus": [
+                    device["id"]
+                    for device in record["passthru"]
+                    if device["enabled"] and not device["used"] and device["gpu"]
+                ],
+                "vfs": {
+                    device["id"]: device["free_vf"]
+                    for device in record["sriov"]
+                    if device["enabled"]
+                },
+                "vgpu_types": record["vgpu_types"],
+                "vgpu_gpus": record["vgpu_gpus"],
+                "vgpu_used": dict(record["vgpu_used"]),
+            }
+
+    @staticmethod
+    def needs_plan(vm_cfg):
+        """whether a VM config requests accelerators or VFs"""
+
+        return any(vm_cfg.get(key) for key in DEVICE_KEYS)
+
+    def plan(self, vm_cfgs):
+        """
+        assign hosts and devices to the VMs which request them, and fill in
+        their "host", "device" and "pf" keys. VMs with a host given are
+        placed first, then the VMs with the largest demand.
+
+        Args:
+            vm_cfgs (list): a list of dicts contains VM config info
+
+        Returns:
+            list: a list of (VM name, reason) of the VMs which can't be placed
+        """
+        failures = []
+        ordered = sorted(
+            [vm_cfg for vm_cfg in vm_cfgs if self.needs_plan(vm_cfg)],
+            key=lambda vm_cfg: (
+                not vm_cfg.get("host"),
+                -self._demand(vm_cfg),
+            ),
+        )
+        for vm_cfg in ordered:
+            reason = self._check_pfs(vm_cfg)
+            if reason:
+                failures.append((vm_cfg["vm"], reason))
+                continue
+            if vm_cfg.get("host"):
+                candidates = [vm_cfg["host"]]
+            else:
+                candidates = sorted(
+                    host
+                    for host, state in self.hosts.items()
+                    if not vm_cfg.get("cluster")
+                    or state["cluster"] == vm_cfg["cluster"]
+                )
+            reason = "no connected host in cluster {0}".format(vm_cfg.get("cluster"))
+            for host in candidates:
+                allocation, reason = self._fit(vm_cfg, host)
+                if allocation is not None:
+                    self._commit(vm_cfg, host, allocation)
+                    break
+            else:
+                if len(candidates) > 1:
+                    reason = "no host fits, e.g. {0}".format(reason)
+                failures.append((vm_cfg["vm"], reason))
+        return failures
+
+    @staticmethod
+    def _as_list(value):
+        """wrap a single value (str) of a key into a list"""
+
+        if isinstance(value, list):
+            return value
+        return [value] if value else []
+
+    def _check_pfs(self, vm_cfg):
+        """check that the given PFs, if any, pair up one by one with the
+        SR-IOV port groups of a VM
+
+        Returns:
+            str: the reason if they don't, otherwise None
+        """
+        pfs = self._as_list(vm_cfg.get("pf"))
+        port_groups = self._as_list(vm_cfg.get("sriov_port_group"))
+        if pfs and len(pfs) != len(port_groups):
+            return "{0} pf(s) given for {1} sriov_port_group(s)".format(
+                len(pfs), len(port_groups)
+            )
+        return None
+
+    def _demand(self, vm_cfg):
+        """the number of devices/VFs requested by a VM, to place large
+        VMs first"""
+
+        return (
+            len(self._as_list(vm_cfg.get("device")))
+            + vm_cfg.get("gpus", 0)
+            + len(self._as_list(vm_cfg.get("sriov_port_group")))
+            + (1 if vm_cfg.get("vgpu") else 0)
+        )
+
+    def _fit(self, vm_cfg, host):
+        """
+        try to allocate the requested devices of a VM on a host
+
+        Returns:
+            tuple: (allocation dict, None) if fits, otherwise (None, reason)
+        """
+        state = self.hosts.get(host)
+        if state is None:
+            return None, "host {0} is not connected or not found".format(host)
+        devices = [device.lower() for device in self._as_list(vm_cfg.get("device"))]
+        for device in devices:
+            if device not in state["passthru"]:
+                return None, "device {0} is not available on {1}".format(device, host)
+        free_gpus = [gpu for gpu in state["gpus"] if gpu not in devices]
+        if vm_cfg.get("gpus", 0) > len(free_gpus):
+            return None, "{0} GPU(s) requested, {1} available on {2}".format(
+                vm_cfg["gpus"], len(free_gpus), host
+            )
+        devices += free_gpus[: vm_cfg.get("gpus", 0)]
+        pfs = self._fit_vfs(vm_cfg, state)
+        if pfs is None:
+            return None, "not enough free SR-IOV VFs on {0}".format(host)
+        vgpu = vm_cfg.get("vgpu")
+        if vgpu:
+            if vgpu not in state["vgpu_types"]:
+                return None, "vGPU profile {0} is not available on {1}".format(
+                    vgpu, host
+                )
+            if self._free_vgpus(state, vgpu) < 1:
+                return None, "no vGPU capacity left for {0} on {1}".format(vgpu, host)
+        return {"device": devices, "pf": pfs}, None
+
+    def _fit_vfs(self, vm_cfg, state):
+        """get the PF per SR-IOV port group of a VM, or None if the free VFs
+        aren't enough. Without given PFs, the PFs with most free VFs are
+        used."""
+
+        port_groups = self._as_list(vm_cfg.get("sriov_port_group"))
+        if not port_groups:
+            return []
+        pfs = [pf.lower() for pf in self._as_list(vm_cfg.get("pf"))]
+        free_vfs = dict(state["vfs"])
+        if pfs:
+            for pf in pfs:
+                if free_vfs.get(pf, 0) < 1:
+                    return None
+                free_vfs[pf] -= 1
+            return pfs
+        for _ in port_groups:
+            if not free_vfs or max(free_vfs.values()) < 1:
+                return None
+            pf = max(sorted(free_vfs), key=lambda pf_id: free_vfs[pf_id])
+            free_vfs[pf] -= 1
+            pfs.append(pf)
+        return pfs
+
+    @staticmethod
+    def _free_vgpus(state, profile):
+        """the number of vGPUs of a profile which can still be placed on a
+        host. A GPU only backs vGPUs of one profile; the largest profile
+        offered by the host is taken as the frame buffer of a GPU."""
+
+        sizes = [vgpu_framebuffer(vgpu_type) for vgpu_type in state["vgpu_types"]]
+        gpu_size = max([size for size in sizes if size] or [1])
+
+        def per_gpu(vgpu_type):
+            return max(1, gpu_size // (vgpu_framebuffer(vgpu_type) or gpu_size))
+
+        used_gpus = {
+            vgpu_type: math.ceil(count / per_gpu(vgpu_type))
+            for vgpu_type, count in state["vgpu_used"].items()
+        }
+        free_gpus = state["vgpu_gpus"] - sum(used_gpus.values())
+        # the free vGPUs on the GPUs already of the profile
+        capacity = used_gpus.get(profile, 0) * per_gpu(profile)
+        partial = capacity - state["vgpu_used"].get(profile, 0)
+        return max(0, free_gpus) * per_gpu(profile) + partial
+
+    def _commit(self, vm_cfg, host, allocation):
+        """reserve the allocated devices on a host and fill in the VM config"""
+
+        state = self.hosts[host]
+        for device in allocation["device"]:
+            state["passthru"].remove(device)
+            if device in state["gpus"]:
+                state["gpus"].remove(device)
+        for pf in allocation["pf"]:
+            state["vfs"][pf] -= 1
+        if vm_cfg.get("vgpu"):
+            state["vgpu_used"][vm_cfg["vgpu"]] = (
+                state["vgpu_used"].get(vm_cfg["vgpu"], 0) + 1
+            )
+        vm_cfg["host"] = host
+        if allocation["device"]:
+            vm_cfg["device"] = allocation["device"]
+        if allocation["pf"]:
+            vm_cfg["pf"] = allocation["pf"]
+
+    @staticmethod
+    def print_plan(vm_cfgs):
+        """
+        print a table of the planned hosts and devices of VMs
+
+        Args:
+            vm_cfgs (list): a list of dicts contains VM config info
+
+        Returns:
+            None
+        """
+        table = Texttable(max_width=0)
+        table_rows = [["VM", "Host", "Passthrough", "SR-IOV PF", "vGPU"]]
+        for vm_cfg in vm_cfgs:
+            if DevicePlanner.needs_plan(vm_cfg):
+                table_rows.append(
+                    [
+                        vm_cfg["vm"],
+                        vm_cfg.get("host", ""),
+                        " ".join(DevicePlanner._as_list(vm_cfg.get("device"))),
+                        " ".join(DevicePlanner._as_list(vm_cfg.get("pf"))),
+                        vm_cfg.get("vgpu", ""),
+                    ]
+                )
+        table.add_rows(table_rows)
+        table.set_deco(Texttable.VLINES | Texttable.HEADER)
+        print(table.draw())
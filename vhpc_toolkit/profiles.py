@@ -0,0 +1,280 @@
+# Virtualized High Performance Computing Toolkit
+#
+# Copyright (c) 2018-2019 VMware, Inc. All Rights Reserved.
+#
+# This product is licensed to you under the Apache 2.0 license (the
+# "License"). You may not use this product except in compliance with the
+# Apache 2.0 License. This product may include a number of subcomponents with
+#  separate copyright notices and license terms. Your use of these
+# subcomponents is subject to the terms and conditions of the subcomponent's
+# license, as noted in the LICENSE file.
+# SPDX-License-Identifier: Apache-2.0
+# coding=utf-8
+import os
+
+import yaml
+
+from vhpc_toolkit import log
+from vhpc_toolkit.config_objs import ConfigHost
+from vhpc_toolkit.get_objs import GetHost
+from vhpc_toolkit.get_objs import GetVM
+
+HOST_PROFILE_KEYS = ["power_policy", "advanced_options", "passthru", "sriov", "mtu"]
+
+
+def find_profile_file(file, profile_dir="host-profiles"):
+    """locate the profile file
+
+    Args:
+        file (str): profile file
+        profile_dir (str): the folder under examples to look up the
+                           profile file if it isn't a path
+
+    Returns:
+        Full path of the profile file if located (str)
+
+    """
+
+    default_profile_dir = "%s/../examples/%s" % (
+        os.path.dirname(os.path.realpath(__file__)),
+        profile_dir,
+    )
+    default_profile_file = "%s/%s" % (default_profile_dir, file)
+    if os.path.isfile(file):
+        profile_file = file
+    elif os.path.isfile(default_profile_file):
+        profile_file = default_profile_file
+    else:
+        raise SystemExit("Couldn't find profile file %s" % file)
+    return profile_file
+
+
+def load_profile(file, name, profile_dir, logger):
+    """read a named profile from a YAML profile file
+
+    Args:
+        file (str): the YAML file defining the profiles
+        name (str): the name of the profile
+        profile_dir (str): the folder under examples to look up the file
+        logger (Logger): the logger to report errors
+
+    Returns:
+        dict: the settings of the profile
+
+    """
+
+    profile_file = find_profile_file(file, profile_dir)
+    try:
+        with open(profile_file, "r") as f:
+            profiles = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        logger.error("Unable to read profile file {0}: {1}".format(profile_file, e))
+        raise SystemExit
+    if name not in profiles:
+        logger.error("Couldn't find profile {0} in {1}".format(name, profile_file))
+        raise SystemExit
+    return profiles[name] or {}
+
+
+class HostProfile(object):
+    """
+    A named set of host tuning settings, which can be checked for drift
+    and applied on hosts
+
+    """
+
+    def __init__(self, file, name):
+        """
+
+        Args:
+            file (str): the YAML file defining the profiles
+            name (str): the name of the profile to use
+
+        """
+        self.name = name
+        self.logger = log.my_logger(name=self.__class__.__name__)
+        self.settings = load_profile(file, name, "host-profiles", self.logger)
+        self._check_settings()
+
+    def _check_settings(self):
+        """check the keys and values of the profile settings"""
+
+        for key in self.settings:
+            if key not in HOST_PROFILE_KEYS:
+                self.logger.error(
+                    "Unknown key {0} in profile {1}. Valid keys: {2}".format(
+                        key, self.name, ", ".join(HOST_PROFILE_KEYS)
+                    )
+                )
+                raise SystemExit
+        if "power_policy" in self.settings and self.settings["power_policy"] not in [
+            1,
+            2,
+            3,
+            4,
+        ]:
+            self.logger.error(
+                "power_policy of profile {0} must be one of 1, 2, 3, 4".format(
+                    self.name
+                )
+            )
+            raise SystemExit
+        for key in ["advanced_options", "passthru", "sriov", "mtu"]:
+            if not isinstance(self.settings.get(key, {}), dict):
+                self.logger.error(
+                    "{0} of profile {1} must be a mapping".format(key, self.name)
+                )
+                raise SystemExit
+
+    @staticmethod
+    def _as_option_type(value, current):
+        """convert a profile value to the type of the current option value"""
+
+        if current is None or isinstance(value, type(current)):
+            return value
+        if isinstance(current, bool):
+            return str(value).lower() in ["1", "true", "yes", "on"]
+        return type(current)(value)
+
+    def drift(self, host_obj):
+        """
+        compare the settings of a host with the profile
+
+        Args:
+            host_obj (vim.HostSystem): the host to check
+
+        Returns:
+            list: a list of (setting, expected, actual) which differ
+        """
+        host = GetHost(host_obj)
+        drifts = []
+        if "power_policy" in self.settings:
+            actual = host.power_policy()
+            if actual != self.settings["power_policy"]:
+                drifts.append(("power_policy", self.settings["power_policy"], actual))
+        for key, value in self.settings.get("advanced_options", {}).items():
+            actual = host.advanced_option(key)
+            if actual is None or self._as_option_type(value, actual) != actual:
+                drifts.append((key, value, actual))
+        pci_info = host.pci_passthru_info()
+        for device_id, enabled in self.settings.get("passthru", {}).items():
+            info = pci_info.get(device_id.lower())
+            actual = info.passthruEnabled if info else None
+            if actual != bool(enabled):
+                drifts.append(("passthru " + device_id, bool(enabled), actual))
+        for device_id, num_func in self.settings.get("sriov", {}).items():
+            info = pci_info.get(device_id.lower())
+            if info is None or not hasattr(info, "sriovEnabled"):
+                drifts.append(("sriov " + device_id, num_func, None))
+                continue
+            actual = info.numVirtualFunctionRequested if info.sriovEnabled else 0
+            if actual != num_func:
+                drifts.append(("sriov " + device_id, num_func, actual))
+        vswitches = {vswitch.name: vswitch for vswitch in host.vswitch()}
+        for svs_name, mtu in self.settings.get("mtu", {}).items():
+            actual = vswitches[svs_name].mtu if svs_name in vswitches else None
+            if actual != mtu:
+                drifts.append(("mtu " + svs_name, mtu, actual))
+        return drifts
+
+    def apply(self, host_obj):
+        """
+        apply the settings of the profile which drift on a host
+
+        Args:
+            host_obj (vim.HostSystem): the host to configure
+
+        Returns:
+            bool: True if all settings are applied
+        """
+        host = GetHost(host_obj)
+        host_update = ConfigHost(host_obj)
+        drifts = [setting for setting, _, _ in self.drift(host_obj)]
+        if not drifts:
+            self.logger.info(
+                "Host {0} already complies with profile {1}".format(
+                    host_obj.name, self.name
+                )
+            )
+            return True
+        applied = True
+        if "power_policy" in drifts:
+            applied &= host_update.change_power_policy(self.settings["power_policy"])
+        options = {}
+        for key, value in self.settings.get("advanced_options", {}).items():
+            if key in drifts:
+                options[key] = self._as_option_type(value, host.advanced_option(key))
+        host_update.update_advanced_options(options)
+        host_update.update_pci_passthru(
+            passthru={
+                device_id: enabled
+                for device_id, enabled in self.settings.get("passthru", {}).items()
+                if "passthru " + device_id in drifts
+            },
+            sriov={
+                device_id: num_func
+                for device_id, num_func in self.settings.get("sriov", {}).items()
+                if "sriov " + device_id in drifts
+            },
+        )
+        for svs_name, mtu in self.settings.get("mtu", {}).items():
+            if "mtu " + svs_name in drifts:
+                applied &= host_update.change_svs_mtu(svs_name, mtu)
+        self.logger.info(
+            "Applied profile {0} on host {1}".format(self.name, host_obj.name)
+        )
+        return applied
+
+
+class VMProfile(object):
+    """
+    A named set of VM tuning settings (extraConfig entries), applied on
+    VMs in one reconfiguration per VM
+
+    """
+
+    def __init__(self, file, name):
+        """
+
+        Args:
+            file (str): the YAML file defining the profiles
+            name (str): the name of the profile to use
+
+        """
+        self.name = name
+        self.logger = log.my_logger(name=self.__class__.__name__)
+        settings = load_profile(file, name, "vm-profiles", self.logger)
+        if not isinstance(settings, dict):
+            self.logger.error(
+                "Profile {0} must be a mapping of extraConfig "
+                "key to value".format(name)
+            )
+            raise SystemExit
+        self.extra_configs = {
+            key: self._as_extra_config_value(value) for key, value in settings.items()
+        }
+
+    @staticmethod
+    def _as_extra_config_value(value):
+        """convert a profile value to an extraConfig (vmx) string value"""
+
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        return str(value)
+
+    def drift(self, vm_obj):
+        """
+        get the extraConfig entries of the profile which differ on a VM
+
+        Args:
+            vm_obj (vim.VirtualMachine): the VM to check
+
+        Returns:
+            dict: extraConfig key to the value of the profile
+        """
+        vm_status = GetVM(vm_obj)
+        return {
+            key: value
+            for key, value in self.extra_configs.items()
+            if str(vm_status.extra_config(key)).upper() != value.upper()
+        }
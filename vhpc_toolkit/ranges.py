@@ -0,0 +1,203 @@
+# Virtualized High Performance Computing Toolkit
+#
+# Copyright (c) 2018-2019 VMware, Inc. All Rights Reserved.
+#
+# This product is licensed to you under the Apache 2.0 license (the
+# "License"). You may not use this product except in compliance with the
+# Apache 2.0 License. This product may include a number of subcomponents with
+#  separate copyright notices and license terms. Your use of these
+# subcomponents is subject to the terms and conditions of the subcomponent's
+# license, as noted in the LICENSE file.
+# SPDX-License-Identifier: Apache-2.0
+# coding=utf-8
+import functools
+import itertools
+import re
+
+# a range field in single (round-robin) or double (consecutive) braces
+FIELD_RE = re.compile(r"\{\{([^{}]*)\}\}|\{([^{}]*)\}")
+# the integer range of a field: start:end or start:end:step, optionally
+# zero-padded to a width of digits, e.g. 1:32#2
+INT_RANGE_RE = re.compile(r"^(-?\d+):(-?\d+)(?::(-?\d+))?(?:#(\d+))?$")
+# a field starting with ZIP advances together with the previous field
+ZIP = "~"
+
+
+class RangeSyntaxError(ValueError):
+    pass
+
+
+class RangeField(object):
+    """
+    One range field of a value: an integer range (with step and zero
+    padding to an explicit width) or an explicit list of items
+
+    """
+
+    __slots__ = ["start", "step", "size", "width", "items", "zipped", "bunch"]
+
+    def __init__(self, content, bunch, text):
+        """
+
+        Args:
+            content (str): the text between the braces
+            bunch (bool): whether the field is in double braces
+            text (str): the whole value, for error messages
+
+        """
+        self.bunch = bunch
+        self.zipped = content.startswith(ZIP)
+        if self.zipped:
+            content = content[len(ZIP) :]
+        self.items = None
+        match = INT_RANGE_RE.match(content)
+        if match:
+            start, end, step, width = match.groups()
+            self.start = int(start)
+            self.step = int(step) if step else (1 if int(end) >= self.start else -1)
+            if self.step == 0 or (int(end) - self.start) * self.step < 0:
+                raise RangeSyntaxError(
+                    "{0}: step {1} never reaches {2}".format(text, self.step, end)
+                )
+            self.size = (int(end) - self.start) // self.step + 1
+            # only padded if asked, e.g. {1:32#2}; {01:32} gives 1, 2, ...
+            self.width = int(width) if width else 0
+        else:
+            self.items = content.split(",")
+            if "" in self.items:
+                raise RangeSyntaxError("{0}: empty item in {1}".format(text, content))
+            self.size = len(self.items)
+
+    @staticmethod
+    def is_field(content):
+        """whether the text between braces is a range field, rather than
+        literal text such as ${variable}"""
+
+        if content.startswith(ZIP):
+            content = content[len(ZIP) :]
+        return bool(INT_RANGE_RE.match(content)) or "," in content
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if self.items is not None:
+            return self.items[index]
+        return "{0:0{1}d}".format(self.start + index * self.step, self.width)
+
+
+class RangeExpr(object):
+    """
+    A value compiled into literal text and range fields. The values are
+    the cartesian product of the fields (the last field varies fastest),
+    except that a zipped field advances together with the previous one.
+    They are generated lazily, and any of them can be computed by index.
+
+    """
+
+    __slots__ = ["text", "literals", "fields", "groups", "sizes"]
+
+    def __init__(self, text):
+        """
+
+        Args:
+            text (str): the value, e.g. rack{1:4}-node{1:32#2}
+
+        """
+        self.text = text
+        self.literals = []
+        self.fields = []
+        position = 0
+        for match in FIELD_RE.finditer(text):
+            content = match.group(1) if match.group(1) is not None else match.group(2)
+            if not RangeField.is_field(content):
+                continue
+            self.literals.append(text[position : match.start()])
+            self.fields.append(RangeField(content, match.group(1) is not None, text))
+            position = match.end()
+        self.literals.append(text[position:])
+        if len({field.bunch for field in self.fields}) > 1:
+            raise RangeSyntaxError(
+                "{0}: can't mix round-robin {{}} and consecutive {{{{}}}} "
+                "ranges".format(text)
+            )
+        # the indexes of the fields which advance together
+        self.groups = []
+        for index, field in enumerate(self.fields):
+            if field.zipped:
+                if not self.groups:
+                    raise RangeSyntaxError(
+                        "{0}: the first range can't be zipped".format(text)
+                    )
+                if len(field) != len(self.fields[self.groups[-1][0]]):
+                    raise RangeSyntaxError(
+                        "{0}: zipped ranges differ in size".format(text)
+                    )
+                self.groups[-1].append(index)
+            else:
+                self.groups.append([index])
+        self.sizes = [len(self.fields[group[0]]) for group in self.groups]
+
+    @property
+    def is_range(self):
+        """whether the value has any range field"""
+
+        return bool(self.fields)
+
+    @property
+    def bunch(self):
+        """whether the value is mapped consecutively (double braces)"""
+
+        return bool(self.fields) and self.fields[0].bunch
+
+    def __len__(self):
+        size = 1
+        for group_size in self.sizes:
+            size *= group_size
+        return size
+
+    def __iter__(self):
+        for indexes in itertools.product(*[range(size) for size in self.sizes]):
+            yield self._render(indexes)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        indexes = []
+        for size in reversed(self.sizes):
+            index, group_index = divmod(index, size)
+            indexes.append(group_index)
+        return self._render(indexes[::-1])
+
+    def _render(self, indexes):
+        """build the value of the given index per group"""
+
+        parts = [self.literals[0]]
+        for group, group_index in zip(self.groups, indexes):
+            for field_index in group:
+                parts.append(self.fields[field_index][group_index])
+                parts.append(self.literals[field_index + 1])
+        return "".join(parts)
+
+    def mapped(self, count):
+        """
+        map the values to a range of count items (e.g. VMs): round-robin
+        for {} ranges, consecutive for {{}} ranges
+
+        Args:
+            count (int): the number of items, not less than the values
+
+        Returns:
+            list: the value per item
+        """
+        size = len(self)
+        if self.bunch:
+            return [self[index * size // count] for index in range(count)]
+        return [self[index % size] for index in range(count)]
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_range(text):
+    """compile a value into a RangeExpr, cached per text"""
+
+    return RangeExpr(text)
@@ -0,0 +1,557 @@
+# Virtualized High Performance Computing Toolkit
+#
+# Copyright (c) 2018-2019 VMware, Inc. All Rights Reserved.
+#
+# This product is licensed to you under the Apache 2.0 license (the
+# "License"). You may not use this product except in compliance with the
+# Apache 2.0 License. This product may include a number of subcomponents with
+#  separate copyright notices and license terms. Your use of these
+# subcomponents is subject to the terms and conditions of the subcomponent's
+# license, as noted in the LICENSE file.
+# SPDX-License-Identifier: Apache-2.0
+# coding=utf-8
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shlex
+import shutil
+import tarfile
+import tempfile
+import threading
+
+import requests
+from pyVmomi import vim
+from requests.adapters import HTTPAdapter
+
+from vhpc_toolkit import log
+from vhpc_toolkit.executor import Executor
+
+# files smaller than this are uploaded without progress reports
+PROGRESS_MIN_SIZE = 64 * 1024**2
+# the file names which the fan-out script copies as they are: no whitespace,
+# glob or shell characters, and no leading "-" taken as an option
+FAN_OUT_NAME_RE = re.compile(r"^[\w.+][\w.+-]*$", re.ASCII)
+# the least growth of a log of a running process before it is fetched again
+TAIL_MIN_GROWTH = 64 * 1024
+# the manifest of uploaded files, in the home folder of the guest user
+MANIFEST_FILE = ".vhpc_toolkit_uploads.json"
+
+# sha256 of local files, keyed by (path, size, mtime)
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """get the sha256 of a local file, computed once per file version
+
+    Args:
+        path (str): the local file
+
+    Returns:
+        str: the hex digest
+
+    """
+
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime)
+    with _digests_lock:
+        if key in _digests:
+            return _digests[key]
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024**2), b""):
+            sha256.update(block)
+    with _digests_lock:
+        _digests[key] = sha256.hexdigest()
+    return _digests[key]
+
+
+class SessionPool(object):
+    """
+    A pool of keep-alive HTTPS sessions, one per ESXi host, shared by the
+    threads which transfer files to/from guest OSes
+
+    """
+
+    def __init__(self, pool_size=32, verify=False):
+        """
+
+        Args:
+            pool_size (int): max number of connections kept alive per host
+            verify (bool): whether to verify the certificates of the hosts
+
+        """
+        self.pool_size = max(1, pool_size)
+        self.verify = verify
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.logger = log.my_logger(name=self.__class__.__name__)
+
+    def session(self, host):
+        """
+        get the session of a host, created at the first use
+
+        Args:
+            host (str): the name of the ESXi host
+
+        Returns:
+            requests.Session: the session to the host
+        """
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                session.mount(
+                    "https://",
+                    HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size),
+                )
+                session.verify = self.verify
+                self._sessions[host] = session
+            return self._sessions[host]
+
+    def close(self):
+        """close the sessions of all hosts"""
+
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ProgressReader(object):
+    """
+    A local file opened for upload, which is read in blocks (so a request
+    body of any size is streamed with constant memory) and reports the
+    progress of reading it
+
+    """
+
+    def __init__(self, path, label, step=10):
+        """
+
+        Args:
+            path (str): the local file
+            label (str): the transfer to report, e.g. "file to VM"
+            step (int): report every step percent of the file read
+
+        """
+        self.path = path
+        self.label = label
+        self.step = step
+        self.size = os.path.getsize(path)
+        self.logger = log.my_logger(name=self.__class__.__name__)
+        self._file = open(path, "rb")
+        self._read = 0
+        self._reported = 0
+
+    def __len__(self):
+        return self.size
+
+    def read(self, size=-1):
+        """read a block of the file and report the progress"""
+
+        data = self._file.read(size)
+        self._read += len(data)
+        if self.size >= PROGRESS_MIN_SIZE:
+            percent = self._read * 100 // self.size
+            if percent >= self._reported + self.step:
+                self._reported = percent - percent % self.step
+                self.logger.info(
+                    "Uploading {0}: {1}% ({2}/{3} MB)".format(
+                        self.label,
+                        self._reported,
+                        self._read // 1024**2,
+                        self.size // 1024**2,
+                    )
+                )
+        return data
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class UploadManifest(object):
+    """
+    The sha256 of the files uploaded to a guest OS, keyed by the
+    destination path, which is kept as a JSON file in the guest to skip
+    uploading unchanged files
+
+    """
+
+    def __init__(self, content=None):
+        """
+
+        Args:
+            content (bytes): the manifest file content from the guest,
+                             None if there is no manifest yet
+
+        """
+        self.entries = {}
+        self.changed = False
+        if content:
+            try:
+                entries = json.loads(content)
+            except ValueError:
+                entries = {}
+            if isinstance(entries, dict):
+                self.entries = entries
+
+    def unchanged(self, dest_file_path, digest):
+        """whether the destination already holds the content of digest"""
+
+        return self.entries.get(dest_file_path) == digest
+
+    def record(self, dest_file_path, digest):
+        """record the content uploaded to the destination"""
+
+        if self.entries.get(dest_file_path) != digest:
+            self.entries[dest_file_path] = digest
+            self.changed = True
+
+    def dumps(self):
+        """the manifest file content"""
+
+        return json.dumps(self.entries, indent=1, sort_keys=True)
+
+
+class Bundle(object):
+    """
+    A local directory of post scripts and their assets (configs, RPMs,
+    module files ...), packed once into a compressed archive which is
+    uploaded once per VM, unpacked in the guest and the scripts run from
+    it in order
+
+    """
+
+    RUNNER = "vhpc_bundle_run.sh"
+
+    def __init__(self, directory, scripts=None):
+        """
+
+        Args:
+            directory (str): the local directory to bundle
+            scripts (list): the scripts (relative to the directory) to run
+                            in order. If None, the *.sh files at the top
+                            of the directory are run in name order.
+
+        """
+        self.logger = log.my_logger(name=self.__class__.__name__)
+        self.directory = os.path.abspath(directory)
+        if not os.path.isdir(self.directory):
+            self.logger.error("Couldn't find bundle directory {0}".format(directory))
+            raise SystemExit
+        self.name = re.sub(r"[^\w.-]", "_", os.path.basename(self.directory))
+        if scripts:
+            self.scripts = list(scripts)
+        else:
+            self.scripts = sorted(
+                entry
+                for entry in os.listdir(self.directory)
+                if entry.endswith(".sh")
+                and os.path.isfile(os.path.join(self.directory, entry))
+            )
+        if not self.scripts:
+            self.logger.error("No script to run in bundle {0}".format(directory))
+            raise SystemExit
+        for script in self.scripts:
+            if not os.path.isfile(os.path.join(self.directory, script)):
+                self.logger.error(
+                    "Couldn't find script {0} in bundle {1}".format(script, directory)
+                )
+                raise SystemExit
+        self._temp_dir = tempfile.mkdtemp(prefix="vhpc_bundle_")
+        self.archive = os.path.join(self._temp_dir, "vhpc_bundle_%s.tar.gz" % self.name)
+        self._pack()
+
+    def _runner(self):
+        """the script which runs the bundled scripts in order and stops at
+        the first failure"""
+
+        lines = ["#!/bin/sh", "set -e"]
+        lines.extend("sh {0}".format(shlex.quote(script)) for script in self.scripts)
+        return ("\n".join(lines) + "\n").encode()
+
+    def _pack(self):
+        """pack the directory and the runner into the archive. The archive
+        is reproducible (sorted entries, no pack time), so an unchanged
+        directory gives the same sha256 and isn't uploaded again."""
+
+        with gzip.GzipFile(self.archive, mode="wb", mtime=0) as gz:
+            with tarfile.open(fileobj=gz, mode="w") as tar:
+                for root, dirs, files in os.walk(self.directory):
+                    dirs.sort()
+                    for file_name in sorted(files):
+                        path = os.path.join(root, file_name)
+                        tar.add(
+                            path,
+                            arcname=os.path.relpath(path, self.directory),
+                            recursive=False,
+                        )
+                runner = self._runner()
+                info = tarfile.TarInfo(self.RUNNER)
+                info.size = len(runner)
+                info.mode = 0o755
+                tar.addfile(info, io.BytesIO(runner))
+        self.logger.info(
+            "Packed {0} into {1} ({2} KB)".format(
+                self.directory, self.archive, os.path.getsize(self.archive) // 1024
+            )
+        )
+
+    def command(self):
+        """the shell command to unpack the uploaded archive (in the home
+        folder of the guest user) and run the scripts"""
+
+        bundle_dir = shlex.quote("vhpc_bundle_%s" % self.name)
+        return (
+            "rm -rf {0} && mkdir -p {0} && tar -xzf {1} -C {0} "
+            "&& cd {0} && sh {2}".format(
+                bundle_dir,
+                shlex.quote(os.path.basename(self.archive)),
+                shlex.quote(self.RUNNER),
+            )
+        )
+
+    def cleanup(self):
+        """remove the local archive"""
+
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+
+class GuestLogCollector(object):
+    """
+    Fetch the logs of guest processes into local files
+    (<log_dir>/<VM>/<script>.log), concurrently across VMs. Each fetch
+    appends what a log has gained since the previous fetch, so running
+    processes can be tailed. A guest file transfer can't start at an
+    offset, so a log is read again from its start each time; the log of a
+    running process is only fetched again once it has doubled (and grown
+    by TAIL_MIN_GROWTH), which keeps the bytes read linear in its size.
+
+    """
+
+    def __init__(self, guest_operations_manager, log_dir, parallel=32):
+        """
+
+        Args:
+            guest_operations_manager (GuestOperationsManager): the guest
+                        operations manager from service content
+            log_dir (str): the local folder to save the logs in
+            parallel (int): max number of VMs to fetch logs from concurrently
+
+        """
+        self.guest_operations_manager = guest_operations_manager
+        self.log_dir = log_dir
+        self.parallel = parallel
+        self.sessions = SessionPool(pool_size=parallel)
+        # bytes of each local log fetched so far, updated by the threads
+        # fetching from the VMs
+        self._fetched = {}
+        self._fetched_lock = threading.Lock()
+        self.logger = log.my_logger(name=self.__class__.__name__)
+
+    def fetch(self, procs, tail=False):
+        """
+        fetch the new part of the logs of processes
+
+        Args:
+            procs (list): a list of GuestProc
+            tail (bool): whether the processes are still running, so that
+                         only the logs which have grown enough are fetched
+
+        Returns:
+            None
+        """
+        by_vm = {}
+        for proc in procs:
+            by_vm.setdefault(proc.vm_obj, []).append(proc)
+        Executor(parallel=self.parallel).run(
+            list(by_vm.values()),
+            lambda vm_procs: self._fetch_vm(vm_procs, tail),
+            name=lambda vm_procs: vm_procs[0].vm_name,
+        )
+
+    def _fetch_vm(self, procs, tail):
+        """fetch the logs of the processes of one VM"""
+
+        vm_obj = procs[0].vm_obj
+        host_name = vm_obj.runtime.host.name
+        local_dir = os.path.join(self.log_dir, procs[0].vm_name)
+        if not os.path.isdir(local_dir):
+            os.makedirs(local_dir)
+        for proc in procs:
+            local_file = os.path.join(local_dir, "%s.log" % proc.name)
+            file_manager = self.guest_operations_manager.fileManager
+            try:
+                info = file_manager.InitiateFileTransferFromGuest(
+                    vm=vm_obj, auth=proc.auth, guestFilePath=proc.log_path
+                )
+            except vim.fault.FileNotFound:
+                continue
+            with self._fetched_lock:
+                offset = self._fetched.get(local_file, 0)
+            if info.size <= offset:
+                continue
+            if tail and info.size - offset < max(TAIL_MIN_GROWTH, offset):
+                continue
+            url = re.sub(r"^https://\*:", "https://" + host_name + ":", info.url)
+            resp = self.sessions.session(host_name).get(url, stream=True)
+            resp.raise_for_status()
+            skip = offset
+            with open(local_file, "ab" if offset else "wb") as f:
+                for block in resp.iter_content(chunk_size=1024**2):
+                    if skip >= len(block):
+                        skip -= len(block)
+                        continue
+                    f.write(block[skip:])
+                    offset += len(block) - skip
+                    skip = 0
+            with self._fetched_lock:
+                self._fetched[local_file] = offset
+
+    def close(self):
+        """close the sessions to the hosts"""
+
+        self.sessions.close()
+        if self._fetched:
+            self.logger.info(
+                "Logs of guest processes are saved in {0}".format(self.log_dir)
+            )
+
+
+class FanOut(object):
+    """
+    Files to distribute from a head VM to compute VMs over the guest
+    network in a tree: each VM copies the files (scp) to the home folder
+    of the guest user of up to fanout children, which forward them to
+    their own subtrees (ssh). Requires passwordless SSH from the head VM
+    to the guest users of the compute VMs. The copy targets which got the
+    files are listed in the done file in the head VM. The files land in
+    one folder under their base names, which must be plain and distinct.
+
+    """
+
+    SCRIPT = "vhpc_fanout.sh"
+    FILE_LIST = "vhpc_fanout.files"
+    DONE = "vhpc_fanout.done"
+
+    def __init__(self, files, targets, fanout=4):
+        """
+
+        Args:
+            files (list): the local files to distribute
+            targets (dict): a copy target (<guest username>@<IP>) to the
+                            name of its VM
+            fanout (int): max number of VMs each VM copies the files to
+
+        """
+        self.logger = log.my_logger(name=self.__class__.__name__)
+        self.files = []
+        names = {}
+        for file in files:
+            name = os.path.basename(file)
+            if not FAN_OUT_NAME_RE.match(name):
+                self.logger.error(
+                    "Can't distribute {0}: only letters, digits and ._+- are "
+                    "allowed in the file names".format(file)
+                )
+                raise SystemExit
+            if names.setdefault(name, file) != file:
+                self.logger.error(
+                    "Can't distribute {0} and {1}: the same file name".format(
+                        names[name], file
+                    )
+                )
+                raise SystemExit
+            if file not in self.files:
+                self.files.append(file)
+        self.fanout = max(1, fanout)
+        self.targets = dict(targets)
+        # the distribution process in the head VM, once launched
+        self.proc = None
+        self._temp_dir = tempfile.mkdtemp(prefix="vhpc_fanout_")
+        self.script = os.path.join(self._temp_dir, self.SCRIPT)
+        self.file_list = os.path.join(self._temp_dir, self.FILE_LIST)
+        with open(self.script, "w") as f:
+            f.write(self._script())
+        with open(self.file_list, "w") as f:
+            f.write("\n".join(os.path.basename(file) for file in self.files) + "\n")
+
+    @staticmethod
+    def _script():
+        """the script run by each VM of the tree, as
+        sh vhpc_fanout.sh <fanout> <file list> <target> ...
+        The targets are split into fanout subtrees, and the first target of
+        each subtree forwards the files to the rest of it. Each target which
+        got the files is printed."""
+
+        return """#!/bin/sh
+fanout=$1
+files=$2
+shift 2
+[ $# -eq 0 ] && exit 0
+subtree=$(( ($# + fanout - 1) / fanout ))
+opts="-o BatchMode=yes -o StrictHostKeyChecking=no"
+while [ $# -gt 0 ]; do
+    child=$1
+    shift
+    rest=""
+    i=1
+    while [ $i -lt $subtree ] && [ $# -gt 0 ]; do
+        rest="$rest $1"
+        shift
+        i=$((i + 1))
+    done
+    (scp -q $opts $(cat $files) $files %s $child: &&
+        echo $child &&
+        ssh $opts $child "sh %s $fanout $files $rest") &
+done
+wait
+""" % (
+            FanOut.SCRIPT,
+            FanOut.SCRIPT,
+        )
+
+    def command(self):
+        """the shell command for the head VM to distribute the files to
+        the targets, listing the ones which got them in the done file"""
+
+        return "sh {0} {1} {2} {3} > {4}".format(
+            self.SCRIPT,
+            self.fanout,
+            self.FILE_LIST,
+            " ".join(shlex.quote(target) for target in sorted(self.targets)),
+            self.DONE,
+        )
+
+    def distributed(self, done):
+        """
+        get the VMs which got the files
+
+        Args:
+            done (bytes): the content of the done file, or None
+
+        Returns:
+            set: the names of the VMs
+        """
+        copied = set((done or b"").decode(errors="replace").split())
+        return {vm for target, vm in self.targets.items() if target in copied}
+
+    def cleanup(self):
+        """remove the local script and file list"""
+
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
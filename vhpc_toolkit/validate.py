@@ -0,0 +1,175 @@
+# Virtualized High Performance Computing Toolkit
+#
+# Copyright (c) 2018-2019 VMware, Inc. All Rights Reserved.
+#
+# This product is licensed to you under the Apache 2.0 license (the
+# "License"). You may not use this product except in compliance with the
+# Apache 2.0 License. This product may include a number of subcomponents with
+#  separate copyright notices and license terms. Your use of these
+# subcomponents is subject to the terms and conditions of the subcomponent's
+# license, as noted in the LICENSE file.
+# SPDX-License-Identifier: Apache-2.0
+# coding=utf-8
+import re
+import statistics
+
+from texttable import Texttable
+
+# the in-guest tests, per node or per pair of nodes
+NODE_TESTS = ["stream", "mtu"]
+PAIR_TESTS = ["bw", "lat"]
+# the perftest column reported by the pair tests, and whether higher is better
+PAIR_COLUMNS = {
+    "bw": ("BW average[MB/sec]", True),
+    "lat": ("t_typical[usec]", False),
+}
+
+
+def pair_rounds(nodes):
+    """
+    schedule all pairs of nodes into rounds (round-robin), in which each
+    node is in at most one pair, so the pairs of a round can run
+    concurrently without sharing a node
+
+    Args:
+        nodes (list): the nodes, e.g. VM names or objects
+
+    Returns:
+        list: a list of rounds, each a list of (client, server) tuples
+    """
+    nodes = list(nodes)
+    if len(nodes) % 2:
+        nodes.append(None)
+    rounds = []
+    for _ in range(len(nodes) - 1):
+        half = len(nodes) // 2
+        rounds.append(
+            [
+                (first, second)
+                for first, second in zip(nodes[:half], reversed(nodes[half:]))
+                if first is not None and second is not None
+            ]
+        )
+        # keep the first node, rotate the others
+        nodes = [nodes[0]] + [nodes[-1]] + nodes[1:-1]
+    return [pairs for pairs in rounds if pairs]
+
+
+def parse_stream(output):
+    """get the best Triad rate (MB/s) from the output of STREAM, or None"""
+
+    match = re.search(r"^Triad:\s+([\d.]+)", output, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def parse_perftest(output, column):
+    """
+    get a column of the (last) result row from the output of a perftest
+    benchmark (e.g. ib_write_bw, ib_write_lat)
+
+    Args:
+        output (str): the stdout of the benchmark
+        column (str): the column header, e.g. "BW average[MB/sec]"
+
+    Returns:
+        float: the value, or None if it's not found
+    """
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        # a header is "#name" or ends with its unit, e.g. "BW peak[MB/sec]"
+        headers = []
+        words = []
+        for word in line.split():
+            words.append(word)
+            if word.startswith("#") or word.endswith("]"):
+                headers.append(" ".join(words))
+                words = []
+        if column not in headers:
+            continue
+        position = headers.index(column)
+        value = None
+        for row in lines[index + 1 :]:
+            fields = row.split()
+            if not fields or not re.match(r"^\d", fields[0]):
+                break
+            if len(fields) > position:
+                value = float(fields[position])
+        return value
+    return None
+
+
+def parse_active_mtu(output):
+    """get the lowest active MTU of the RDMA ports from the output of
+    ibv_devinfo, or None if there is no port"""
+
+    mtus = [int(mtu) for mtu in re.findall(r"active_mtu:\s+(\d+)", output)]
+    return min(mtus) if mtus else None
+
+
+def out_of_tolerance(values, tolerance, target=None, higher_is_better=True):
+    """
+    find the values which fall outside the tolerance of a target, or of
+    the median of all values if no target is given
+
+    Args:
+        values (dict): a dict of key (node or pair) to value (None if it
+                       couldn't be measured)
+        tolerance (float): the tolerance in percent
+        target (float): the expected value
+        higher_is_better (bool): whether larger values are better
+
+    Returns:
+        tuple: (reference value, dict of key to value out of tolerance)
+    """
+    measured = [value for value in values.values() if value is not None]
+    if not measured:
+        return None, {}
+    reference = target if target is not None else statistics.median(measured)
+    if higher_is_better:
+        limit = reference * (1 - tolerance / 100.0)
+        flagged = {
+            key: value
+            for key, value in values.items()
+            if value is not None and value < limit
+        }
+    else:
+        limit = reference * (1 + tolerance / 100.0)
+        flagged = {
+            key: value
+            for key, value in values.items()
+            if value is not None and value > limit
+        }
+    return reference, flagged
+
+
+def print_matrix(names, values, title):
+    """
+    print a node by node matrix of the results of a pair test, with the
+    flagged ones marked by "*"
+
+    Args:
+        names (list): the node names
+        values (dict): a dict of (client, server) to (value, flagged)
+        title (str): the title of the matrix
+
+    Returns:
+        None
+    """
+    print(title)
+    table = Texttable(max_width=0)
+    table.set_cols_dtype(["t"] * (len(names) + 1))
+    table_rows = [["client \\ server"] + list(names)]
+    for client in names:
+        row = [client]
+        for server in names:
+            value, flagged = values.get((client, server), (None, False))
+            if client == server:
+                row.append("-")
+            elif value is None:
+                row.append("n/a" if (client, server) in values else "")
+            else:
+                row.append("{0:.2f}{1}".format(value, "*" if flagged else ""))
+        table_rows.append(row)
+    table.add_rows(table_rows)
+    table.set_deco(Texttable.VLINES | Texttable.HEADER)
+    print(table.draw())
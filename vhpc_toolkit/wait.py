@@ -11,10 +11,19 @@
 # SPDX-License-Identifier: Apache-2.0
 # coding=utf-8
 import time
+from collections import namedtuple
 
 from pyVmomi import vim
+from pyVmomi import vmodl
 
 from vhpc_toolkit import log
+from vhpc_toolkit.executor import Executor
+
+# a process started in a guest OS, with the name of its VM (so that polling
+# it needs no property read) and the guest path of its log
+GuestProc = namedtuple(
+    "GuestProc", ["pid", "auth", "vm_obj", "vm_name", "name", "log_path"]
+)
 
 
 class VMGetWait(object):
@@ -92,6 +101,61 @@ class VMGetWait(object):
         raise SystemExit
 
 
+class HostGetWait(object):
+    """
+    a class for waiting for host related status
+    """
+
+    def __init__(self, host_obj, timeout=1800, sleep=10):
+        """
+
+        Args:
+            host_obj (vim.HostSystem)
+            timeout (int): timeout for the waiting
+            sleep (int): sleep seconds before rechecking
+
+        """
+
+        self.host_obj = host_obj
+        self.timeout = timeout
+        self.sleep = sleep
+        self.logger = log.my_logger(name=self.__class__.__name__)
+
+    def wait_for_reboot(self, last_boot_time):
+        """wait for the host to boot again and reconnect to vCenter
+
+        Args:
+            last_boot_time (datetime): the boot time of the host before
+                                       the reboot
+
+        Returns:
+            bool: True if the host is rebooted and connected
+
+        """
+
+        waited = 0
+        while waited < self.timeout:
+            try:
+                runtime = self.host_obj.runtime
+                if (
+                    runtime.connectionState == "connected"
+                    and runtime.bootTime != last_boot_time
+                ):
+                    self.logger.info(
+                        "Host {0} is rebooted and connected".format(self.host_obj.name)
+                    )
+                    return True
+            except vmodl.MethodFault:
+                pass
+            time.sleep(self.sleep)
+            waited += self.sleep
+        self.logger.error(
+            "Host {0} is not reconnected in {1} seconds after "
+            "reboot".format(self.host_obj.name, self.timeout)
+        )
+        return False
+
+
 class GetWait(object):
     """
     a class for waiting for vCenter tasks
@@ -150,29 +214,298 @@ class GetWait(object):
                 else:
                     pass
 
-    def wait_for_procs(self, proc_mng, procs, sleep=1):
-        """wait a list of processes to finish in guest OS
+    def wait_for_vms_tools(self, content, started, tools_ready, until):
+        """wait for VMware Tools running in VMs until it is running for all
+        VMs or the deadline is reached, by watching guest.toolsRunningStatus
+        of all VMs through one property collector filter
+
+        Args:
+            content: vCenter retrieved content
+            started (dict): {vm_obj: time when its power-on was issued}
+            tools_ready (dict): {vm_obj: seconds from power-on to VMware Tools
+                                running}, updated in place
+            until (float): the deadline in seconds since the epoch
+
+        Returns:
+            bool: True if VMware Tools is running for all VMs
+
+        """
+
+        waiting = [vm_obj for vm_obj in started if vm_obj not in tools_ready]
+        if not waiting:
+            return True
+        property_collector = content.propertyCollector
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec()
+        filter_spec.objectSet = [
+            vmodl.query.PropertyCollector.ObjectSpec(obj=vm_obj) for vm_obj in waiting
+        ]
+        filter_spec.propSet = [
+            vmodl.query.PropertyCollector.PropertySpec(
+                type=vim.VirtualMachine, pathSet=["guest.toolsRunningStatus"]
+            )
+        ]
+        property_filter = property_collector.CreateFilter(filter_spec, True)
+        version = ""
+        try:
+            while len(tools_ready) < len(started) and time.time() < until:
+                options = vmodl.query.PropertyCollector.WaitOptions(
+                    maxWaitSeconds=max(1, int(until - time.time()))
+                )
+                update_set = property_collector.WaitForUpdatesEx(version, options)
+                if update_set is None:
+                    continue
+                version = update_set.version
+                for filter_update in update_set.filterSet:
+                    for object_update in filter_update.objectSet:
+                        vm_obj = object_update.obj
+                        for change in object_update.changeSet:
+                            if (
+                                change.val == "guestToolsRunning"
+                                and vm_obj in started
+                                and vm_obj not in tools_ready
+                            ):
+                                tools_ready[vm_obj] = time.time() - started[vm_obj]
+        finally:
+            property_filter.Destroy()
+        return len(tools_ready) == len(started)
+
+    def wait_for_task_chains(self, chains, task_name):
+        """wait for chains of tasks as a pipeline: the next step of a chain
+        is started as soon as the task of its previous step is successful,
+        regardless of the progress of other chains
+
+        Args:
+            chains (list): a list of chains. Each chain is a list of
+                           callables, each of which starts a Task and
+                           returns it (or returns None to skip the step)
+            task_name: the task name of the chains of tasks
+
+        Returns:
+            int: the number of chains completed successfully
+
+        """
+
+        running = []
+        completed = 0
+        for chain in chains:
+            steps = iter(chain)
+            task = self._start_next_step(steps)
+            if task is None:
+                completed += 1
+            else:
+                running.append((steps, task))
+        while running:
+            still_running = []
+            for steps, task in running:
+                info = task.info
+                if info.state == vim.TaskInfo.State.success:
+                    next_task = self._start_next_step(steps)
+                    if next_task is None:
+                        completed += 1
+                        self.logger.info(
+                            "Task {0} (number {1}) is "
+                            "successful".format(task_name, task)
+                        )
+                    else:
+                        still_running.append((steps, next_task))
+                elif info.state == vim.TaskInfo.State.error:
+                    self.logger.error(
+                        "Task {0} (number {1}) has an error "
+                        "- {2}".format(task_name, task, info.error.msg)
+                    )
+                else:
+                    still_running.append((steps, task))
+            running = still_running
+            if running:
+                time.sleep(self.sleep)
+        return completed
+
+    @staticmethod
+    def _start_next_step(steps):
+        """start the next step of a task chain which returns a Task"""
+
+        for step in steps:
+            task = step()
+            if task is not None:
+                return task
+        return None
+
+    def wait_for_power_off(self, content, vm_objs, timeout):
+        """wait for VMs to be powered off, by watching runtime.powerState
+        of all VMs through one property collector filter
+
+        Args:
+            content: vCenter retrieved content
+            vm_objs (list): a list of vim.VirtualMachine to wait for
+            timeout (int): seconds to wait
+
+        Returns:
+            list: a list of vim.VirtualMachine which are still powered on
+
+        """
+
+        property_collector = content.propertyCollector
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec()
+        filter_spec.objectSet = [
+            vmodl.query.PropertyCollector.ObjectSpec(obj=vm_obj) for vm_obj in vm_objs
+        ]
+        filter_spec.propSet = [
+            vmodl.query.PropertyCollector.PropertySpec(
+                type=vim.VirtualMachine, pathSet=["runtime.powerState"]
+            )
+        ]
+        property_filter = property_collector.CreateFilter(filter_spec, True)
+        powered_on = set(vm_objs)
+        deadline = time.time() + timeout
+        version = ""
+        try:
+            while powered_on and time.time() < deadline:
+                options = vmodl.query.PropertyCollector.WaitOptions(
+                    maxWaitSeconds=max(1, int(deadline - time.time()))
+                )
+                update_set = property_collector.WaitForUpdatesEx(version, options)
+                if update_set is None:
+                    continue
+                version = update_set.version
+                for filter_update in update_set.filterSet:
+                    for object_update in filter_update.objectSet:
+                        for change in object_update.changeSet:
+                            if change.val != vim.VirtualMachinePowerState.poweredOn:
+                                if object_update.obj in powered_on:
+                                    self.logger.info(
+                                        "VM {0} is shut down".format(
+                                            object_update.obj.name
+                                        )
+                                    )
+                                powered_on.discard(object_update.obj)
+        finally:
+            property_filter.Destroy()
+        return [vm_obj for vm_obj in vm_objs if vm_obj in powered_on]
+
+    def wait_for_procs(
+        self, proc_mng, procs, sleep=1, on_progress=None, progress_interval=10
+    ):
+        """wait a list of processes to finish in guest OS. The processes
+        of a VM are checked in one call, and all processes are waited for
+        before reporting failures
 
         Args:
             proc_mng (guestOperationsManager.processManager)
-            procs (a list of tuple): each tuple has process trace info,
-                                    [(pid, auth, vm_obj)]
+            procs (list): a list of GuestProc
             sleep (int): sleep the number of seconds before re-checking
+            on_progress (function): called with a list of GuestProc, for the
+                                    running processes every progress_interval
+                                    seconds (with tail=True) and for each
+                                    process once it ends (e.g. to fetch
+                                    their logs)
+            progress_interval (int): seconds between on_progress calls for
+                                     the running processes
 
         Returns:
             None
 
         """
 
-        for proc in procs:
-            pid, auth, vm_obj = proc
-            proc_info = proc_mng.ListProcessesInGuest(vm_obj, auth, [pid])
-            while not proc_info[0].endTime:
+        pending = list(procs)
+        failed = []
+        last_progress = time.time()
+        while pending:
+            running, finished, finished_failed = self.check_procs(proc_mng, pending)
+            failed.extend(finished_failed)
+            if on_progress and finished:
+                on_progress(finished)
+            if (
+                on_progress
+                and running
+                and time.time() - last_progress >= progress_interval
+            ):
+                on_progress(running, tail=True)
+                last_progress = time.time()
+            pending = running
+            if pending:
                 time.sleep(sleep)
-                proc_info = proc_mng.ListProcessesInGuest(vm_obj, auth, [pid])
-            exit_code = proc_info[0].exitCode
-            if exit_code == 0:
-                self.logger.info("Process {0} completed successfully".format(pid))
-            elif exit_code != 0:
-                self.logger.error("Process {0} is finished with an error".format(pid))
-                raise SystemExit
+        if failed:
+            self.logger.error(
+                "{0} of {1} process(es) are finished with an error".format(
+                    len(failed), len(procs)
+                )
+            )
+            raise SystemExit
+
+    def check_procs(self, proc_mng, procs, parallel=8):
+        """check the processes in guest OS once (the processes of a VM in
+        one call, parallel VMs at a time), and log the ones which have
+        finished. Listing the processes of a VM is retried once, and the
+        processes of a VM which still can't be listed are finished with an
+        error.
+
+        Args:
+            proc_mng (guestOperationsManager.processManager)
+            procs (list): a list of GuestProc
+            parallel (int): the number of VMs to check concurrently
+
+        Returns:
+            tuple: (running, finished, failed) lists of GuestProc, where
+                   failed are the finished ones with a non-zero exit code
+
+        """
+
+        by_vm = {}
+        for proc in procs:
+            by_vm.setdefault(proc.vm_obj, []).append(proc)
+        items = list(by_vm.items())
+        outcomes = Executor(parallel=parallel).run(
+            items,
+            lambda item: self._list_procs(proc_mng, item[1]),
+            name=lambda item: item[1][0].vm_name,
+        )
+        running = []
+        finished = []
+        failed = []
+        for (_, vm_procs), outcome in zip(items, outcomes):
+            vm_name = vm_procs[0].vm_name
+            if outcome.status != "ok":
+                self.logger.error(
+                    "Couldn't list the process(es) in VM {0}".format(vm_name)
+                )
+                finished.extend(vm_procs)
+                failed.extend(vm_procs)
+                continue
+            proc_infos = {proc_info.pid: proc_info for proc_info in outcome.result}
+            for proc in vm_procs:
+                proc_info = proc_infos.get(proc.pid)
+                if proc_info is not None and not proc_info.endTime:
+                    running.append(proc)
+                    continue
+                finished.append(proc)
+                exit_code = proc_info.exitCode if proc_info else None
+                if exit_code == 0:
+                    self.logger.info(
+                        "Process {0} ({1} in VM {2}) completed "
+                        "successfully".format(proc.pid, proc.name, vm_name)
+                    )
+                else:
+                    self.logger.error(
+                        "Process {0} ({1} in VM {2}) is finished with an "
+                        "error. Log: {3}".format(
+                            proc.pid, proc.name, vm_name, proc.log_path
+                        )
+                    )
+                    failed.append(proc)
+        return running, finished, failed
+
+    def _list_procs(self, proc_mng, procs):
+        """list the processes of one VM, retrying once if the call fails
+        (e.g. the guest agent is busy)"""
+
+        vm_obj = procs[0].vm_obj
+        pids = [proc.pid for proc in procs]
+        try:
+            return proc_mng.ListProcessesInGuest(vm_obj, procs[0].auth, pids)
+        except vmodl.MethodFault as e:
+            self.logger.info(
+                "Couldn't list the process(es) in VM {0}: {1}. "
+                "Retrying".format(procs[0].vm_name, e.msg)
+            )
+            time.sleep(self.sleep)
+        return proc_mng.ListProcessesInGuest(vm_obj, procs[0].auth, pids)